@@ -1,5 +1,6 @@
 # actions/generate_code.py (更新)
 from __future__ import annotations
+import time
 from typing import Dict, Any, Optional
 try:
     from metagpt.actions import Action
@@ -12,6 +13,9 @@ except ImportError:
             raise NotImplementedError
 
 from core.ast_utils import to_brief
+from core.code_stream import StreamingCodeChecker, STREAM_STATS
+from core.token_budget import TokenBudgeter
+from utils.logger import get_logger
 
 DEV_PROMPT_FALLBACK = """# FILE_PATH: {file_path}
 你是资深开发工程师，负责实现或修复单个文件。
@@ -35,6 +39,11 @@ interfaces：
 {issues_excerpt}
 """
 
+STREAM_RETRY_HINT = """
+
+注意：上一次输出不是合法的 Python 源码（{reason}）。只输出纯 Python 代码，不要使用 markdown 代码块，不要附加解释。
+"""
+
 class GenerateCodeAction(Action):
     def __init__(self, llm=None):
         try:
@@ -43,6 +52,20 @@ class GenerateCodeAction(Action):
         # 兼容我们自带的占位 Action(name: str="")
             super().__init__(name="GenerateCodeAction")
         self.llm = llm
+        self.stream_retries = 1
+        self.last_changed = False   # 最近一次 run 是否真的改动了文件；False 表示输出与现有内容字节相同
+        self.log = get_logger("codegen")
+
+    @staticmethod
+    def _brief_block(path: str, b: Dict[str, Any]) -> str:
+        lines = [f"* {path}"]
+        for f in b.get("functions", []):
+            lines.append(f"  - {f['signature']}")
+        for c in b.get("classes", []):
+            lines.append(f"  - class {c['name']}")
+            for m in c.get("methods", []):
+                lines.append(f"    - {m['signature']}")
+        return "\n".join(lines)
 
     def _build_prompt(self, file_spec: Dict[str, Any], briefs: Dict[str, Any], issues: Optional[Dict[str, Any]] = None) -> str:
         functions = file_spec["interfaces"].get("functions", [])
@@ -58,38 +81,57 @@ class GenerateCodeAction(Action):
                 iface_lines.append(f"  method: {m['signature']}  # {m.get('doc','')}")
         interfaces_pretty = "\n".join(iface_lines) if iface_lines else "(无)"
 
-        brief_lines = []
-        for path, b in briefs.items():
-            brief_lines.append(f"* {path}")
-            for f in b.get("functions", []):
-                brief_lines.append(f"  - {f['signature']}")
-            for c in b.get("classes", []):
-                brief_lines.append(f"  - class {c['name']}")
-                for m in c.get("methods", []):
-                    brief_lines.append(f"    - {m['signature']}")
-        briefs_pretty = "\n".join(brief_lines) if brief_lines else "(无)"
-
-        issues_excerpt = ""
-        if issues:
-            stack = issues.get("stack", "")
-            issues_excerpt = stack[:2000]  # 控制长度，避免爆上下文
-
-        tpl = DEV_PROMPT_FALLBACK
-        return tpl.format(
+        fixed = DEV_PROMPT_FALLBACK.format(
+            file_path=file_spec["path"],
+            responsibilities=file_spec.get("responsibilities", ""),
+            interfaces_pretty=interfaces_pretty,
+            briefs_pretty="",
+            issues_excerpt="",
+        )
+        # 直接依赖的简报与其余简报分成两段：优先级为 依赖简报 > 失败堆栈 > 其余简报
+        deps = file_spec.get("dependencies", [])
+        dep_blocks = [self._brief_block(p, briefs[p]) for p in deps if p in briefs]
+        other_blocks = [self._brief_block(p, b) for p, b in briefs.items() if p not in deps]
+
+        # 失败堆栈：指向目标文件的帧优先，其次断言/异常行；输出时保持原顺序
+        stack_lines = (issues or {}).get("stack", "").splitlines()
+        target = file_spec["path"]
+        stack_rank = sorted(range(len(stack_lines)), key=lambda i: (
+            0 if target in stack_lines[i] else 1 if stack_lines[i].startswith("E ") else 2, i))
+
+        fitted = TokenBudgeter("developer").fit(
+            fixed,
+            [("dep_briefs", dep_blocks), ("stack", stack_lines), ("other_briefs", other_blocks)],
+            keep_order=("stack",),
+            ranks={"stack": stack_rank},
+        )
+        briefs_pretty = "\n".join(t for t in (fitted["dep_briefs"], fitted["other_briefs"]) if t)
+        return DEV_PROMPT_FALLBACK.format(
             file_path=file_spec["path"],
             responsibilities=file_spec.get("responsibilities", ""),
             interfaces_pretty=interfaces_pretty,
-            briefs_pretty=briefs_pretty,
-            issues_excerpt=issues_excerpt or "(无)"
+            briefs_pretty=briefs_pretty or "(无)",
+            issues_excerpt=fitted["stack"] or "(无)"
         )
 
-    async def run(self, file_spec: Dict[str, Any], briefs: Dict[str, Any], llm, repo_manager, agent_id: str, issues: Optional[Dict[str, Any]] = None):
+    async def run(self, file_spec: Dict[str, Any], briefs: Dict[str, Any], llm, repo_manager, agent_id: str, issues: Optional[Dict[str, Any]] = None,
+                  executor: Optional[str] = None):
+        self.last_changed = False
         prompt = self._build_prompt(file_spec, briefs, issues)
-        code = await llm.text(prompt)
+        if getattr(llm, "stream_code", False) and hasattr(llm, "text_stream") and file_spec["path"].endswith(".py"):
+            code = await self._stream_code(llm, prompt, file_spec["path"])
+        else:
+            code = await llm.text(prompt)
         # change_type: 若文件已存在则为 modify，否则 create
         change_type = "modify" if repo_manager.exists(file_spec["path"]) else "create"
-        repo_manager.write_file(file_spec["path"], code, agent_id=agent_id)
+        changed = repo_manager.write_file(file_spec["path"], code, agent_id=agent_id)
         brief = to_brief(code)
+        if changed is False and not repo_manager.pending_commit(file_spec["path"]):
+            # 重新生成的内容与现有版本完全相同：不提交，由调用方据此判断修复是否收敛
+            self.log.info(f"unchanged {file_spec['path']}; skip commit")
+            return brief
+        # 内容相同但尚未提交（断点恢复、写入与提交之间崩溃）：照常提交，但不算作改动
+        self.last_changed = changed is not False
         ur = {
             "file_path": file_spec["path"],
             "change_type": change_type,
@@ -102,5 +144,34 @@ class GenerateCodeAction(Action):
             "rationale": "fix implementation per QA feedback" if issues else "initial implementation based on file_spec",
             "related_files_brief_used": list(briefs.keys())
         }
-        repo_manager.commit_file(file_spec["path"], ur, agent_id)
+        repo_manager.commit_file(file_spec["path"], ur, agent_id, executor=executor)
         return brief
+
+
+    async def _stream_code(self, llm, prompt: str, file_path: str) -> str:
+        reason = None
+        for attempt in range(self.stream_retries + 1):
+            if reason:
+                prompt = prompt + STREAM_RETRY_HINT.format(reason=reason)
+            checker = StreamingCodeChecker()
+            t0 = time.perf_counter()
+            ttft = None
+            reason = None
+            agen = llm.text_stream(prompt)
+            try:
+                async for chunk in agen:
+                    if ttft is None:
+                        ttft = time.perf_counter() - t0
+                    reason = checker.feed(chunk)
+                    if reason:
+                        break
+            finally:
+                await agen.aclose()
+            if not reason:
+                reason = checker.finish()
+            STREAM_STATS.record(ttft, len(checker.text), reason)
+            if not reason:
+                self.log.info(f"stream {file_path} ttft={ttft or 0:.2f}s total={time.perf_counter() - t0:.2f}s chars={len(checker.text)}")
+                return checker.text
+            self.log.warning(f"stream abort {file_path} attempt={attempt} reason={reason} chars={len(checker.text)}")
+        raise ValueError(f"generated code for {file_path} is not valid Python: {reason}")
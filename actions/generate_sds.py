@@ -14,6 +14,7 @@ except ImportError:
             raise NotImplementedError
 
 from core.schemas import validate_sds
+from core.token_budget import TokenBudgeter
 
 ARCHITECT_PROMPT_FALLBACK = """你是资深软件架构师。输出严格JSON，符合SDS Schema。
 要求：
@@ -46,19 +47,23 @@ class GenerateSDSAction(Action):
             return p.read_text(encoding="utf-8")
         return ARCHITECT_PROMPT_FALLBACK
 
-    def _render_rag(self, docs: List[Dict[str, Any]]) -> str:
-        if not docs:
-            return ""
+    def _rag_items(self, docs: List[Dict[str, Any]]) -> List[str]:
         parts = []
-        for i, d in enumerate(docs[:8], 1):
+        for i, d in enumerate((docs or [])[:8], 1):
             txt = d.get("text", "")
             src = d.get("meta", {}).get("source", "")
             parts.append(f"[{i}] {src}\n{txt}")
-        return "\n\n".join(parts)
+        return parts
+
+    def _render_rag(self, docs: List[Dict[str, Any]]) -> str:
+        return "\n\n".join(self._rag_items(docs))
 
     def _build_prompt(self, q: str, rag_docs: List[Dict[str, Any]]) -> str:
         tpl = self._load_prompt_template()
-        return tpl.format(question=q, rag_snippets=self._render_rag(rag_docs))
+        # 检索结果已按相关度排序，超出预算的尾部片段被丢弃
+        fitted = TokenBudgeter("architect").fit(tpl.format(question=q, rag_snippets=""),
+                                                [("rag", self._rag_items(rag_docs))], joiner="\n\n")
+        return tpl.format(question=q, rag_snippets=fitted["rag"])
 
     async def run(self, question: str, rag_client=None) -> Dict[str, Any]:
         rag_docs = rag_client.query(question) if rag_client else []
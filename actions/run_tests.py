@@ -1,5 +1,6 @@
 # actions/run_tests.py
 from __future__ import annotations
+import inspect
 try:
     from metagpt.actions import Action
 except ImportError:
@@ -18,5 +19,9 @@ class RunTestsAction(Action):
         # 兼容我们自带的占位 Action(name: str="")
             super().__init__(name="RunTestsAction")
 
-    async def run(self, repo_root, run_command, runtime_adapter):
-        return runtime_adapter.run_tests(repo_root, run_command)
\ No newline at end of file
+    async def run(self, repo_root, run_command, runtime_adapter, **options):
+        # 同时兼容同步与异步 runtime adapter；options（node_ids / impact_map）只在给定时传入
+        result = runtime_adapter.run_tests(repo_root, run_command, **options)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
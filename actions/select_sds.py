@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 from typing import List, Dict, Any
+from core.token_budget import TokenBudgeter, count_tokens
 try:
     from metagpt.actions import Action
 except ImportError:
@@ -15,7 +16,7 @@ except ImportError:
 
 CTO_PROMPT_FALLBACK = """你是CTO。对给定的多份SDS进行评分，维度：可行性、复杂度、成本、可测试性、一致性。
 若所选技术栈非python，请改选最优的python方案。
-输出严格JSON：{"chosen_index": number, "rationale": string}
+输出严格JSON：{{"chosen_index": number, "rationale": string}}
 
 输入：
 Q:
@@ -48,13 +49,54 @@ class SelectSDSAction(Action):
             return ""
         return "\n\n".join([d.get("text", "") for d in docs[:6]])
 
+    def _slim_sds(self, sds: Dict[str, Any]) -> Dict[str, Any]:
+        # 超预算时的精简版：去掉 doc/notes，目录树拍平为文件列表，职责描述截断
+        def slim_funcs(funcs):
+            return [f.get("signature", f.get("name", "")) for f in funcs]
+        files = []
+        def walk(n, base=""):
+            p = f"{base}/{n['path']}".lstrip("/")
+            if n.get("type") == "file":
+                files.append(p)
+            for c in n.get("children", []):
+                walk(c, p)
+        for n in sds.get("repo_structure", []):
+            walk(n)
+        return {
+            "id": sds.get("id"),
+            "problem": sds.get("problem", "")[:200],
+            "tech_stack": sds.get("tech_stack"),
+            "files": files,
+            "file_specs": [{
+                "path": fs.get("path"),
+                "responsibilities": fs.get("responsibilities", "")[:200],
+                "functions": slim_funcs(fs.get("interfaces", {}).get("functions", [])),
+                "classes": [{"name": c.get("name"), "methods": slim_funcs(c.get("methods", []))}
+                            for c in fs.get("interfaces", {}).get("classes", [])],
+                "dependencies": fs.get("dependencies", []),
+            } for fs in sds.get("file_specs", [])],
+            "dev_plan": sds.get("dev_plan"),
+        }
+
+    def _render_sds_list(self, sds_list: List[Dict[str, Any]], max_tokens: int) -> str:
+        # SDS 列表不能截断（CTO 需要按下标选择），只能逐级精简
+        full = json.dumps(sds_list, ensure_ascii=False, separators=(",", ":"))
+        if count_tokens(full) <= max_tokens:
+            return full
+        return json.dumps([self._slim_sds(s) for s in sds_list], ensure_ascii=False, separators=(",", ":"))
+
     def _build_prompt(self, question: str, sds_list: List[Dict[str, Any]], rag_client=None) -> str:
         rag_docs = rag_client.query(question) if rag_client else []
         tpl = self._load_prompt_template()
+        budgeter = TokenBudgeter("cto")
+        template = tpl.format(question=question, sds_list="", rag_snippets="")
+        sds_text = self._render_sds_list(sds_list, budgeter.budget - count_tokens(template))
+        fitted = budgeter.fit({"template": template, "sds_list": sds_text},
+                              [("rag", [d.get("text", "") for d in (rag_docs or [])[:6]])], joiner="\n\n")
         return tpl.format(
             question=question,
-            sds_list=json.dumps(sds_list, ensure_ascii=False, indent=2),
-            rag_snippets=self._render_rag(rag_docs),
+            sds_list=sds_text,
+            rag_snippets=fitted["rag"],
         )
 
     async def run(self, question: str, sds_list: List[Dict[str, Any]], rag_client=None) -> Dict[str, Any]:
@@ -0,0 +1,215 @@
+# app/batch_runner.py
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import load_config
+
+# ---- 子进程内状态：每个进程只 bootstrap 一次，并复用同一个事件循环（异步连接池绑定在循环上） ----
+_CTX = None
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_CONCURRENCY = 1
+_INIT_ERROR: Optional[str] = None
+
+def _init_worker(n_workers: int, concurrency: int, llm_overrides: Optional[Dict[str, Any]] = None):
+    global _CTX, _LOOP, _CONCURRENCY, _INIT_ERROR
+    _LOOP = asyncio.new_event_loop()
+    asyncio.set_event_loop(_LOOP)
+    _CONCURRENCY = max(1, concurrency)
+    try:
+        from app.bootstrap import bootstrap
+        cfg = load_config()
+        for k, v in (llm_overrides or {}).items():
+            setattr(cfg.llm, k, v)
+        # 限流器是进程级的：总配额按进程数均分
+        if n_workers > 1:
+            cfg.llm.rpm = cfg.llm.rpm // n_workers if cfg.llm.rpm else 0
+            cfg.llm.tpm = cfg.llm.tpm // n_workers if cfg.llm.tpm else 0
+        _CTX = bootstrap(cfg)
+    except Exception as e:
+        # 初始化失败不让进程退出：记录下来，由该进程领到的每个任务报告失败原因
+        _INIT_ERROR = f"{type(e).__name__}: {e}"
+
+async def _run_one(job: Dict[str, Any], sem: asyncio.Semaphore) -> Dict[str, Any]:
+    from orchestrator.context import Context
+    from orchestrator.workflow_async import MultiAgentCodegenWorkflowAsync
+    async with sem:
+        t0 = time.perf_counter()
+        result = {"id": job["id"], "pid": os.getpid()}
+        try:
+            cfg = _CTX.cfg
+            copy = getattr(cfg, "model_copy", None) or cfg.copy
+            job_cfg = copy(update={"workspace": str(Path(cfg.workspace) / "batch" / job["id"]), "user_question": job["question"]})
+            Path(job_cfg.workspace).mkdir(parents=True, exist_ok=True)
+            wf = MultiAgentCodegenWorkflowAsync(Context(cfg=job_cfg, llm=_CTX.llm, rag=_CTX.rag, pool=_CTX.pool))
+            result["repo"] = await wf.run(question=job["question"])
+            if _CTX.pool is not None and cfg.workspace_pool.recycle:
+                archive = await asyncio.to_thread(_CTX.pool.recycle, result["repo"])
+                if archive is not None:
+                    result["repo"] = archive
+            result["status"] = "done"
+            result["metrics"] = wf.metrics
+        except Exception as e:
+            # 单个任务失败只体现在报告里，不影响同进程的其他任务
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+            result["traceback"] = traceback.format_exc(limit=5)
+        result["duration_s"] = round(time.perf_counter() - t0, 3)
+        return result
+
+def _job_failed(job: Dict[str, Any], error: str) -> Dict[str, Any]:
+    return {"id": job["id"], "pid": os.getpid(), "status": "failed", "error": error}
+
+def _worker_main(n_workers: int, concurrency: int, llm_overrides: Optional[Dict[str, Any]], jobs_q, results_q):
+    """子进程入口：concurrency 个协程各自从共享队列取任务，每完成一个就回报一条结果。"""
+    _init_worker(n_workers, concurrency, llm_overrides)
+    pid = os.getpid()
+
+    async def consume(sem: asyncio.Semaphore):
+        while True:
+            job = await asyncio.to_thread(jobs_q.get)
+            if job is None:
+                return
+            # 先登记再执行：进程崩溃时父进程据此知道哪些任务在跑
+            results_q.put(("start", pid, job))
+            if _INIT_ERROR:
+                result = _job_failed(job, f"worker init failed: {_INIT_ERROR}")
+            else:
+                result = await _run_one(job, sem)
+            results_q.put(("result", pid, result))
+
+    async def run_all():
+        sem = asyncio.Semaphore(_CONCURRENCY)
+        await asyncio.gather(*[consume(sem) for _ in range(_CONCURRENCY)])
+    _LOOP.run_until_complete(run_all())
+
+def load_jobs(path: str) -> List[Dict[str, Any]]:
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                obj = line
+            if isinstance(obj, str):
+                obj = {"question": obj}
+            question = obj.get("question") or obj.get("body") or obj.get("title")
+            if not question:
+                continue
+            job_id = str(obj.get("id") or obj.get("request_id") or f"job-{i:05d}")
+            jobs.append({"id": job_id, "question": question})
+    return jobs
+
+def _run_queue(jobs: List[Dict[str, Any]], workers: int, concurrency: int, n_workers: int,
+               llm_overrides: Optional[Dict[str, Any]], emit) -> List[Dict[str, Any]]:
+    """用 workers 个子进程消费同一个任务队列，每个任务一结束就 emit；返回因进程崩溃没有结果的任务。"""
+    ctx = multiprocessing.get_context()
+    jobs_q, results_q = ctx.Queue(), ctx.Queue()
+    for j in jobs:
+        jobs_q.put(j)
+    for _ in range(workers * max(1, concurrency)):
+        jobs_q.put(None)
+    procs = [ctx.Process(target=_worker_main, args=(n_workers, concurrency, llm_overrides, jobs_q, results_q), daemon=True)
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    pending = {j["id"]: j for j in jobs}
+    running: Dict[int, Dict[str, Dict[str, Any]]] = {p.pid: {} for p in procs}
+    crashed: List[Dict[str, Any]] = []
+    while pending:
+        try:
+            kind, pid, payload = results_q.get(timeout=0.5)
+        except queue.Empty:
+            kind = None
+        if kind == "start":
+            running.setdefault(pid, {})[payload["id"]] = payload
+        elif kind == "result" and pending.pop(payload["id"], None) is not None:
+            running.get(pid, {}).pop(payload["id"], None)
+            emit(payload)
+        for p in procs:
+            if p.exitcode not in (None, 0) and running.get(p.pid):
+                # 崩溃进程正在跑的任务没有结果；它没取走的任务由其他进程继续消费
+                for job in running.pop(p.pid).values():
+                    if pending.pop(job["id"], None) is not None:
+                        crashed.append(job)
+        if kind is None and all(p.exitcode is not None for p in procs):
+            # 所有进程都已退出（全部崩溃时队列里的任务无人消费）：剩下的一并交给隔离重跑
+            crashed.extend(pending.values())
+            pending.clear()
+    for p in procs:
+        p.join(timeout=5)
+        if p.is_alive():
+            p.kill()
+    return crashed
+
+def _run_isolated(job: Dict[str, Any], workers: int, concurrency: int,
+                  llm_overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # 独占一个子进程重跑：再次崩溃即可确定是该任务本身导致的
+    results: List[Dict[str, Any]] = []
+    if _run_queue([job], 1, concurrency, workers, llm_overrides, results.append):
+        return {"id": job["id"], "status": "failed", "error": "worker process crashed"}
+    return results[0]
+
+def run_batch(jobs: List[Dict[str, Any]], out, workers: int, concurrency: int,
+              llm_overrides: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """workers 个子进程共享一个任务队列，每个进程同时跑 concurrency 个任务；每完成一个任务就写出一行 JSONL。
+
+    慢任务只占住自己的并发槽，不拖住其他任务的结果。子进程崩溃时，它正在跑的任务
+    逐个放进独立的子进程重跑，只有真正导致崩溃的任务记为 failed。
+    """
+    summary = {"total": len(jobs), "done": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def emit(r: Dict[str, Any]):
+        with lock:
+            summary["done" if r["status"] == "done" else "failed"] += 1
+            out.write(json.dumps(r, ensure_ascii=False) + "\n")
+            out.flush()
+
+    crashed = _run_queue(jobs, workers, concurrency, workers, llm_overrides, emit) if jobs else []
+    if crashed:
+        # 按原并行度并发地逐个隔离重跑
+        with ThreadPoolExecutor(max_workers=workers) as tp:
+            futs = [tp.submit(_run_isolated, j, workers, concurrency, llm_overrides) for j in crashed]
+            for fut in as_completed(futs):
+                emit(fut.result())
+    return summary
+
+def main():
+    ap = argparse.ArgumentParser(description="shard a JSONL batch of questions across worker processes")
+    ap.add_argument("input", help="JSONL file; each line has question/body (or is a plain string)")
+    ap.add_argument("--out", help="JSONL report path (default: stdout)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--per-process", type=int, default=4, help="concurrent jobs per worker process")
+    ap.add_argument("--provider", help="override llm.provider (e.g. mock)")
+    ap.add_argument("--model", help="override llm.model")
+    args = ap.parse_args()
+    jobs = load_jobs(args.input)
+    llm_overrides = {k: v for k, v in (("provider", args.provider), ("model", args.model)) if v}
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    t0 = time.perf_counter()
+    try:
+        summary = run_batch(jobs, out, workers=max(1, args.workers), concurrency=max(1, args.per_process),
+                            llm_overrides=llm_overrides)
+    finally:
+        if args.out:
+            out.close()
+    summary["wall_s"] = round(time.perf_counter() - t0, 3)
+    print(json.dumps(summary), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
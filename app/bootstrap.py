@@ -1,14 +1,37 @@
 # app/bootstrap.py
 from core.llm import LLMClient as MockLLM
 from core.llm_openai import OpenAILLM
+from core.llm_cache import CachedLLM, DiskLRUCache
+from core.llm_singleflight import SingleFlightLLM
+from core.rate_limiter import configure_rate_limiter
+from core.token_budget import configure_budgets
 from orchestrator.context import Context
+from orchestrator.workspace_pool import WorkspacePool
 
 def bootstrap(cfg):
     import os
     os.makedirs(cfg.workspace, exist_ok=True)
+    # 进程级限流器：所有 Agent 共享同一对 RPM/TPM 令牌桶
+    limiter = configure_rate_limiter(rpm=cfg.llm.rpm, tpm=cfg.llm.tpm)
+    configure_budgets(cfg.llm.prompt_budgets)
     if cfg.llm.provider == "openai":
-        llm = OpenAILLM(model=cfg.llm.model, temperature=cfg.llm.temperature, max_tokens=cfg.llm.max_tokens, base_url=cfg.llm.base_url)
+        # 同步工作流的线程各自跑事件循环，不能共享异步连接池，退回线程模式
+        transport = cfg.llm.transport if cfg.async_mode else "thread"
+        llm = OpenAILLM(model=cfg.llm.model, temperature=cfg.llm.temperature, max_tokens=cfg.llm.max_tokens, base_url=cfg.llm.base_url,
+                        transport=transport, max_connections=cfg.llm.max_connections,
+                        max_keepalive_connections=cfg.llm.max_keepalive_connections, request_timeout=cfg.llm.request_timeout,
+                        max_retries=cfg.llm.max_retries, rate_limiter=limiter, stream_code=cfg.llm.stream_code)
     else:
         llm = MockLLM(cfg.llm)
+    if cfg.llm_cache.enabled:
+        llm = CachedLLM(llm, DiskLRUCache(cfg.llm_cache.dir, max_bytes=cfg.llm_cache.max_bytes), bypass=cfg.llm_cache.bypass)
+    if cfg.singleflight.enabled:
+        # 放在缓存外层：并发的相同未命中请求只穿透一次
+        llm = SingleFlightLLM(llm, bypass_roles=cfg.singleflight.bypass_roles)
     rag = None  # 可按需初始化
-    return Context(cfg=cfg, llm=llm, rag=rag)
\ No newline at end of file
+    pool = None
+    if cfg.workspace_pool.enabled:
+        # 预热仓库池：作业领取仓库只需一次 rename
+        pc = cfg.workspace_pool
+        pool = WorkspacePool(pc.root or os.path.join(cfg.workspace, ".pool"), size=pc.size, archive_dir=pc.archive_dir).start()
+    return Context(cfg=cfg, llm=llm, rag=rag, pool=pool)
\ No newline at end of file
@@ -1,30 +1,94 @@
 # app/config.py
 from __future__ import annotations
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class RAGConfig(BaseModel):
     enabled: bool = False
     index_dir: str = "./rag_index"
     top_k: int = 6
 
+class LLMCacheConfig(BaseModel):
+    enabled: bool = False
+    dir: str = "./workspace/.llm_cache"
+    max_bytes: int = 512 * 1024 * 1024
+    bypass: List[str] = []   # 跳过缓存的调用类型：text|structured_json|files
+
+class SingleFlightConfig(BaseModel):
+    enabled: bool = False
+    bypass_roles: List[str] = ["architect"]   # 追求多样性的角色不参与合并
+
 class LLMConfig(BaseModel):
     provider: str = "openai"   # mock|openai
     model: str = "gpt-3.5-turbo"
     temperature: float = 0.2
     max_tokens: int = 4000
     base_url: Optional[str] = None
+    transport: str = "async"   # async|thread；async 使用原生异步客户端与共享连接池
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
+    request_timeout: float = 120.0
+    max_retries: int = 3
+    rpm: int = 0   # 每分钟请求数上限，0 表示不限
+    tpm: int = 0   # 每分钟 token 上限，0 表示不限
+    prompt_budgets: Dict[str, int] = {}   # 按角色覆盖 prompt token 预算：architect|cto|developer|qa
+    stream_code: bool = False   # 代码生成走流式输出，语法不可能合法时提前中止
+
+class ServiceConfig(BaseModel):
+    host: str = "127.0.0.1"
+    port: int = 8765
+    unix_socket: Optional[str] = None
+    max_queue: int = 100
+    max_concurrent_jobs: int = 4
+
+class EventBusConfig(BaseModel):
+    backend: str = "memory"   # memory|socket；socket 时 Developer worker 经本地代理收发事件，可分布到其他进程/主机
+    address: str = "tcp://127.0.0.1:0"   # 代理监听地址，也可用 unix:///path/to.sock；端口 0 表示自动分配
+
+class RuntimeConfig(BaseModel):
+    mode: str = "cold"   # cold|warm；warm 时每个仓库保留一个常驻 pytest 进程，轮间只重新导入改动过的模块
+    warm_max_runs: int = 20   # 常驻进程跑满该轮数后换新，限制残留状态的累积
+    shards: int = 0   # >1 时冷启动模式把用例按历史耗时分到多个 pytest 子进程并行执行
+    impact: bool = False   # 记录用例 -> 源文件映射，修复轮只重跑受影响的用例和仍失败的用例，通过后全量确认
+    timeout: float = 600.0   # 秒；单次测试运行的墙钟上限，超时整个进程组被杀掉，0 表示不限
+    cpu_seconds: int = 0   # 单次运行的 CPU 秒数上限（RLIMIT_CPU），0 表示不限
+    memory_mb: int = 0   # 测试进程的地址空间上限（RLIMIT_AS），0 表示不限
+    open_files: int = 0   # 打开文件数上限（RLIMIT_NOFILE），0 表示不限
+    max_output_bytes: int = 8 * 1024 * 1024   # 每个输出流保留的字节数，超出部分截掉中间、保留首尾
+
+class WorkspacePoolConfig(BaseModel):
+    enabled: bool = False
+    size: int = 4   # 预热的空仓库数量
+    root: Optional[str] = None   # 池目录，默认 <workspace>/.pool；可指向 tmpfs（如 /dev/shm/codeteam-pool）
+    recycle: bool = False   # 服务/批量作业结束后归档仓库并把目录交回池中
+    archive_dir: Optional[str] = None   # 回收前把仓库打包为 tar.gz 的目录；不设则直接丢弃
 
 class SystemConfig(BaseModel):
     architects: int = 2
     sds_retry: int = 1
+    sds_quorum: int = 0   # 凑够该数量的合法 SDS 即进入 CTO 评审，0 表示等待全部 Architect
+    sds_deadline: float = 0.0   # 秒；超时后用已到达的 SDS 继续，0 表示不设截止
+    sds_first_valid: bool = False   # 延迟敏感任务：第一份合法 SDS 即胜出
     max_rounds: int = 2
     workspace: str = "./workspace"
     allow_languages: List[str] = ["python"]
     user_question: str = "请生成一个简单的可测试问候程序"
     async_mode: bool = True
+    dag_waves: bool = True   # 首轮按依赖拓扑分波次实现
+    overlap_qa_tests: bool = True   # QA 生成测试与首轮实现并行
+    dev_concurrency: int = 0   # >0 时启用共享任务队列：该数量的 worker 可领取任意文件任务
+    commit_window: float = 0.5   # 秒；单写者线程把窗口内完成的文件合并为一次提交，每轮结束强制提交；<0 表示每个文件同步提交
+    git_object_store: bool = False   # 直接写 git 对象提交，跳过工作区与索引；工作区在跑测试前才落盘
+    dev_worktrees: bool = False   # 每个 dev_plan 开发者独立 worktree/分支，轮次屏障处合并；不能与 git_object_store 同时开启
+    checkpoint: bool = True   # 每个阶段结束后在仓库旁写断点文件，可用 --resume 继续
     llm: LLMConfig = LLMConfig()
     rag: RAGConfig = RAGConfig()
+    llm_cache: LLMCacheConfig = LLMCacheConfig()
+    singleflight: SingleFlightConfig = SingleFlightConfig()
+    service: ServiceConfig = ServiceConfig()
+    event_bus: EventBusConfig = EventBusConfig()
+    workspace_pool: WorkspacePoolConfig = WorkspacePoolConfig()
+    runtime: RuntimeConfig = RuntimeConfig()
 
 
 def load_config(path: str = None) -> SystemConfig:
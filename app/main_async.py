@@ -1,15 +1,35 @@
 # app/main_async.py
+import argparse
 import asyncio
 from app.config import load_config
 from app.bootstrap import bootstrap
 from orchestrator.workflow_async import MultiAgentCodegenWorkflowAsync
+from core.rate_limiter import get_rate_limiter
+from core.code_stream import STREAM_STATS
 
-async def amain():
+async def amain(resume: str | None = None):
     cfg = load_config()
     ctx = bootstrap(cfg)
     wf = MultiAgentCodegenWorkflowAsync(ctx)
-    repo_path = await wf.run(question=cfg.user_question)
+    try:
+        if resume:
+            repo_path = await wf.resume(resume)
+        else:
+            repo_path = await wf.run(question=cfg.user_question)
+    finally:
+        layer = ctx.llm
+        while hasattr(layer, "inner"):
+            print(f"{type(layer).__name__}: {layer.stats()}")
+            layer = layer.inner
+        print(f"LLM rate limiter: {get_rate_limiter().stats()}")
+        if cfg.llm.stream_code:
+            print(f"LLM code streams: {STREAM_STATS.stats()}")
+        if hasattr(ctx.llm, "aclose"):
+            await ctx.llm.aclose()
     print(f"Done. Repo at: {repo_path}")
 
 if __name__ == "__main__":
-    asyncio.run(amain())
+    ap = argparse.ArgumentParser(description="multi-agent code generation (async workflow)")
+    ap.add_argument("--resume", metavar="REPO", help="continue an interrupted run from the checkpoint next to REPO")
+    args = ap.parse_args()
+    asyncio.run(amain(resume=args.resume))
@@ -0,0 +1,249 @@
+# app/service.py
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+from app.config import load_config
+from app.bootstrap import bootstrap
+from orchestrator.context import Context
+from orchestrator.workflow_async import MultiAgentCodegenWorkflowAsync
+from utils.logger import get_logger
+
+class QueueFull(Exception):
+    pass
+
+@dataclass
+class Job:
+    id: str
+    question: str
+    client: str = "default"
+    status: str = "queued"   # queued|running|done|failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    repo: Optional[str] = None
+    error: Optional[str] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        if self.started_at:
+            d["queue_wait_s"] = round(self.started_at - self.submitted_at, 3)
+        if self.started_at and self.finished_at:
+            d["duration_s"] = round(self.finished_at - self.started_at, 3)
+        return d
+
+
+class JobService:
+    """常驻服务：多个问题在同一进程内并发生成。
+
+    所有任务共享 LLM 客户端（连接池、限流、缓存）与 RAG 索引；每个任务有独立的
+    workspace 子目录，因此各自拥有独立的 RepoManager 仓库。排队按 client 轮转，
+    避免单个提交方占满执行槽。
+    """
+
+    def __init__(self, cfg, ctx: Optional[Context] = None):
+        self.cfg = cfg
+        self.ctx = ctx or bootstrap(cfg)
+        self.log = get_logger("service")
+        self.jobs: Dict[str, Job] = {}
+        self._queues: "OrderedDict[str, Deque[Job]]" = OrderedDict()
+        self._queued = 0
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(cfg.service.max_concurrent_jobs)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._started = time.time()
+
+    # ---- 任务队列 ----
+    def submit(self, question: str, client: str = "default") -> Job:
+        if self._queued >= self.cfg.service.max_queue:
+            raise QueueFull(f"job queue full ({self._queued})")
+        job = Job(id=uuid.uuid4().hex[:12], question=question, client=client)
+        self.jobs[job.id] = job
+        self._queues.setdefault(client, deque()).append(job)
+        self._queued += 1
+        self._wakeup.set()
+        self.log.info(f"job_submitted {job.id} client={client} queued={self._queued}")
+        return job
+
+    def _next_job(self) -> Optional[Job]:
+        # 按 client 轮转：取队首 client 的一个任务后把该 client 移到末尾
+        while self._queues:
+            client = next(iter(self._queues))
+            q = self._queues[client]
+            if not q:
+                del self._queues[client]
+                continue
+            job = q.popleft()
+            self._queued -= 1
+            if q:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            return job
+        return None
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            job = self._next_job()
+            while job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                job = self._next_job()
+            self._running[job.id] = asyncio.create_task(self._run_job(job), name=f"job-{job.id}")
+
+    async def _run_job(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            workspace = str(Path(self.cfg.workspace) / "jobs" / job.id)
+            copy = getattr(self.cfg, "model_copy", None) or self.cfg.copy
+            job_cfg = copy(update={"workspace": workspace, "user_question": job.question})
+            Path(workspace).mkdir(parents=True, exist_ok=True)
+            job_ctx = Context(cfg=job_cfg, llm=self.ctx.llm, rag=self.ctx.rag, pool=self.ctx.pool)
+            wf = MultiAgentCodegenWorkflowAsync(job_ctx)
+            job.repo = await wf.run(question=job.question)
+            job.metrics = wf.metrics
+            if self.ctx.pool is not None and self.cfg.workspace_pool.recycle:
+                # 仓库目录交回池中；归档时 job.repo 改为归档文件路径，否则保留原路径
+                archive = await asyncio.to_thread(self.ctx.pool.recycle, job.repo)
+                if archive is not None:
+                    job.repo = archive
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            self.log.error(f"job_failed {job.id} {job.error}")
+        finally:
+            job.finished_at = time.time()
+            self._running.pop(job.id, None)
+            self._slots.release()
+            self.log.info(f"job_finished {job.id} status={job.status} duration={job.finished_at - job.started_at:.2f}s")
+
+    def start(self):
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch(), name="job-dispatcher")
+
+    async def stop(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        for t in list(self._running.values()):
+            t.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        finished = [j for j in self.jobs.values() if j.finished_at]
+        done = [j for j in finished if j.status == "done"]
+        uptime = time.time() - self._started
+        durations = [j.finished_at - j.started_at for j in finished]
+        waits = [j.started_at - j.submitted_at for j in self.jobs.values() if j.started_at]
+        pool = {"workspace_pool": self.ctx.pool.stats()} if self.ctx.pool is not None else {}
+        return {
+            "uptime_s": round(uptime, 1),
+            "submitted": len(self.jobs),
+            "queued": self._queued,
+            "running": len(self._running),
+            "done": len(done),
+            "failed": len(finished) - len(done),
+            "throughput_jobs_per_min": round(len(done) / uptime * 60, 3) if uptime > 0 else 0.0,
+            "avg_duration_s": round(sum(durations) / len(durations), 3) if durations else 0.0,
+            "avg_queue_wait_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            **pool,
+        }
+
+    # ---- HTTP API ----
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                writer.close()
+                return
+            method, path, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                k, _, v = line.partition(":")
+                headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+            status, payload = self._route(method, path, body)
+        except Exception as e:
+            status, payload = 400, {"error": str(e)}
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _route(self, method: str, path: str, body: bytes):
+        if method == "POST" and path == "/jobs":
+            req = json.loads(body or b"{}")
+            if not req.get("question"):
+                return 400, {"error": "question is required"}
+            try:
+                job = self.submit(req["question"], client=str(req.get("client", "default")))
+            except QueueFull as e:
+                return 429, {"error": str(e)}
+            return 202, {"job_id": job.id, "status": job.status}
+        if method == "GET" and path == "/jobs":
+            return 200, {"jobs": [j.to_dict() for j in self.jobs.values()]}
+        if method == "GET" and path.startswith("/jobs/"):
+            job = self.jobs.get(path[len("/jobs/"):])
+            return (200, job.to_dict()) if job else (404, {"error": "job not found"})
+        if method == "GET" and path == "/metrics":
+            return 200, self.metrics()
+        if method == "GET" and path == "/healthz":
+            return 200, {"ok": True}
+        return 404, {"error": f"no route {method} {path}"}
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests"}
+
+
+async def serve(cfg):
+    svc = JobService(cfg)
+    svc.start()
+    if cfg.service.unix_socket:
+        server = await asyncio.start_unix_server(svc.handle, path=cfg.service.unix_socket)
+        where = cfg.service.unix_socket
+    else:
+        server = await asyncio.start_server(svc.handle, host=cfg.service.host, port=cfg.service.port)
+        where = f"{cfg.service.host}:{cfg.service.port}"
+    svc.log.info(f"service listening on {where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await svc.stop()
+        if hasattr(svc.ctx.llm, "aclose"):
+            await svc.ctx.llm.aclose()
+
+def main():
+    ap = argparse.ArgumentParser(description="multi-job codegen service")
+    ap.add_argument("--host")
+    ap.add_argument("--port", type=int)
+    ap.add_argument("--unix", help="listen on a Unix domain socket instead of TCP")
+    args = ap.parse_args()
+    cfg = load_config()
+    if args.host:
+        cfg.service.host = args.host
+    if args.port:
+        cfg.service.port = args.port
+    if args.unix:
+        cfg.service.unix_socket = args.unix
+    asyncio.run(serve(cfg))
+
+if __name__ == "__main__":
+    main()
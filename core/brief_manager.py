@@ -16,4 +16,12 @@ class BriefManager:
 
     def list_available(self):
         with self._lock:
-            return list(self._briefs.keys())
\ No newline at end of file
+            return list(self._briefs.keys())
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._briefs)
+
+    def restore(self, briefs: Dict[str, dict]):
+        with self._lock:
+            self._briefs.update(briefs)
\ No newline at end of file
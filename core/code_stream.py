@@ -0,0 +1,132 @@
+# core/code_stream.py
+from __future__ import annotations
+import ast
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# 这些 SyntaxError 只说明代码"还没写完"，流式阶段不据此中止
+_INCOMPLETE_HINTS = (
+    "was never closed",
+    "unterminated triple-quoted",
+    "unexpected EOF",
+    "expected an indented block",
+    "expected 'except' or 'finally' block",
+)
+# 以这些关键字开头的顶层行延续上一条复合语句，不能作为切分点
+_CONTINUATIONS = ("else", "elif", "except", "finally")
+
+class StreamingCodeChecker:
+    """增量检查流式输出的 Python 源码。
+
+    只在"新的顶层语句开始"处切分，并且只解析上一个已确认切分点之后的片段，
+    整体解析成本与输出长度成线性关系。
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._confirmed = 0   # 已确认合法的前缀长度（字符）
+        self._scan_from = 0   # 下一次寻找切分点的起始位置
+        self._started = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        self.text += chunk
+        if not self._started:
+            head = self.text.lstrip()
+            if not head:
+                return None
+            if head.startswith("```") or (len(head) < 3 and "```".startswith(head)):
+                if len(head) >= 3:
+                    return "markdown fence"
+                return None
+            self._started = True
+        return self._check_boundaries()
+
+    def _check_boundaries(self) -> Optional[str]:
+        boundary = self._last_boundary()
+        if boundary is None or boundary <= self._confirmed:
+            return None
+        segment = self.text[self._confirmed:boundary]
+        try:
+            ast.parse(segment)
+        except SyntaxError as e:
+            msg = str(e.msg or "")
+            if any(h in msg for h in _INCOMPLETE_HINTS):
+                return None
+            line = self.text.count("\n", 0, self._confirmed) + (e.lineno or 1)
+            return f"line {line}: {msg}"
+        self._confirmed = boundary
+        return None
+
+    def _last_boundary(self) -> Optional[int]:
+        # 找最后一个"完整行之后紧跟顶层语句起始"的位置；下一行也必须已完整，
+        # 否则无法判断它是不是 else/except 之类的延续
+        found = None
+        pos = self.text.find("\n", self._scan_from)
+        while pos != -1:
+            nxt = pos + 1
+            line_end = self.text.find("\n", nxt)
+            if line_end == -1:
+                break
+            if self.text[nxt] not in " \t\r\n#)]}" and self._is_boundary(pos, self.text[nxt:line_end]):
+                found = nxt
+            self._scan_from = nxt
+            pos = line_end
+        return found
+
+    def _is_boundary(self, newline_pos: int, next_line: str) -> bool:
+        word = next_line.split(None, 1)[0].rstrip(":") if next_line.strip() else ""
+        if word in _CONTINUATIONS:
+            return False
+        prev_start = self.text.rfind("\n", 0, newline_pos) + 1
+        prev = self.text[prev_start:newline_pos].rstrip()
+        if prev.endswith("\\") or prev.startswith("@"):
+            return False
+        return True
+
+    def finish(self) -> Optional[str]:
+        if not self.text.strip():
+            return "empty output"
+        if self.text.lstrip().startswith("```"):
+            return "markdown fence"
+        try:
+            ast.parse(self.text)
+        except SyntaxError as e:
+            return f"line {e.lineno}: {e.msg}"
+        return None
+
+
+class StreamStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.aborts = 0
+        self.abort_reasons: Counter = Counter()
+        self.chars_before_abort = 0
+        self.ttft_total = 0.0
+        self.ttft_max = 0.0
+
+    def record(self, ttft: Optional[float], chars: int, abort_reason: Optional[str] = None):
+        with self._lock:
+            self.streams += 1
+            if ttft is not None:
+                self.ttft_total += ttft
+                self.ttft_max = max(self.ttft_max, ttft)
+            if abort_reason:
+                self.aborts += 1
+                self.abort_reasons[abort_reason.split(":", 1)[-1].strip()] += 1
+                self.chars_before_abort += chars
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "aborts": self.aborts,
+                "abort_reasons": dict(self.abort_reasons),
+                "chars_before_abort": self.chars_before_abort,
+                "ttft_avg_s": round(self.ttft_total / self.streams, 3) if self.streams else 0.0,
+                "ttft_max_s": round(self.ttft_max, 3),
+            }
+
+
+STREAM_STATS = StreamStats()
@@ -0,0 +1,123 @@
+# core/git_objects.py
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from git import Actor
+from git.objects import Commit
+
+BLOB_MODE = b"100644"
+TREE_MODE = b"40000"
+
+class _Tree:
+    """内存中的目录树节点。entries: name -> (mode, binsha)；已展开的子目录为 _Tree。
+    sha 为 None 表示该节点自上次写出后有改动，提交时需要重新生成树对象。"""
+    __slots__ = ("entries", "sha")
+
+    def __init__(self, entries: Dict[bytes, Union[Tuple[bytes, bytes], "_Tree"]], sha: Optional[bytes]):
+        self.entries = entries
+        self.sha = sha
+
+class GitObjectTree:
+    """绕过工作区与索引，直接用 git 底层对象（blob / tree / commit）提交内存中的文件内容。
+
+    HEAD 的树按需展开：只有被改动路径上的目录会被读入和重写，
+    提交开销与改动文件数（及其目录深度）成正比，与仓库总文件数无关。
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._objects_dir = Path(repo.git_dir) / "objects"
+        self._lock = threading.Lock()
+        self._head: Optional[bytes] = None
+        self._head_tree: Optional[bytes] = None
+        self.root = _Tree({}, None)
+        if repo.head.is_valid():
+            commit = repo.head.commit
+            self._head, self._head_tree = commit.binsha, commit.tree.binsha
+            self.root = _Tree(self._read_tree(self._head_tree), self._head_tree)
+        self._author = Actor.author(repo.config_reader())
+        self._committer = Actor.committer(repo.config_reader())
+
+    def _store(self, kind: str, data: bytes) -> bytes:
+        # 直接写松散对象：GitPython 的 odb.store 每个对象都会起一个 git hash-object 子进程
+        raw = f"{kind} {len(data)}\0".encode("ascii") + data
+        sha = hashlib.sha1(raw).digest()
+        hexsha = sha.hex()
+        path = self._objects_dir / hexsha[:2] / hexsha[2:]
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix="obj", dir=self._objects_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(raw, 1))
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, path)
+        return sha
+
+    def _read_tree(self, binsha: bytes) -> Dict[bytes, Tuple[bytes, bytes]]:
+        raw = self.repo.odb.stream(binsha).read()
+        entries, i = {}, 0
+        while i < len(raw):
+            sp = raw.index(b" ", i)
+            nul = raw.index(b"\0", sp)
+            entries[raw[sp + 1:nul]] = (raw[i:sp], raw[nul + 1:nul + 21])
+            i = nul + 21
+        return entries
+
+    def write_blob(self, data: bytes) -> bytes:
+        return self._store("blob", data)
+
+    def stage(self, rel_path: str, blob_sha: bytes, mode: bytes = BLOB_MODE):
+        *dirs, name = rel_path.encode("utf-8").split(b"/")
+        with self._lock:
+            node = self.root
+            node.sha = None
+            for d in dirs:
+                child = node.entries.get(d)
+                if not isinstance(child, _Tree):
+                    # 未展开的子目录按需读入；不存在则新建
+                    child = _Tree(self._read_tree(child[1]) if child and child[0] == TREE_MODE else {}, None)
+                    node.entries[d] = child
+                child.sha = None
+                node = child
+            node.entries[name] = (mode, blob_sha)
+
+    def _write_tree(self, node: _Tree) -> bytes:
+        if node.sha is not None:
+            return node.sha
+        items = []
+        for name, entry in node.entries.items():
+            if isinstance(entry, _Tree):
+                items.append((name + b"/", TREE_MODE, name, self._write_tree(entry)))
+            else:
+                mode, sha = entry
+                items.append((name + b"/" if mode == TREE_MODE else name, mode, name, sha))
+        # git 的树条目排序：目录名按追加 "/" 后比较
+        data = b"".join(mode + b" " + name + b"\0" + sha for _, mode, name, sha in sorted(items))
+        node.sha = self._store("tree", data)
+        return node.sha
+
+    def commit(self, message: str) -> Optional[str]:
+        """把已 stage 的内容写成一次提交并移动当前分支；树没有变化时返回 None。"""
+        with self._lock:
+            tree = self._write_tree(self.root)
+            if tree == self._head_tree:
+                return None
+            now = int(time.time())
+            tz = time.strftime("%z") or "+0000"
+            lines = [f"tree {tree.hex()}"]
+            if self._head is not None:
+                lines.append(f"parent {self._head.hex()}")
+            lines.append(f"author {self._author.name} <{self._author.email}> {now} {tz}")
+            lines.append(f"committer {self._committer.name} <{self._committer.email}> {now} {tz}")
+            data = ("\n".join(lines) + "\n\n" + message + "\n").encode("utf-8")
+            sha = self._store("commit", data)
+            self.repo.head.reference.set_object(Commit(self.repo, sha))
+            self._head = sha
+            self._head_tree = tree
+            return sha.hex()
@@ -0,0 +1,98 @@
+# core/git_worktrees.py
+from __future__ import annotations
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+from git import Actor, Repo
+
+def _safe(agent_id: str) -> str:
+    return re.sub(r"[^\w.-]", "_", agent_id)
+
+class DevWorktrees:
+    """每个 dev_plan 开发者一个 git worktree + 分支（dev/<id>），轮次屏障处合并回主分支。
+
+    dev_plan 的文件归属互不相交（validate_sds_semantics 保证），各分支只改自己的文件，
+    合并不会冲突；开发者在各自的工作区与索引上提交，彼此之间不需要任何共享锁。
+    worktree 放在仓库目录旁（<root>.worktrees/），不会被主仓库的 git add -A 收进去。
+    """
+
+    def __init__(self, repo: Repo, root: Path, agents: Iterable[str]):
+        self.repo = repo
+        self.base = root.parent / f"{root.name}.worktrees"
+        self.agents = list(agents)
+        self.main = ""
+        self._repos: Dict[str, Repo] = {}
+        self._locks: Dict[str, threading.Lock] = {a: threading.Lock() for a in self.agents}
+        self._merged: Dict[str, str] = {}
+        self._merges = 0
+        self._branches_merged = 0
+        self._merge_time = 0.0
+
+    def branch(self, agent_id: str) -> str:
+        return f"dev/{_safe(agent_id)}"
+
+    def path(self, agent_id: str) -> Path:
+        return self.base / _safe(agent_id)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._repos
+
+    def setup(self):
+        """主分支已有提交后调用；断点恢复时复用已有 worktree 并重置到主分支。"""
+        self.main = self.repo.active_branch.name
+        # git merge 需要提交者身份；与 GitPython index.commit 一样回退到 Actor 的默认值
+        author, committer = Actor.author(self.repo.config_reader()), Actor.committer(self.repo.config_reader())
+        self._env = {"GIT_AUTHOR_NAME": author.name, "GIT_AUTHOR_EMAIL": author.email,
+                     "GIT_COMMITTER_NAME": committer.name, "GIT_COMMITTER_EMAIL": committer.email}
+        self.repo.git.worktree("prune")
+        for a in self.agents:
+            p = self.path(a)
+            if (p / ".git").exists():
+                wt = Repo(p)
+                wt.git.reset("--hard", self.main)
+            else:
+                self.base.mkdir(parents=True, exist_ok=True)
+                self.repo.git.worktree("add", "-B", self.branch(a), str(p), self.main)
+                wt = Repo(p)
+            self._repos[a] = wt
+            self._merged[a] = wt.head.commit.hexsha
+
+    def commit(self, agent_id: str, rel_paths: List[str], message: str):
+        wt = self._repos[agent_id]
+        with self._locks[agent_id]:
+            wt.index.add([str(self.path(agent_id) / p) for p in rel_paths])
+            wt.index.commit(message)
+
+    def merge(self) -> int:
+        """把有新提交的开发者分支合并进主分支，再把各 worktree 快进到合并结果；返回合并的分支数。"""
+        t0 = time.perf_counter()
+        ahead = [a for a, wt in self._repos.items() if wt.head.commit.hexsha != self._merged[a]]
+        if not ahead:
+            return 0
+        branches = [self.branch(a) for a in ahead]
+        # 多个分支一次 octopus 合并；文件互不相交，不会产生冲突
+        self.repo.git.merge("--no-ff", "--no-edit", "-m", f"merge round: {', '.join(branches)}", *branches, env=self._env)
+        for a, wt in self._repos.items():
+            with self._locks[a]:
+                wt.git.merge("--ff-only", self.main)
+                self._merged[a] = wt.head.commit.hexsha
+        self._merges += 1
+        self._branches_merged += len(branches)
+        self._merge_time += time.perf_counter() - t0
+        return len(branches)
+
+    def remove(self):
+        for a in list(self._repos):
+            self.repo.git.worktree("remove", "--force", str(self.path(a)))
+            del self._repos[a]
+        if self.base.exists() and not any(self.base.iterdir()):
+            self.base.rmdir()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "merges": self._merges,
+            "branches_merged": self._branches_merged,
+            "merge_s": round(self._merge_time, 3),
+        }
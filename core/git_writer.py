@@ -0,0 +1,137 @@
+# core/git_writer.py
+from __future__ import annotations
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from utils.logger import get_logger
+
+class PendingCommit:
+    __slots__ = ("rel_path", "header", "update_reason", "submitted")
+
+    def __init__(self, rel_path: str, header: str, update_reason: dict):
+        self.rel_path = rel_path
+        self.header = header
+        self.update_reason = update_reason
+        self.submitted = time.monotonic()
+
+def batch_message(entries: List[PendingCommit]) -> str:
+    # 单文件保持原有格式；多文件时每个文件一行摘要 + 一行 UPDATE_REASON 结构化尾注
+    if len(entries) == 1:
+        e = entries[0]
+        return f"{e.header}\nUPDATE_REASON={json.dumps(e.update_reason, ensure_ascii=False)}"
+    lines = [f"batch: update {len(entries)} files", ""]
+    lines += [e.header for e in entries]
+    lines.append("")
+    lines += [f"UPDATE_REASON={json.dumps(e.update_reason, ensure_ascii=False)}" for e in entries]
+    return "\n".join(lines)
+
+class GitCommitWriter:
+    """单写者提交线程：所有 git 索引操作都在这一条线程上串行执行。
+
+    commit_file 只把 (path, UpdateReason) 放进队列立即返回，不阻塞事件循环；
+    写线程把 window 秒内到达的文件合并为一次提交，flush() 强制提交并等待完成（轮末调用）。
+    其他 git 操作（如 commit_all）经 call() 投递到同一线程，避免与批量提交争用索引。
+    真正的提交由 commit_batch(entries) 完成（索引模式或对象模式由 RepoManager 决定）。
+    """
+
+    def __init__(self, commit_batch: Callable[[List[PendingCommit]], None], window: float = 0.5):
+        self._commit_batch = commit_batch
+        self.window = window
+        self.log = get_logger("git_writer")
+        self._q: "queue.Queue[Any]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._commits = 0
+        self._files = 0
+        self._max_batch = 0
+        self._commit_time = 0.0
+        self._commit_max = 0.0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._thread = threading.Thread(target=self._loop, name="git-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, rel_path: str, header: str, update_reason: dict):
+        self._q.put(PendingCommit(rel_path, header, update_reason))
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """在写线程上执行 fn 并等待结果；排在它之前的文件先提交。"""
+        fut: Future = Future()
+        self._q.put((fn, fut))
+        return fut.result()
+
+    def flush(self):
+        self.call(lambda: None)
+        with self._lock:
+            err, self._error = self._error, None
+        if err is not None:
+            raise err
+
+    def close(self):
+        self.flush()
+        self._q.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        batch: List[PendingCommit] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                self._commit(batch)
+                batch = []
+                continue
+            if isinstance(item, PendingCommit):
+                if not batch:
+                    deadline = time.monotonic() + self.window
+                batch.append(item)
+                continue
+            # 控制项（call / 退出）之前的文件先落成一次提交
+            if batch:
+                self._commit(batch)
+                batch = []
+            if item is None:
+                return
+            fn, fut = item
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def _commit(self, batch: List[PendingCommit]):
+        t0 = time.monotonic()
+        try:
+            self._commit_batch(batch)
+        except Exception as e:
+            self.log.error(f"batch commit of {len(batch)} file(s) failed: {e}")
+            with self._lock:
+                self._error = e
+            return
+        t1 = time.monotonic()
+        with self._lock:
+            self._commits += 1
+            self._files += len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._commit_time += t1 - t0
+            self._commit_max = max(self._commit_max, t1 - t0)
+            for e in batch:
+                self._wait_total += t1 - e.submitted
+                self._wait_max = max(self._wait_max, t1 - e.submitted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "commits": self._commits,
+                "files": self._files,
+                "avg_batch": round(self._files / self._commits, 2) if self._commits else 0.0,
+                "max_batch": self._max_batch,
+                "commit_s_avg": round(self._commit_time / self._commits, 4) if self._commits else 0.0,
+                "commit_s_max": round(self._commit_max, 4),
+                "latency_s_avg": round(self._wait_total / self._files, 4) if self._files else 0.0,
+                "latency_s_max": round(self._wait_max, 4),
+            }
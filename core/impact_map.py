@@ -0,0 +1,59 @@
+# core/impact_map.py
+from __future__ import annotations
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+class ImpactMap:
+    """用例 -> 执行到的仓库文件映射，以及最近一次运行中失败的用例。
+
+    映射由 pytest 插件 impact_trace 在每次跑测试时写出，这里合并（只覆盖本次跑到的用例），
+    并保存在仓库旁（<repo>.impact_map.json），断点恢复后仍可用于选择用例。
+    """
+
+    def __init__(self, repo_root: str):
+        self.path = Path(f"{Path(repo_root).resolve()}.impact_map.json")
+        self.map: Dict[str, List[str]] = {}
+        self.failing: Set[str] = set()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.map, self.failing = data.get("map", {}), set(data.get("failing", []))
+        except (OSError, ValueError):
+            pass
+
+    def new_run_path(self) -> str:
+        # 每次运行的原始映射写到临时文件，ingest 时合并后删除
+        fd, path = tempfile.mkstemp(prefix=".impact-run", suffix=".json", dir=self.path.parent)
+        os.close(fd)
+        return path
+
+    def ingest(self, run_path: str, result: Dict[str, Any]):
+        try:
+            self.map.update(json.loads(Path(run_path).read_text(encoding="utf-8") or "{}"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                os.unlink(run_path)
+            except OSError:
+                pass
+        for t in result.get("tests", []):
+            if t["outcome"] in ("failed", "error"):
+                self.failing.add(t["test"])
+            else:
+                self.failing.discard(t["test"])
+        fd, tmp = tempfile.mkstemp(prefix=".impact", dir=self.path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"map": self.map, "failing": sorted(self.failing)}, f)
+        os.replace(tmp, self.path)
+
+    def select(self, changed: Iterable[str]) -> Optional[List[str]]:
+        """执行到任一改动文件的用例（含所在测试文件被改动的）加上仍在失败的用例；还没有映射时返回 None。"""
+        if not self.map:
+            return None
+        changed = set(changed)
+        hit = {t for t, files in self.map.items() if t.split("::")[0] in changed or not changed.isdisjoint(files)}
+        # 收集阶段的错误没有用例级 node id，不能作为选择参数，留给全量确认运行
+        return sorted(hit | {t for t in self.failing if "::" in t})
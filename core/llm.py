@@ -7,6 +7,9 @@ class LLMClient:
     def __init__(self, cfg):
         self.cfg = cfg
         self._mode = getattr(cfg, "model", "mock")
+        self.model = self._mode
+        self.temperature = getattr(cfg, "temperature", None)
+        self.stream_code = getattr(cfg, "stream_code", False)
 
     async def text(self, prompt: str) -> str:
         if self._mode == "mock":
@@ -19,6 +22,11 @@ class LLMClient:
         # TODO: 调用真实 LLM
         return ""
 
+    async def text_stream(self, prompt: str):
+        text = await self.text(prompt)
+        for i in range(0, len(text), 32):
+            yield text[i:i+32]
+
     async def structured_json(self, prompt: str, schema: str | Dict[str, Any] = None) -> Dict[str, Any]:
         if self._mode == "mock":
             if schema == "SDS":
@@ -0,0 +1,183 @@
+# core/llm_cache.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+CALL_KINDS = ("text", "structured_json", "files")
+
+class DiskLRUCache:
+    """按内容寻址的磁盘缓存：<root>/<key[:2]>/<key>.json，总大小超过 max_bytes 时按最近访问淘汰。"""
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size，越靠后越新
+        self._total = 0
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _load_index(self):
+        entries = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, p.stem, st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            p = self._path(key)
+            try:
+                value = json.loads(p.read_text(encoding="utf-8"))
+                os.utime(p)  # 命中即刷新 mtime，重启后仍能恢复 LRU 顺序
+            except (OSError, ValueError):
+                self._drop(key)
+                return None
+            self._index.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any):
+        data = json.dumps(value, ensure_ascii=False)
+        p = self._path(key)
+        with self._lock:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, p)
+            size = p.stat().st_size
+            self._total += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+
+    def _drop(self, key: str):
+        self._total -= self._index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class CachedLLM:
+    """包装任意 LLM 客户端（LLMClient / OpenAILLM），缓存 text / structured_json / files 的结果。
+
+    temperature > 0 的采样调用在键里带上本进程内第几次发出相同请求：多个 Architect 的相同提示
+    各占一个条目，保留多份 SDS 的多样性，重跑时按同样的次序回放。
+    """
+
+    def __init__(self, inner, cache: DiskLRUCache, bypass: Iterable[str] = ()):
+        self.inner = inner
+        self.cache = cache
+        self.bypass = set(bypass)
+        self._draws: Dict[str, int] = {}
+        self._draws_lock = threading.Lock()
+        self.hits: Dict[str, int] = {k: 0 for k in CALL_KINDS}
+        self.misses: Dict[str, int] = {k: 0 for k in CALL_KINDS}
+
+    def __getattr__(self, name):
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _key(self, kind: str, prompt: str, schema: Any = None) -> str:
+        model = getattr(self.inner, "model", "")
+        temperature = getattr(self.inner, "temperature", None)
+        schema_repr = json.dumps(schema, sort_keys=True, ensure_ascii=False) if isinstance(schema, dict) else str(schema or "")
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        h = hashlib.sha256()
+        for part in (kind, str(model), repr(temperature), schema_repr, prompt_hash):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x1f")
+        key = h.hexdigest()
+        if not temperature:
+            return key
+        with self._draws_lock:
+            draw = self._draws.get(key, 0)
+            self._draws[key] = draw + 1
+        return hashlib.sha256(f"{key}\x1fdraw={draw}".encode("utf-8")).hexdigest()
+
+    async def _cached(self, kind: str, key: str, call):
+        if kind in self.bypass:
+            return await call()
+        value = self.cache.get(key)
+        if value is not None:
+            self.hits[kind] += 1
+            return value
+        self.misses[kind] += 1
+        value = await call()
+        # 空结果通常意味着失败或未实现的分支，不写缓存
+        if value:
+            self.cache.put(key, value)
+        return value
+
+    async def text(self, prompt: str) -> str:
+        return await self._cached("text", self._key("text", prompt), lambda: self.inner.text(prompt))
+
+    async def text_stream(self, prompt: str):
+        # 与 text 共用缓存条目；只有完整读完的流才会写入缓存
+        key = self._key("text", prompt)
+        if "text" not in self.bypass:
+            value = self.cache.get(key)
+            if value is not None:
+                self.hits["text"] += 1
+                yield value
+                return
+            self.misses["text"] += 1
+        if not hasattr(self.inner, "text_stream"):
+            value = await self.inner.text(prompt)
+            if value and "text" not in self.bypass:
+                self.cache.put(key, value)
+            yield value
+            return
+        parts = []
+        agen = self.inner.text_stream(prompt)
+        try:
+            async for chunk in agen:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            await agen.aclose()
+        value = "".join(parts)
+        if value and "text" not in self.bypass:
+            self.cache.put(key, value)
+
+    async def structured_json(self, prompt: str, schema: str | Dict[str, Any] | None = None, **kwargs) -> Dict[str, Any]:
+        key = self._key("structured_json", prompt, schema)
+        return await self._cached("structured_json", key, lambda: self.inner.structured_json(prompt, schema=schema, **kwargs))
+
+    async def files(self, prompt: str, **kwargs) -> Dict[str, str]:
+        return await self._cached("files", self._key("files", prompt), lambda: self.inner.files(prompt, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "entries": len(self.cache),
+            "bytes": self.cache.total_bytes,
+        }
@@ -4,38 +4,146 @@ import os, json, asyncio, time, re
 from typing import Any, Dict, Optional
 import jsonschema
 from core.schemas import SDS_SCHEMA, UPDATE_REASON_SCHEMA  # 如需也可传入自定义schema
+from core.rate_limiter import RateLimiter, get_rate_limiter
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
 except Exception:
     OpenAI = None
+    AsyncOpenAI = None
+
+try:
+    import httpx
+except Exception:
+    httpx = None
 
 class OpenAILLM:
-    def __init__(self, model: str = "gpt-4o", temperature: float = 0.2, max_tokens: int = 4000, base_url: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.2, max_tokens: int = 4000, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 transport: str = "async", max_connections: int = 64, max_keepalive_connections: int = 32, request_timeout: float = 120.0,
+                 max_retries: int = 3, rate_limiter: Optional[RateLimiter] = None, stream_code: bool = False):
         assert OpenAI is not None, "Please `pip install openai`>=1.0"
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not set")
-        self.client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
+        self.transport = transport
+        self._http = None
+        if transport == "async":
+            # 原生异步：共享一个带 keep-alive 的连接池，并发请求不再占用默认线程池
+            assert AsyncOpenAI is not None and httpx is not None, "async transport requires openai>=1.0 and httpx"
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+                timeout=request_timeout,
+            )
+            # 关闭 SDK 内置重试：429 必须回到限流器，由它统一退避
+            self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=self._http, max_retries=0)
+        elif transport == "thread":
+            self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=request_timeout, max_retries=0)
+        else:
+            raise ValueError(f"unknown transport: {transport}")
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.limiter = rate_limiter or get_rate_limiter()
+        self.stream_code = stream_code
 
-    async def text(self, prompt: str) -> str:
-        # 简单封装；你可以添加重试策略
-        for attempt in range(3):
+    async def _send(self, **kwargs):
+        if self.transport == "async":
+            return await self.client.chat.completions.create(**kwargs)
+        return await asyncio.to_thread(self.client.chat.completions.create, **kwargs)
+
+    async def _create(self, **kwargs):
+        kwargs.setdefault("model", self.model)
+        kwargs.setdefault("temperature", self.temperature)
+        kwargs.setdefault("max_tokens", self.max_tokens)
+        estimated = self._estimate_tokens(kwargs["messages"]) + kwargs["max_tokens"]
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated)
             try:
-                resp = await asyncio.to_thread(self.client.chat.completions.create,
-                    model=self.model,
-                    temperature=self.temperature,
-                    messages=[{"role":"system","content":"You are a senior software engineer."},
-                              {"role":"user","content":prompt}],
-                )
-                return resp.choices[0].message.content or ""
+                resp = await self._send(**kwargs)
             except Exception as e:
-                if attempt == 2: raise
-                await asyncio.sleep(1.5 * (attempt+1))
-        return ""
+                status = getattr(e, "status_code", None)
+                retry_after = self._retry_after(e)
+                rate_limited = status == 429 or retry_after is not None
+                if rate_limited:
+                    self.limiter.report_rate_limited(retry_after)
+                # 4xx（除 408/409/429）属于请求本身的问题，重试无意义
+                if attempt == self.max_retries or (status is not None and 400 <= status < 500 and status not in (408, 409, 429)):
+                    raise
+                if not rate_limited:
+                    await asyncio.sleep(1.5 * (attempt+1))
+                continue
+            self.limiter.report_success()
+            usage = getattr(resp, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.limiter.reconcile(estimated, usage.total_tokens)
+            return resp
+
+    def _estimate_tokens(self, messages) -> int:
+        # 粗略估算：约 4 字符 / token
+        return sum(len(m.get("content") or "") for m in messages) // 4 + 1
+
+    def _retry_after(self, e: Exception) -> Optional[float]:
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if not headers:
+            return None
+        ms = headers.get("retry-after-ms")
+        if ms:
+            try:
+                return float(ms) / 1000.0
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            from email.utils import parsedate_to_datetime
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except Exception:
+            return None
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def text(self, prompt: str) -> str:
+        # 重试与限流统一在 _create 中处理
+        resp = await self._create(
+            messages=[{"role":"system","content":"You are a senior software engineer."},
+                      {"role":"user","content":prompt}],
+        )
+        return resp.choices[0].message.content or ""
+
+    async def text_stream(self, prompt: str):
+        # 流式输出：逐块 yield；调用方提前 aclose() 时会关闭底层连接，停止计费
+        stream = await self._create(
+            messages=[{"role":"system","content":"You are a senior software engineer."},
+                      {"role":"user","content":prompt}],
+            stream=True,
+        )
+        try:
+            if self.transport == "async":
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            else:
+                it = iter(stream)
+                while True:
+                    chunk = await asyncio.to_thread(next, it, None)
+                    if chunk is None:
+                        break
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                res = close()
+                if asyncio.iscoroutine(res):
+                    await res
 
     async def structured_json(self, prompt: str, schema: str | Dict[str, Any] | None = None, max_retries: int = 3) -> Dict[str, Any]:
         # 使用 response_format 强制 JSON，再做 schema 校验与纠错
@@ -92,9 +200,7 @@ class OpenAILLM:
         raise ValueError("Failed to produce files JSON")
 
     async def _gen_json_once(self, prompt: str) -> str:
-        resp = await asyncio.to_thread(self.client.chat.completions.create,
-            model=self.model,
-            temperature=self.temperature,
+        resp = await self._create(
             response_format={"type":"json_object"},
             messages=[
                 {"role":"system","content":"Return ONLY valid minified JSON. Do not include extra commentary."},
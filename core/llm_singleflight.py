@@ -0,0 +1,92 @@
+# core/llm_singleflight.py
+from __future__ import annotations
+import asyncio
+import copy
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Tuple
+
+from core.llm_cache import CALL_KINDS
+
+_ROLE: ContextVar[str] = ContextVar("llm_role", default="")
+
+@contextmanager
+def llm_role(role: str):
+    # 标记当前协程代表哪个角色调用 LLM，供合并策略判断
+    token = _ROLE.set(role)
+    try:
+        yield
+    finally:
+        _ROLE.reset(token)
+
+def current_role() -> str:
+    return _ROLE.get()
+
+
+class SingleFlightLLM:
+    """合并并发中的相同请求：同一 (model, temperature, prompt, schema) 只发一次，结果共享。
+    text_stream 不参与合并。"""
+
+    def __init__(self, inner, bypass_roles: Iterable[str] = ("architect",)):
+        self.inner = inner
+        self.bypass_roles = set(bypass_roles)
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.leaders: Dict[str, int] = {k: 0 for k in CALL_KINDS}
+        self.coalesced: Dict[str, int] = {k: 0 for k in CALL_KINDS}
+
+    def __getattr__(self, name):
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _key(self, kind: str, prompt: str, schema: Any = None) -> str:
+        schema_repr = json.dumps(schema, sort_keys=True, ensure_ascii=False) if isinstance(schema, dict) else str(schema or "")
+        h = hashlib.sha256()
+        for part in (kind, str(getattr(self.inner, "model", "")), repr(getattr(self.inner, "temperature", None)), schema_repr, prompt):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x1f")
+        return h.hexdigest()
+
+    async def _do(self, kind: str, key: str, call):
+        if current_role() in self.bypass_roles:
+            return await call()
+        # 同步工作流的每个线程有自己的事件循环，Future 不能跨循环共享
+        slot = (id(asyncio.get_running_loop()), key)
+        task = self._inflight.get(slot)
+        if task is not None:
+            self.coalesced[kind] += 1
+        else:
+            task = asyncio.ensure_future(call())
+            self._inflight[slot] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(slot, None))
+            self.leaders[kind] += 1
+        # 发起者被取消时请求继续，跟随者不受影响；共享结果可能被调用方修改，发起者与跟随者都拿副本
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def text(self, prompt: str) -> str:
+        return await self._do("text", self._key("text", prompt), lambda: self.inner.text(prompt))
+
+    async def text_stream(self, prompt: str):
+        # 流式调用不合并：跟随者无法从中途加入同一条流，直接透传给内层客户端
+        if not hasattr(self.inner, "text_stream"):
+            yield await self.inner.text(prompt)
+            return
+        agen = self.inner.text_stream(prompt)
+        try:
+            async for chunk in agen:
+                yield chunk
+        finally:
+            # 调用方提前 aclose（语法错误中止）时关闭内层流，停止计费
+            await agen.aclose()
+
+    async def structured_json(self, prompt: str, schema: str | Dict[str, Any] | None = None, **kwargs) -> Dict[str, Any]:
+        key = self._key("structured_json", prompt, schema)
+        return await self._do("structured_json", key, lambda: self.inner.structured_json(prompt, schema=schema, **kwargs))
+
+    async def files(self, prompt: str, **kwargs) -> Dict[str, str]:
+        return await self._do("files", self._key("files", prompt), lambda: self.inner.files(prompt, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"leaders": dict(self.leaders), "coalesced": dict(self.coalesced)}
@@ -0,0 +1,113 @@
+# core/rate_limiter.py
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.per_minute = float(per_minute)
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float, scale: float = 1.0) -> float:
+        # 先记账再等待：余额可以为负，返回补足余额所需的秒数，天然按到达顺序排队
+        rate = self.per_minute * scale / 60.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / rate
+
+    def refund(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """进程级限流：RPM + TPM 两个令牌桶；遇到 429 / Retry-After 时整体暂停并按 AIMD 降速。"""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, min_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.rpm = TokenBucket(rpm) if rpm > 0 else None
+        self.tpm = TokenBucket(tpm) if tpm > 0 else None
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()  # 同步工作流里不同线程各有事件循环，记账用线程锁
+        self._blocked_until = 0.0
+        self._penalty = 0.0
+        self._scale = 1.0
+        self._acquired = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._rate_limited = 0
+
+    async def acquire(self, tokens: int = 0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._blocked_until - now)
+            if self.rpm:
+                delay = max(delay, self.rpm.reserve(1, now, self._scale))
+            if self.tpm and tokens:
+                delay = max(delay, self.tpm.reserve(tokens, now, self._scale))
+            self._acquired += 1
+            if delay > 0:
+                self._waited += 1
+                self._wait_total += delay
+                self._wait_max = max(self._wait_max, delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def reconcile(self, estimated: int, actual: int):
+        # 用响应里的真实 usage 修正预估的 token 数
+        if not self.tpm or actual <= 0:
+            return
+        with self._lock:
+            self.tpm.refund(estimated - actual)
+
+    def report_rate_limited(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self._rate_limited += 1
+            self._scale = max(0.1, self._scale * 0.5)
+            if retry_after is None:
+                self._penalty = min(self.max_backoff, max(self.min_backoff, self._penalty * 2))
+                pause = self._penalty
+            else:
+                pause = min(self.max_backoff, max(0.0, retry_after))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+    def report_success(self):
+        with self._lock:
+            self._penalty = self._penalty / 2 if self._penalty > self.min_backoff else 0.0
+            self._scale = min(1.0, self._scale + 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "acquired": self._acquired,
+                "waited": self._waited,
+                "queue_wait_total_s": round(self._wait_total, 3),
+                "queue_wait_max_s": round(self._wait_max, 3),
+                "rate_limited": self._rate_limited,
+                "scale": round(self._scale, 2),
+            }
+
+
+_GLOBAL: Optional[RateLimiter] = None
+_GLOBAL_LOCK = threading.Lock()
+
+def configure_rate_limiter(rpm: int = 0, tpm: int = 0) -> RateLimiter:
+    global _GLOBAL
+    with _GLOBAL_LOCK:
+        _GLOBAL = RateLimiter(rpm=rpm, tpm=tpm)
+        return _GLOBAL
+
+def get_rate_limiter() -> RateLimiter:
+    global _GLOBAL
+    with _GLOBAL_LOCK:
+        if _GLOBAL is None:
+            _GLOBAL = RateLimiter()
+        return _GLOBAL
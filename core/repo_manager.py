@@ -1,26 +1,64 @@
 # core/repo_manager.py
 from __future__ import annotations
 from git import Repo
+import hashlib
 from pathlib import Path
+from threading import Lock, RLock
 from typing import List, Set, Dict
 from core.models import RepoNode
 from core.schemas import validate_update_reason
-import json
+from core.git_writer import GitCommitWriter, batch_message, PendingCommit
+from core.git_objects import GitObjectTree
+from core.git_worktrees import DevWorktrees
 import os
 
 class RepoManager:
-    def __init__(self, root: str, allowed_files_all: Set[str], allowed_files_by_agent: Dict[str, Set[str]] | None = None):
-        self.root = Path(root)
+    def __init__(self, root: str, allowed_files_all: Set[str], allowed_files_by_agent: Dict[str, Set[str]] | None = None,
+                 commit_window: float | None = None, object_store: bool = False, dev_worktrees: bool = False):
+        if dev_worktrees and object_store:
+            raise ValueError("dev_worktrees cannot be combined with object_store")
+        # 绝对路径：GitPython 的 index.add 会把相对路径再拼到工作区根目录上
+        self.root = Path(root).resolve()
         self.root.mkdir(parents=True, exist_ok=True)
-        self.repo = Repo.init(self.root)
+        # 仓库池预热过或断点恢复时已是仓库，直接打开，省去 git init 子进程
+        self.repo = Repo(self.root) if (self.root / ".git").is_dir() else Repo.init(self.root)
         self.allowed_files_all = {self._norm(p) for p in allowed_files_all}
         self.allowed_files_by_agent = {k: {self._norm(p) for p in v} for k, v in (allowed_files_by_agent or {}).items()}
+        # object_store：内容只写进 git 对象库，提交不经过工作区与索引，工作区在 materialize() 时才落盘
+        self._objects = GitObjectTree(self.repo) if object_store else None
+        if self._objects and self.repo.head.is_valid():
+            # 断点恢复打开已有仓库：已提交但从未落盘的文件先检出到工作区
+            self.repo.git.checkout("HEAD", "--", ".")
+        self._mem_lock = Lock()
+        self._commit_lock = Lock()
+        self._staged: Dict[str, bytes] = {}      # 已写入但未提交的文件 -> blob sha
+        self._unmaterialized: Dict[str, str] = {}   # 尚未写到工作区的文件内容
+        self._known: Set[str] = set()
+        # 按路径记录内容哈希：字节完全相同的重写与提交直接跳过
+        self._hashes: Dict[str, str] = {}
+        self._dirty: Set[str] = set()   # 写入后尚未提交的文件
+        self._dedup = {"writes": 0, "skipped_writes": 0, "skipped_commits": 0}
+        # commit_window 不为 None 时启用单写者批量提交；否则每次 commit_file 同步提交
+        self._writer = GitCommitWriter(self._commit_batch, window=commit_window) if commit_window is not None else None
+        # dev_worktrees：每个开发者在自己的 worktree/分支上写和提交，merge_round() 时合并回主分支
+        self._file_owner = {f: a for a, fs in self.allowed_files_by_agent.items() if a != "QA" for f in fs}
+        self._worktrees = DevWorktrees(self.repo, self.root, sorted(set(self._file_owner.values()))) if dev_worktrees else None
+        self._main_lock = RLock()
 
     def _norm(self, file_path: str) -> str:
         return str(Path(file_path).as_posix())
 
+    def _base_for(self, rel_path: str) -> Path:
+        # worktree 模式下开发者文件落在其 owner 的 worktree 里，其余（测试等）落在主工作区
+        owner = self._file_owner.get(self._norm(rel_path))
+        if self._worktrees and owner in self._worktrees:
+            return self._worktrees.path(owner)
+        return self.root
+
     def exists(self, rel_path: str) -> bool:
-        return (self.root / rel_path).exists()
+        if self._objects and self._norm(rel_path) in self._known:
+            return True
+        return (self._base_for(rel_path) / rel_path).exists()
 
     def init_structure(self, nodes: List[RepoNode]):
         def create(node: RepoNode, base: Path):
@@ -31,11 +69,17 @@ class RepoManager:
                     create(c, p)
             else:
                 p.parent.mkdir(parents=True, exist_ok=True)
-                if not p.exists():
+                if self._objects:
+                    rel = p.relative_to(self.root).as_posix()
+                    if not self.exists(rel):
+                        self._stage_content(rel, "")
+                elif not p.exists():
                     p.write_text("", encoding="utf-8")
         for n in nodes:
             create(n, self.root)
         self.commit_all("chore: init repository structure")
+        if self._worktrees:
+            self._on_main(self._worktrees.setup)
 
     def _assert_allowed(self, rel_path: str):
         norm = self._norm(rel_path)
@@ -49,23 +93,160 @@ class RepoManager:
         if norm not in self.allowed_files_by_agent[agent_id]:
             raise PermissionError(f"Agent {agent_id} cannot write {norm}")
 
-    def write_file(self, rel_path: str, content: str, agent_id: str | None = None):
+    def write_file(self, rel_path: str, content: str, agent_id: str | None = None) -> bool:
+        """写入文件；内容与该路径当前版本字节相同时不做任何事并返回 False。"""
         # 全局白名单校验
         self._assert_allowed(rel_path)
         # Agent 级别白名单校验（可选）
         if agent_id:
             self._assert_allowed_by_agent(agent_id, rel_path)
-        p = self.root / rel_path
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content, encoding="utf-8")
+        norm = self._norm(rel_path)
+        data = content.encode("utf-8")
+        digest = hashlib.sha1(data).hexdigest()
+        with self._mem_lock:
+            prev = self._hashes.get(norm)
+        if prev is None:
+            # 首次见到该路径：与磁盘内容比较；其提交状态未知，标记为待提交，调用方据 pending_commit 仍走 commit_file
+            p = self._base_for(rel_path) / rel_path
+            if p.is_file() and hashlib.sha1(p.read_bytes()).hexdigest() == digest:
+                with self._mem_lock:
+                    self._hashes[norm] = digest
+                    self._dirty.add(norm)
+                    self._dedup["skipped_writes"] += 1
+                return False
+        elif prev == digest:
+            with self._mem_lock:
+                self._dedup["skipped_writes"] += 1
+            return False
+        if self._objects:
+            self._stage_content(norm, content)
+        else:
+            p = self._base_for(rel_path) / rel_path
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(data)
+        with self._mem_lock:
+            self._hashes[norm] = digest
+            self._dirty.add(norm)
+            self._dedup["writes"] += 1
+        return True
 
-    def commit_file(self, rel_path: str, update_reason: dict, agent_id: str):
+    def pending_commit(self, rel_path: str) -> bool:
+        """该文件写入后是否还没提交（包括首次见到、内容与磁盘相同但提交状态未知的文件）。"""
+        with self._mem_lock:
+            return self._norm(rel_path) in self._dirty
+
+    def commit_file(self, rel_path: str, update_reason: dict, agent_id: str, executor: str | None = None) -> bool:
+        """提交文件；自上次提交以来没有实际写入时跳过并返回 False。"""
         validate_update_reason(update_reason)
-        self.repo.index.add([str(self.root / rel_path)])
-        msg = f"[{agent_id}] update {rel_path}\nUPDATE_REASON={json.dumps(update_reason, ensure_ascii=False)}"
-        self.repo.index.commit(msg)
+        norm = self._norm(rel_path)
+        with self._mem_lock:
+            if norm not in self._dirty:
+                self._dedup["skipped_commits"] += 1
+                return False
+            self._dirty.discard(norm)
+        # 共享任务队列下由其他 worker 代 owner 执行时，记录实际执行者
+        via = f" (via {executor})" if executor and executor != agent_id else ""
+        header = f"[{agent_id}] update {rel_path}{via}"
+        owner = self._file_owner.get(self._norm(rel_path))
+        if self._worktrees and owner in self._worktrees:
+            # 各自的索引，无需经过共享写线程
+            self._worktrees.commit(owner, [rel_path], batch_message([PendingCommit(rel_path, header, update_reason)]))
+            return True
+        if self._writer:
+            self._writer.submit(rel_path, header, update_reason)
+            return True
+        # 与 QA 的 commit_all（在工作线程里执行）共用主索引，经 _on_main 串行
+        entry = PendingCommit(rel_path, header, update_reason)
+        self._on_main(lambda: self._commit_batch([entry]))
+        return True
+
+    def _commit_batch(self, batch: List[PendingCommit]):
+        if self._objects:
+            self._commit_staged([self._norm(e.rel_path) for e in batch], batch_message(batch))
+            return
+        self.repo.index.add([str(self.root / e.rel_path) for e in batch])
+        self.repo.index.commit(batch_message(batch))
+
+    def _stage_content(self, rel_path: str, content: str):
+        sha = self._objects.write_blob(content.encode("utf-8"))
+        with self._mem_lock:
+            self._staged[rel_path] = sha
+            self._unmaterialized[rel_path] = content
+            self._known.add(rel_path)
+
+    def _commit_staged(self, paths: List[str] | None, msg: str):
+        # 只把指定路径（None 表示全部）已写入的 blob 挂到树上，其余保持未提交
+        with self._commit_lock:
+            with self._mem_lock:
+                picked = {p: self._staged.pop(p) for p in (list(self._staged) if paths is None else paths) if p in self._staged}
+            for p, sha in picked.items():
+                self._objects.stage(p, sha)
+            self._objects.commit(msg)
+
+    def materialize(self) -> int:
+        """把内存中尚未落盘的文件写到工作区（QA 跑测试前调用）；非对象模式下为空操作。"""
+        with self._mem_lock:
+            pending, self._unmaterialized = self._unmaterialized, {}
+        for rel, content in pending.items():
+            p = self.root / rel
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text(content, encoding="utf-8")
+        return len(pending)
+
+    def _on_main(self, fn):
+        # 主工作区/索引上的操作串行执行：有写线程时交给写线程，否则持主锁
+        if self._writer:
+            return self._writer.call(fn)
+        with self._main_lock:
+            return fn()
+
+    def merge_round(self) -> int:
+        """轮次屏障处把各开发者分支合并进主分支（非 worktree 模式为空操作）。"""
+        if not self._worktrees:
+            return 0
+        return self._on_main(self._worktrees.merge)
+
+    def flush(self):
+        """等待已排队的文件全部提交（批量模式下在每轮结束时调用）。"""
+        if self._writer:
+            self._writer.flush()
+
+    def close(self):
+        if self._worktrees:
+            self.merge_round()
+            self._on_main(self._worktrees.remove)
+            self._closed_merge_stats = self._worktrees.stats()
+            self._worktrees = None
+        if self._writer:
+            self._writer.close()
+            # 关闭后退回同步提交，保留最终统计供报告使用
+            self._closed_stats = self._writer.stats()
+            self._writer = None
+        if self._objects:
+            # 结束时工作区与索引对齐到 HEAD，便于人工查看 git status
+            self.materialize()
+            if self.repo.head.is_valid():
+                self.repo.git.read_tree("HEAD")
+
+    def commit_stats(self) -> dict:
+        stats = dict(self._writer.stats() if self._writer else getattr(self, "_closed_stats", {}))
+        merge = self._worktrees.stats() if self._worktrees else getattr(self, "_closed_merge_stats", None)
+        if merge:
+            stats["worktrees"] = merge
+        with self._mem_lock:
+            stats["dedup"] = dict(self._dedup)
+        return stats
 
     def commit_all(self, msg: str):
+        # 与批量提交、分支合并共用主索引，经 _on_main 串行
+        return self._on_main(lambda: self._commit_all(msg))
+
+    def _commit_all(self, msg: str):
+        # 整树提交覆盖所有已写入文件（worktree 模式下开发者文件不在主工作区，保持待提交）
+        with self._mem_lock:
+            self._dirty = {p for p in self._dirty if self._worktrees and self._file_owner.get(p) in self._worktrees}
+        if self._objects:
+            return self._commit_staged(None, msg)
         # 注意：commit_all 不会绕开权限，只用于结构初始化或 QA 提交测试
         self.repo.git.add(A=True)
         # 若无变更则不提交
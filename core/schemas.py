@@ -181,5 +181,8 @@ def validate_sds(sds_json: Dict[str, Any]) -> None:
     validate_sds_structure(sds_json)
     validate_sds_semantics(sds_json)
 
+# 每个文件提交都要校验一次：复用编译好的 validator，jsonschema.validate 每次都会重新检查 schema 本身
+_UPDATE_REASON_VALIDATOR = jsonschema.validators.validator_for(UPDATE_REASON_SCHEMA)(UPDATE_REASON_SCHEMA)
+
 def validate_update_reason(ur_json: Dict[str, Any]) -> None:
-    jsonschema.validate(ur_json, UPDATE_REASON_SCHEMA)
\ No newline at end of file
+    _UPDATE_REASON_VALIDATOR.validate(ur_json)
\ No newline at end of file
@@ -0,0 +1,102 @@
+# core/token_budget.py
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.logger import get_logger
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+DEFAULT_BUDGETS: Dict[str, int] = {"architect": 6000, "cto": 12000, "developer": 6000, "qa": 12000}
+_budgets: Dict[str, int] = dict(DEFAULT_BUDGETS)
+_encoding = None
+_encoding_failed = False
+
+def configure_budgets(budgets: Dict[str, int]):
+    _budgets.update(budgets or {})
+
+def budget_for(role: str) -> int:
+    return _budgets.get(role, 8000)
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # 离线环境下拿不到 BPE 文件，退回估算
+            _encoding_failed = True
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    # 估算：ASCII 约 4 字符 / token，中日韩等非 ASCII 字符约 1 字符 / token
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+class TokenBudgeter:
+    """按角色预算装配 prompt：固定部分必选，其余分段按优先级依次填充。"""
+
+    def __init__(self, role: str, budget: Optional[int] = None, min_partial: int = 64):
+        self.role = role
+        self.budget = budget if budget is not None else budget_for(role)
+        self.min_partial = min_partial  # 剩余预算低于该值时不再截断塞入半条
+        self.log = get_logger("budget")
+
+    def fit(self, fixed: str | Dict[str, str], sections: Sequence[Tuple[str, List[str]]], keep_order: Sequence[str] = (),
+            ranks: Optional[Dict[str, List[int]]] = None, joiner: str = "\n") -> Dict[str, str]:
+        """fixed 为必选部分（可按名称拆开以便日志分项）；sections 按优先级排列；
+        ranks[name] 给出段内条目的优先顺序（下标），keep_order 中的段输出时恢复原始顺序。
+        返回 {name: 拼好的文本}。"""
+        fixed_parts = fixed if isinstance(fixed, dict) else {"fixed": fixed}
+        breakdown = {k: count_tokens(v) for k, v in fixed_parts.items()}
+        remaining = self.budget - sum(breakdown.values())
+        out: Dict[str, str] = {}
+        for name, items in sections:
+            order = (ranks or {}).get(name) or list(range(len(items)))
+            kept: Dict[int, str] = {}
+            sec_tokens = 0
+            for idx in order:
+                item = items[idx]
+                cost = count_tokens(item + joiner)
+                if cost <= remaining:
+                    kept[idx] = item
+                    remaining -= cost
+                    sec_tokens += cost
+                    continue
+                if remaining >= self.min_partial:
+                    part = truncate_to_tokens(item, remaining - 1)
+                    kept[idx] = part
+                    cost = count_tokens(part + joiner)
+                    remaining -= cost
+                    sec_tokens += cost
+                break
+            indices = sorted(kept) if name in keep_order else list(kept)
+            out[name] = joiner.join(kept[i] for i in indices)
+            breakdown[name] = sec_tokens
+            if len(kept) < len(items):
+                breakdown[f"{name}_dropped"] = len(items) - len(kept)
+        total = self.budget - remaining
+        self.log.info(f"prompt_budget role={self.role} total={total}/{self.budget} "
+                      + " ".join(f"{k}={v}" for k, v in breakdown.items()))
+        return out
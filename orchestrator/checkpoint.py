@@ -0,0 +1,48 @@
+# orchestrator/checkpoint.py
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+def checkpoint_path(repo_root: str) -> Path:
+    # 放在仓库目录旁边而不是里面：commit_all 的 git add -A 不会把它提交进去
+    root = Path(repo_root).resolve()
+    return root.parent / f"{root.name}{CHECKPOINT_SUFFIX}"
+
+class WorkflowCheckpoint:
+    """工作流断点：每完成一个阶段就把已付费的产物落盘，崩溃或超时后可从最后完成的阶段继续。
+
+    记录内容：question、SDS 列表、CTO 决策、测试文件与运行命令、BriefManager 内容、
+    首轮已完成的波次数、修复轮次与待处理的修复建议。
+    """
+
+    def __init__(self, repo_root: str, state: Optional[Dict[str, Any]] = None, enabled: bool = True):
+        self.repo_root = str(Path(repo_root).resolve())
+        self.path = checkpoint_path(repo_root)
+        self.state: Dict[str, Any] = state or {}
+        self.enabled = enabled
+
+    @classmethod
+    def load(cls, repo_root: str) -> "WorkflowCheckpoint":
+        p = checkpoint_path(repo_root)
+        if not p.exists():
+            raise FileNotFoundError(f"no checkpoint for {repo_root} (expected {p})")
+        return cls(repo_root, json.loads(p.read_text(encoding="utf-8")))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
+
+    def has(self, key: str) -> bool:
+        return key in self.state
+
+    def save(self, **updates: Any):
+        self.state.update(updates)
+        if not self.enabled:
+            return
+        # 先写临时文件再原子替换：写到一半崩溃不会留下损坏的断点
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
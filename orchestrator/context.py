@@ -1,17 +1,19 @@
 # orchestrator/context.py
 from __future__ import annotations
-import time
 from pathlib import Path
 from dataclasses import dataclass
+from orchestrator.workspace_pool import new_repo_name
 
 @dataclass
 class Context:
     cfg: any
     llm: any
     rag: any = None
+    pool: any = None   # WorkspacePool；为 None 时每个作业现建目录
 
     def make_repo_root(self) -> str:
-        ts = time.strftime("%Y%m%d-%H%M%S")
-        root = Path(self.cfg.workspace) / f"repo-{ts}"
-        root.mkdir(parents=True, exist_ok=True)
-        return str(root)
\ No newline at end of file
+        if self.pool is not None:
+            return self.pool.acquire(self.cfg.workspace)
+        root = Path(self.cfg.workspace) / new_repo_name()
+        root.mkdir(parents=True)
+        return str(root)
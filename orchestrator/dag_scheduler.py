@@ -0,0 +1,84 @@
+# orchestrator/dag_scheduler.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+@dataclass
+class WavePlan:
+    waves: List[List[str]]
+    broken_edges: List[Tuple[str, str]] = field(default_factory=list)  # (file, dependency)
+
+def plan_waves(dependencies: Dict[str, List[str]]) -> WavePlan:
+    """按依赖关系把文件分成拓扑波次：同一波次内互不依赖，可完全并行。
+
+    只考虑 SDS 内部文件之间的依赖；遇到环时只在环所在的强连通分量里挑文件：
+    取不依赖分量外文件的（汇点）分量中未满足依赖最少、路径字典序最小者，删去它的
+    依赖边（都在分量内）后放行，保证结果确定。挂在环外、只是等待环的文件不受影响。
+    """
+    nodes = sorted(dependencies)
+    pending: Dict[str, set] = {n: {d for d in dependencies[n] if d in dependencies and d != n} for n in nodes}
+    dependents: Dict[str, set] = {n: set() for n in nodes}
+    for n, deps in pending.items():
+        for d in deps:
+            dependents[d].add(n)
+
+    waves: List[List[str]] = []
+    broken: List[Tuple[str, str]] = []
+    remaining = set(nodes)
+    while remaining:
+        ready = sorted(n for n in remaining if not pending[n])
+        if not ready:
+            # 没有可放行的文件时必有一个汇点分量带环：其成员的未满足依赖全在分量内
+            sinks = [c for c in _components(pending, remaining) if all(pending[n] <= c for n in c)]
+            victim = min((n for c in sinks for n in c), key=lambda n: (len(pending[n]), n))
+            for d in sorted(pending[victim]):
+                broken.append((victim, d))
+                dependents[d].discard(victim)
+            pending[victim] = set()
+            ready = [victim]
+        waves.append(ready)
+        for n in ready:
+            remaining.discard(n)
+            for m in dependents[n]:
+                pending[m].discard(n)
+    return WavePlan(waves=waves, broken_edges=broken)
+
+def _components(graph: Dict[str, set], nodes: set) -> List[set]:
+    # Tarjan 强连通分量（迭代实现，避免大仓库递归过深）
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: set = set()
+    comps: List[set] = []
+    for root in sorted(nodes):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(graph[root])))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            n, it = work[-1]
+            for d in it:
+                if d not in index:
+                    index[d] = low[d] = len(index)
+                    stack.append(d)
+                    on_stack.add(d)
+                    work.append((d, iter(sorted(graph[d]))))
+                    break
+                if d in on_stack:
+                    low[n] = min(low[n], index[d])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[n])
+                if low[n] == index[n]:
+                    comp = set()
+                    while True:
+                        m = stack.pop()
+                        on_stack.discard(m)
+                        comp.add(m)
+                        if m == n:
+                            break
+                    comps.append(comp)
+    return comps
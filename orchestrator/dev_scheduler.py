@@ -0,0 +1,38 @@
+# orchestrator/dev_scheduler.py
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List
+
+SHARED_TOPIC = "dev_task:shared"
+
+class DevTaskRouter:
+    """把按文件拆分的开发任务投递给 Developer。
+
+    - 独占模式（默认）：任务进入文件 owner 自己的 dev_task:{owner} 队列；
+    - 共享模式：所有任务进入同一个队列，任意空闲 worker 都可领取，
+      worker 以 owner 身份写文件，RepoManager 的 dev_plan 权限校验照常生效。
+    """
+
+    def __init__(self, bus, file_owner: Dict[str, str], shared: bool = False):
+        self.bus = bus
+        self.file_owner = file_owner
+        self.shared = shared
+        self._file_locks: Dict[str, asyncio.Lock] = {}
+
+    def topic_for(self, worker_id: str) -> str:
+        return SHARED_TOPIC if self.shared else f"dev_task:{worker_id}"
+
+    def lock_for(self, file_path: str) -> asyncio.Lock:
+        # 同一文件的多个任务（如重复的修复建议）不能被两个 worker 同时改写
+        lock = self._file_locks.get(file_path)
+        if lock is None:
+            lock = self._file_locks[file_path] = asyncio.Lock()
+        return lock
+
+    async def submit(self, task: Dict[str, Any]):
+        owner = self.file_owner[task["file_path"]]
+        await self.bus.emit(self.topic_for(owner), dict(task, owner=owner))
+
+    async def shutdown(self, worker_ids: List[str]):
+        for wid in worker_ids:
+            await self.bus.emit(self.topic_for(wid), {"type": "exit"})
@@ -14,6 +14,7 @@ from utils.sds_parser import parse_sds
 from utils.allowed_files import flatten_repo_structure
 from utils.event_bus import EventBus
 from runtime_adapters.python_runtime import PythonRuntime
+from runtime_adapters.sandbox import Sandbox
 
 class MultiAgentCodegenWorkflow:
     def __init__(self, ctx):
@@ -62,7 +63,10 @@ class MultiAgentCodegenWorkflow:
         brief_mgr = BriefManager()
         event_bus = EventBus()
         # 5) QA init
-        qa = QAAgent(self.ctx.llm, repo, PythonRuntime(), event_bus, sds=sds)
+        rc = self.ctx.cfg.runtime
+        sandbox = Sandbox(timeout=rc.timeout, cpu_seconds=rc.cpu_seconds, memory_mb=rc.memory_mb,
+                          open_files=rc.open_files, max_output_bytes=rc.max_output_bytes)
+        qa = QAAgent(self.ctx.llm, repo, PythonRuntime(shards=rc.shards, sandbox=sandbox), event_bus, sds=sds)
         await qa.init_tests(chosen_sds)
         # 6) Dev threads
         sds_map: Dict[str, dict] = {fs.path: {
@@ -79,12 +83,13 @@ class MultiAgentCodegenWorkflow:
             dev = DeveloperAgent(a.developer_id, a.file_paths, sds_map, self.ctx.llm, repo, brief_mgr, event_bus)
             dev.start()
             dev_threads.append(dev)
-        # 7) 首轮实现任务分发
+        # 7) 首轮实现任务分发：先开轮再下发，完成事件按轮次 ID 计数
+        latch = event_bus.open_round("initial", [fs.path for fs in sds.file_specs])
         for fs in sds.file_specs:
             dev_id = next(d.developer_id for d in sds.dev_plan if fs.path in d.file_paths)
-            event_bus.emit(f"dev_task:{dev_id}", {"type": "implement", "file_path": fs.path})
+            event_bus.emit(f"dev_task:{dev_id}", {"type": "implement", "file_path": fs.path, "round": "initial"})
         # 等待首轮完成
-        self._await_dev_round_done(event_bus, expected=len(sds.file_specs))
+        self._await_dev_round_done(event_bus, latch)
         # 8) 测试与修复循环
         for round_no in range(self.ctx.cfg.max_rounds):
             result = await qa.run_and_feedback()
@@ -95,16 +100,19 @@ class MultiAgentCodegenWorkflow:
                 # 没有定位到具体文件，保守结束以避免死循环
                 break
             # 分发修复任务
+            round_id = f"fix-{round_no}"
+            latch = event_bus.open_round(round_id, [fx["file_path"] for fx in fixes])
             for fx in fixes:
-                event_bus.emit(f"dev_task:{fx['dev_id']}", {"type": "fix", "file_path": fx["file_path"], "issues": fx.get("issues", {})})
-            # 等待修复数量完成
-            self._await_dev_round_done(event_bus, expected=len(fixes))
+                event_bus.emit(f"dev_task:{fx['dev_id']}", {"type": "fix", "file_path": fx["file_path"],
+                                                            "issues": fx.get("issues", {}), "round": round_id})
+            # 等待本轮修复全部完成
+            self._await_dev_round_done(event_bus, latch)
         # 9) 停止开发者线程
         for dev in dev_threads:
             event_bus.emit(f"dev_task:{dev.agent_id}", {"type": "exit"})
         return str(repo.root)
 
-    def _await_dev_round_done(self, event_bus, expected: int):
-        ok = event_bus.wait_for_count("dev_done", expected=expected, timeout=600)
+    def _await_dev_round_done(self, event_bus, latch):
+        ok = event_bus.wait_round(latch.round_id, timeout=600)
         if not ok:
-            raise TimeoutError("Developers round timeout")
+            raise TimeoutError(f"Developers round {latch.round_id} timeout; outstanding={latch.outstanding()}")
@@ -12,13 +12,20 @@ from core.schemas import validate_sds
 from utils.sds_parser import parse_sds
 from utils.allowed_files import flatten_repo_structure
 from utils.event_bus_async import AsyncEventBus
+from utils.event_bus_remote import EventBroker, RemoteEventBus
 from runtime_adapters.python_runtime_async import PythonRuntimeAsync
-from utils.logger import get_logger, StageTimer
+from runtime_adapters.python_runtime_warm import WarmPythonRuntimeAsync
+from runtime_adapters.sandbox import Sandbox
+from utils.logger import get_logger, StageTimer, log_overlap
+from orchestrator.dag_scheduler import plan_waves
+from orchestrator.dev_scheduler import DevTaskRouter
+from orchestrator.checkpoint import WorkflowCheckpoint
 
 class MultiAgentCodegenWorkflowAsync:
     def __init__(self, ctx):
         self.ctx = ctx
         self.log = get_logger("workflow")
+        self.metrics: Dict[str, Any] = {}
 
     async def _collect_sds(self, question: str) -> List[Dict[str, Any]]:
         archs = [ArchitectAgent(name=f"Architect-{i+1}", llm=self.ctx.llm, rag=self.ctx.rag) for i in range(self.ctx.cfg.architects)]
@@ -31,21 +38,147 @@ class MultiAgentCodegenWorkflowAsync:
                 except Exception:
                     continue
             raise RuntimeError("SDS generation failed")
-        results = await asyncio.gather(*[one(a) for a in archs], return_exceptions=True)
-        sds_list = [r for r in results if not isinstance(r, Exception)]
+        # 法定数模式：凑够 quorum 份合法 SDS 或超过 deadline 即取消其余 Architect
+        cfg = self.ctx.cfg
+        quorum = 1 if cfg.sds_first_valid else (cfg.sds_quorum or len(archs))
+        quorum = max(1, min(quorum, len(archs)))
+        loop = asyncio.get_running_loop()
+        end = loop.time() + cfg.sds_deadline if cfg.sds_deadline > 0 else None
+        tasks = {asyncio.create_task(one(a), name=a.name): i for i, a in enumerate(archs)}
+        pending = set(tasks)
+        collected: List[tuple] = []
+        failed = 0
+        deadline_hit = False
+        try:
+            # 过了截止时间只需一份合法 SDS
+            while pending and len(collected) < (1 if deadline_hit else quorum):
+                timeout = None if end is None else max(0.0, end - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    deadline_hit = True
+                    if collected:
+                        break
+                    # 过了截止时间仍没有任何合法 SDS：继续等第一份
+                    end = None
+                    continue
+                for t in done:
+                    if t.exception() is not None:
+                        failed += 1
+                    else:
+                        collected.append((tasks[t], t.result()))
+        finally:
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        # 未完成的提案一律取消，不再等待，因此不统计“迟到”的提案
+        self.metrics["sds"] = {
+            "architects": len(archs), "quorum": quorum, "valid": len(collected), "failed": failed,
+            "cancelled": len(pending), "deadline_hit": deadline_hit,
+        }
+        sds_list = [r for _, r in sorted(collected, key=lambda x: x[0])]
         if not sds_list:
             raise RuntimeError("No valid SDS generated")
-        self.log.info(f"SDS collected: {len(sds_list)}")
+        self.log.info(f"SDS collected: {len(sds_list)} metrics={self.metrics['sds']}")
         return sds_list
 
-    async def run(self, question: str) -> str:
-        with StageTimer(self.log, "architect_phase"):
-            sds_list = await self._collect_sds(question)
-        with StageTimer(self.log, "cto_selection"):
-            cto = CTOAgent(llm=self.ctx.llm, rag=self.ctx.rag)
-            decision = await cto.choose(question, sds_list)
-            chosen_sds = decision["chosen_sds"]
-            sds = parse_sds(chosen_sds)
+    async def _stop_workers(self, router, workers, dev_tasks, graceful: bool):
+        # 正常结束时等 worker 处理完 exit；异常路径上直接取消仍在运行的协程
+        try:
+            await router.shutdown([w.agent_id for w in workers])
+            if graceful:
+                await asyncio.gather(*dev_tasks, return_exceptions=True)
+        except Exception as e:
+            self.log.warning(f"worker shutdown failed: {type(e).__name__}: {e}")
+        finally:
+            for t in dev_tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*dev_tasks, return_exceptions=True)
+        for w in workers:
+            self.log.info(f"worker_utilization {w.agent_id} {w.stats()}")
+
+    async def _dispatch_round(self, router, bus, repo, round_id: str, tasks: List[Dict[str, Any]]):
+        # 先开轮再下发：完成事件按轮次 ID 归入门闩，超时轮次的迟到事件不会算进下一轮
+        latch = bus.open_round(round_id, [t["file_path"] for t in tasks])
+        for t in tasks:
+            await router.submit(dict(t, round=round_id))
+        ok = await bus.wait_round(round_id, timeout=600)
+        # 本轮已完成文件的提交落盘、各开发者分支合并回主分支后再进入下一阶段（断点与测试都以此为准）
+        await asyncio.to_thread(repo.flush)
+        await asyncio.to_thread(repo.merge_round)
+        report = latch.report()
+        self.metrics.setdefault("rounds", []).append(report)
+        self.log.info(f"round_done {round_id} completed={report['completed']} errors={len(report['errors'])}")
+        if not ok:
+            raise TimeoutError(f"Developers round {round_id} timeout; outstanding={report['outstanding']}")
+        return report
+
+    async def _run_fixes(self, router, bus, repo, round_id: str, fixes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._dispatch_round(router, bus, repo, round_id, [
+            {"type":"fix", "file_path": fx["file_path"], "issues": fx.get("issues", {})} for fx in fixes])
+
+    async def resume(self, repo_root: str) -> str:
+        """从 repo_root 旁的断点文件继续一次中断的运行。"""
+        ckpt = WorkflowCheckpoint.load(repo_root)
+        return await self.run(question=ckpt.get("question"), checkpoint=ckpt)
+
+    async def run(self, question: str, checkpoint: WorkflowCheckpoint | None = None) -> str:
+        self._closers = []
+        try:
+            return await self._run(question, checkpoint)
+        finally:
+            for close in reversed(self._closers):
+                await close()
+
+    async def _make_bus(self):
+        """返回 (编排器用的总线, 为每个 worker 建立总线的工厂)。"""
+        bus_cfg = self.ctx.cfg.event_bus
+        if bus_cfg.backend == "memory":
+            bus = AsyncEventBus()
+            async def local():
+                return bus
+            return bus, local
+        if bus_cfg.backend != "socket":
+            raise ValueError(f"unknown event bus backend: {bus_cfg.backend}")
+        # 编排器与代理同进程，直接用代理背后的总线；worker 各自一条连接，断开时未 ack 的任务会被重新投递
+        broker = await EventBroker(bus_cfg.address).start()
+        self._closers.append(broker.close)
+        async def remote():
+            client = await RemoteEventBus.connect(broker.address)
+            self._closers.append(client.close)
+            return client
+        return broker.bus, remote
+
+    async def _run(self, question: str, checkpoint: WorkflowCheckpoint | None) -> str:
+        # 仓库目录先于 SDS 创建：断点文件与仓库放在一起，Architect 的产出也能落盘
+        if checkpoint is None:
+            # 池未命中时会从模板复制整个仓库，放到线程里，不阻塞服务共享的事件循环
+            repo_root = await asyncio.to_thread(self.ctx.make_repo_root)
+            checkpoint = WorkflowCheckpoint(repo_root, enabled=self.ctx.cfg.checkpoint)
+            checkpoint.save(question=question, stage="start")
+        else:
+            self.metrics["resumed_from"] = checkpoint.get("stage")
+            self.log.info(f"resuming {checkpoint.repo_root} from stage={checkpoint.get('stage')}")
+        ckpt = checkpoint
+        repo_root = ckpt.repo_root
+        if ckpt.get("stage") == "done":
+            return repo_root
+
+        if ckpt.has("sds_list"):
+            sds_list = ckpt.get("sds_list")
+        else:
+            with StageTimer(self.log, "architect_phase"):
+                sds_list = await self._collect_sds(question)
+            ckpt.save(sds_list=sds_list, stage="sds")
+        if ckpt.has("decision"):
+            decision = ckpt.get("decision")
+        else:
+            with StageTimer(self.log, "cto_selection"):
+                cto = CTOAgent(llm=self.ctx.llm, rag=self.ctx.rag)
+                decision = await cto.choose(question, sds_list)
+            ckpt.save(decision=decision, stage="cto")
+        chosen_sds = decision["chosen_sds"]
+        sds = parse_sds(chosen_sds)
 
         allowed_all: Set[str] = set(flatten_repo_structure(chosen_sds["repo_structure"]))
         allowed_by_agent: Dict[str, Set[str]] = {}
@@ -54,15 +187,45 @@ class MultiAgentCodegenWorkflowAsync:
         tests_files = {p for p in allowed_all if p.startswith("tests/")}
         allowed_by_agent["QA"] = tests_files
 
-        repo_root = self.ctx.make_repo_root()
-        repo = RepoManager(repo_root, allowed_files_all=allowed_all, allowed_files_by_agent=allowed_by_agent)
+        window = self.ctx.cfg.commit_window
+        repo = RepoManager(repo_root, allowed_files_all=allowed_all, allowed_files_by_agent=allowed_by_agent,
+                           commit_window=window if window >= 0 else None, object_store=self.ctx.cfg.git_object_store,
+                           dev_worktrees=self.ctx.cfg.dev_worktrees)
+        async def close_repo():
+            await asyncio.to_thread(repo.close)
+            self.metrics["git"] = repo.commit_stats()
+            self.log.info(f"git_commits {self.metrics['git']}")
+        self._closers.append(close_repo)
         repo.init_structure(sds.repo_structure)
         brief_mgr = BriefManager()
-        bus = AsyncEventBus()
+        brief_mgr.restore(ckpt.get("briefs", {}))
+        bus, worker_bus = await self._make_bus()
 
-        qa = QAAgentAsync(self.ctx.llm, repo, PythonRuntimeAsync(), bus, sds=sds)
-        with StageTimer(self.log, "qa_init_tests"):
-            await qa.init_tests(chosen_sds)
+        rc = self.ctx.cfg.runtime
+        sandbox = Sandbox(timeout=rc.timeout, cpu_seconds=rc.cpu_seconds, memory_mb=rc.memory_mb,
+                          open_files=rc.open_files, max_output_bytes=rc.max_output_bytes)
+        runtime = (WarmPythonRuntimeAsync(max_runs=rc.warm_max_runs, sandbox=sandbox)
+                   if rc.mode == "warm" else PythonRuntimeAsync(shards=rc.shards, sandbox=sandbox))
+        async def close_runtime():
+            await runtime.close()
+            self.metrics["qa_rounds"] = qa.round_stats
+            self.metrics["qa_runtime"] = runtime.stats()
+            self.log.info(f"qa_runtime {self.metrics['qa_runtime']}")
+        qa = QAAgentAsync(self.ctx.llm, repo, runtime, bus, sds=sds, impact=rc.impact)
+        self._closers.append(close_runtime)
+        # 测试生成只依赖 SDS：流水线模式下与首轮实现并行，在第一次跑测试前汇合
+        qa_timer = StageTimer(self.log, "qa_init_tests")
+        async def init_tests():
+            with qa_timer:
+                await qa.init_tests(chosen_sds)
+            ckpt.save(tests=qa.tests, run_command=qa.run_command)
+        qa_task = None
+        if ckpt.has("tests"):
+            await qa.restore_tests(ckpt.get("tests"), ckpt.get("run_command"))
+        elif self.ctx.cfg.overlap_qa_tests:
+            qa_task = asyncio.create_task(init_tests(), name="qa_init_tests")
+        else:
+            await init_tests()
 
         sds_map: Dict[str, dict] = {fs.path: {
             "path": fs.path,
@@ -74,38 +237,84 @@ class MultiAgentCodegenWorkflowAsync:
             "dependencies": fs.dependencies
         } for fs in sds.file_specs}
 
-        dev_tasks = []
-        for a in sds.dev_plan:
-            worker = DeveloperWorkerAsync(a.developer_id, a.file_paths, sds_map, self.ctx.llm, repo, brief_mgr, bus)
-            dev_tasks.append(await worker.start())
-
-        # 首轮实现
-        with StageTimer(self.log, "dev_round_initial"):
-            for fs in sds.file_specs:
-                dev_id = next(d.developer_id for d in sds.dev_plan if fs.path in d.file_paths)
-                await bus.emit(f"dev_task:{dev_id}", {"type":"implement", "file_path": fs.path})
-            ok = await bus.wait_for_count("dev_done", expected=len(sds.file_specs), timeout=600)
-            if not ok: raise TimeoutError("Developers initial round timeout")
-
-        # 修复迭代
-        with StageTimer(self.log, "qa_and_fix_loops"):
-            for rnd in range(self.ctx.cfg.max_rounds):
-                result = await qa.run_and_feedback()
-                if result.get("success", False):
-                    self.log.info(f"all tests passed at round {rnd}")
-                    break
-                fixes = result.get("fix_suggestions", [])
-                if not fixes:
-                    self.log.warning("no fix suggestions; stopping")
-                    break
-                for fx in fixes:
-                    await bus.emit(f"dev_task:{fx['dev_id']}", {"type":"fix", "file_path": fx["file_path"], "issues": fx.get("issues", {})})
-                ok = await bus.wait_for_count("dev_done", expected=len(fixes), timeout=600)
-                if not ok:
-                    raise TimeoutError("Developers fix round timeout")
-
-        # 停止协程
-        for a in sds.dev_plan:
-            await bus.emit(f"dev_task:{a.developer_id}", {"type":"exit"})
-        await asyncio.gather(*dev_tasks, return_exceptions=True)
+        file_owner = {f: a.developer_id for a in sds.dev_plan for f in a.file_paths}
+        shared = self.ctx.cfg.dev_concurrency > 0
+        router = DevTaskRouter(bus, file_owner, shared=shared)
+        if shared:
+            # 共享任务队列：固定数量的 worker 领取任意文件任务，并发度与 dev_plan 人数解耦
+            workers = [DeveloperWorkerAsync(f"Worker-{i+1}", [], sds_map, self.ctx.llm, repo, brief_mgr, await worker_bus(), router=router)
+                       for i in range(self.ctx.cfg.dev_concurrency)]
+        else:
+            workers = [DeveloperWorkerAsync(a.developer_id, a.file_paths, sds_map, self.ctx.llm, repo, brief_mgr, await worker_bus(), router=router)
+                       for a in sds.dev_plan]
+        dev_tasks = [await w.start() for w in workers]
+
+        # 之后任何一步抛错（修复轮、断点写入等）都要停掉 worker：服务与批处理进程的事件循环常驻，
+        # 漏停的 worker 会一直阻塞在 bus.take 上
+        finished = False
+        try:
+            # 首轮实现：按依赖拓扑分波次下发，保证依赖文件的简报先于使用方生成
+            dev_timer = StageTimer(self.log, "dev_round_initial")
+            try:
+                with dev_timer:
+                    if ckpt.has("waves"):
+                        # 恢复时沿用中断前的波次划分，waves_done 才对得上
+                        waves = ckpt.get("waves")
+                    elif self.ctx.cfg.dag_waves:
+                        plan = plan_waves({fs.path: fs.dependencies for fs in sds.file_specs})
+                        for src, dep in plan.broken_edges:
+                            self.log.warning(f"dependency cycle broken: {src} -> {dep}")
+                        waves = plan.waves
+                    else:
+                        waves = [[fs.path for fs in sds.file_specs]]
+                    ckpt.save(waves=waves)
+                    for i, wave in enumerate(waves):
+                        if i < ckpt.get("waves_done", 0):
+                            continue
+                        with StageTimer(self.log, f"dev_wave_{i} files={len(wave)}"):
+                            await self._dispatch_round(router, bus, repo, f"initial-{i}",
+                                                       [{"type":"implement", "file_path": path} for path in wave])
+                        ckpt.save(waves_done=i + 1, briefs=brief_mgr.snapshot(), stage="dev_initial")
+            except BaseException:
+                if qa_task:
+                    qa_task.cancel()
+                raise
+            if qa_task:
+                with StageTimer(self.log, "qa_join"):
+                    await qa_task
+                log_overlap(self.log, qa_timer, dev_timer)
+
+            # 修复迭代
+            with StageTimer(self.log, "qa_and_fix_loops"):
+                start = ckpt.get("round", 0)
+                pending = ckpt.get("pending_fixes") or []
+                changed = None   # 上一轮修复实际改动的文件；None 表示跑全量
+                if pending:
+                    # 中断发生在修复轮中：先补完该轮的修复，再从下一轮继续
+                    changed = (await self._run_fixes(router, bus, repo, f"fix-{start}-resumed", pending))["changed"]
+                    start += 1
+                    ckpt.save(round=start, pending_fixes=[], briefs=brief_mgr.snapshot(), stage="fix")
+                for rnd in range(start, self.ctx.cfg.max_rounds):
+                    result = await qa.run_and_feedback(changed)
+                    if result.get("success", False):
+                        self.log.info(f"all tests passed at round {rnd}")
+                        break
+                    fixes = result.get("fix_suggestions", [])
+                    if not fixes:
+                        self.log.warning("no fix suggestions; stopping")
+                        break
+                    ckpt.save(round=rnd, pending_fixes=fixes, stage="fix")
+                    report = await self._run_fixes(router, bus, repo, f"fix-{rnd}", fixes)
+                    ckpt.save(round=rnd + 1, pending_fixes=[], briefs=brief_mgr.snapshot(), stage="fix")
+                    changed = report["changed"]
+                    if not report["changed"]:
+                        # 没有任何文件发生变化：再跑一轮 pytest 只会得到同样的结果
+                        self.metrics["not_converging"] = rnd
+                        self.log.warning(f"fix round {rnd} changed no files; loop is not converging, stopping")
+                        break
+
+            finished = True
+        finally:
+            await self._stop_workers(router, workers, dev_tasks, graceful=finished)
+        ckpt.save(stage="done")
         return str(repo.root)
\ No newline at end of file
@@ -0,0 +1,165 @@
+# orchestrator/workspace_pool.py
+from __future__ import annotations
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+from git import Repo
+from utils.logger import get_logger
+
+def new_repo_name(prefix: str = "repo") -> str:
+    # 秒级时间戳便于人工查找，随机后缀保证并发作业互不冲突
+    return f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+class WorkspacePool:
+    """预热的仓库池：后台线程从模板复制出空 git 仓库放在 ready/ 下，作业领取时只做一次目录 rename。
+
+    目录布局（root 默认 <workspace>/.pool，可指向 tmpfs，如 /dev/shm/...）：
+      template/  只初始化一次的空仓库（去掉 hooks 样例）
+      ready/     预热好的仓库；以 "." 开头的是正在复制或回收中的目录，不会被领取
+      live/      root 与作业目录不在同一文件系统时，作业仓库留在池里，作业目录下放符号链接
+    rename 是原子的：多个进程（batch runner）共用同一个池目录时，同一个仓库只会被一个作业领到。
+    recycle() 把结束的作业仓库打包归档，删掉仓库旁的断点/耗时/影响映射文件，再把目录移进池里由后台
+    线程删除；用过的目录不复用（重置历史与对象库的开销与从模板复制相当），池由模板补足。
+    """
+
+    def __init__(self, root: str, size: int = 4, archive_dir: Optional[str] = None):
+        self.root = Path(root).resolve()
+        self.size = size
+        self.archive_dir = Path(archive_dir).resolve() if archive_dir else None
+        self.template = self.root / "template"
+        self.ready = self.root / "ready"
+        self.live = self.root / "live"
+        self.log = get_logger("workspace_pool")
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"acquired": 0, "hits": 0, "misses": 0, "provisioned": 0, "recycled": 0, "archived": 0}
+
+    def start(self, warm: bool = True):
+        """准备模板并（可选）同步预热到 size 个，再启动后台补充线程。"""
+        self.ready.mkdir(parents=True, exist_ok=True)
+        self.live.mkdir(parents=True, exist_ok=True)
+        self._ensure_template()
+        if warm:
+            self._refill()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="workspace-pool", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_template(self):
+        if (self.template / ".git").is_dir():
+            return
+        tmp = self.root / f".template-{uuid.uuid4().hex}"
+        repo = Repo.init(tmp, mkdir=True)
+        # hooks 样例对作业无用，删掉以减少每次复制的文件数
+        for f in (Path(repo.git_dir) / "hooks").glob("*.sample"):
+            f.unlink()
+        try:
+            os.rename(tmp, self.template)
+        except OSError:
+            # 其他进程先建好了模板
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _ready_entries(self):
+        return sorted(e.name for e in os.scandir(self.ready) if not e.name.startswith("."))
+
+    def _provision(self):
+        tmp = self.ready / f".new-{uuid.uuid4().hex}"
+        shutil.copytree(self.template, tmp, symlinks=True)
+        os.rename(tmp, self.ready / uuid.uuid4().hex)
+        with self._lock:
+            self._stats["provisioned"] += 1
+
+    def _refill(self):
+        # 先删掉回收的目录，再从模板补足预热数量
+        for e in os.scandir(self.ready):
+            if e.name.startswith(".recycle-"):
+                shutil.rmtree(e.path, ignore_errors=True)
+        while not self._stop and len(self._ready_entries()) < self.size:
+            self._provision()
+
+    def _loop(self):
+        while not self._stop:
+            self._wake.wait(timeout=30.0)
+            self._wake.clear()
+            if self._stop:
+                return
+            try:
+                self._refill()
+            except Exception as e:
+                self.log.error(f"workspace pool refill failed: {e}")
+
+    def acquire(self, parent: str, prefix: str = "repo") -> str:
+        """在 parent 下领取一个以唯一名字命名的空仓库并返回其路径；池空时直接从模板复制。"""
+        parent_dir = Path(parent)
+        parent_dir.mkdir(parents=True, exist_ok=True)
+        name = new_repo_name(prefix)
+        target = parent_dir / name
+        # 跨文件系统无法 rename：仓库留在池的 live/ 下，作业目录里放链接
+        same_fs = os.stat(self.ready).st_dev == os.stat(parent_dir).st_dev
+        dest = target if same_fs else self.live / name
+        hit = False
+        for entry in self._ready_entries():
+            try:
+                os.rename(self.ready / entry, dest)
+            except FileNotFoundError:
+                continue   # 被其他进程抢先领走
+            hit = True
+            break
+        if not hit:
+            shutil.copytree(self.template, dest, symlinks=True)
+        if dest != target:
+            target.symlink_to(dest, target_is_directory=True)
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["hits" if hit else "misses"] += 1
+        self._wake.set()
+        return str(target)
+
+    def recycle(self, repo_root: str) -> Optional[str]:
+        """归档作业仓库（配置了 archive_dir 时打成 tar.gz）并释放目录；返回归档路径，未归档时返回 None。"""
+        link = Path(repo_root)
+        real = link.resolve()
+        # 仓库旁的 <repo>.checkpoint.json / .test_durations.json / .impact_map.json 随仓库一起清掉，
+        # 否则在 tmpfs 布局下会堆积在 live/ 里
+        for sidecar in real.parent.glob(f"{real.name}.*.json"):
+            try:
+                sidecar.unlink()
+            except OSError:
+                pass
+        archive = None
+        if self.archive_dir:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            archive = shutil.make_archive(str(self.archive_dir / link.name), "gztar", root_dir=real.parent, base_dir=real.name)
+            with self._lock:
+                self._stats["archived"] += 1
+        if link.is_symlink():
+            link.unlink()
+        try:
+            # 同一文件系统时 rename 立即释放作业目录，清理交给后台线程
+            os.rename(real, self.ready / f".recycle-{uuid.uuid4().hex}")
+        except OSError:
+            shutil.rmtree(real, ignore_errors=True)
+        with self._lock:
+            self._stats["recycled"] += 1
+        self._wake.set()
+        return archive
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["ready"] = len(self._ready_entries())
+        return stats
@@ -16,6 +16,7 @@ except ImportError:
             return await action.run(**kwargs)
 
 from actions.generate_sds import GenerateSDSAction
+from core.llm_singleflight import llm_role
 
 class ArchitectAgent(Role):
     def __init__(self, name: str, llm, rag):
@@ -25,4 +26,5 @@ class ArchitectAgent(Role):
         self.set_actions([GenerateSDSAction(llm=llm)])
 
     async def propose_sds(self, question: str) -> dict:
-        return await self.run(GenerateSDSAction, question=question, rag_client=self.rag)
\ No newline at end of file
+        with llm_role("architect"):
+            return await self.run(GenerateSDSAction, question=question, rag_client=self.rag)
\ No newline at end of file
@@ -16,6 +16,7 @@ except ImportError:
             return await action.run(**kwargs)
 
 from actions.select_sds import SelectSDSAction
+from core.llm_singleflight import llm_role
 
 class CTOAgent(Role):
     def __init__(self, llm, rag):
@@ -25,4 +26,5 @@ class CTOAgent(Role):
         self.set_actions([SelectSDSAction(llm=llm)])
 
     async def choose(self, question, sds_list):
-        return await self.run(SelectSDSAction, question=question, sds_list=sds_list, rag_client=self.rag)
+        with llm_role("cto"):
+            return await self.run(SelectSDSAction, question=question, sds_list=sds_list, rag_client=self.rag)
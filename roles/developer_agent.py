@@ -27,6 +27,7 @@ except ImportError:
 
 from actions.generate_code import GenerateCodeAction
 from actions.request_briefing import RequestBriefingAction
+from core.llm_singleflight import llm_role
 
 class DeveloperAgent(Role, threading.Thread):
     def __init__(self, agent_id: str, assigned_files: List[str], sds_map: Dict[str, dict],
@@ -51,29 +52,33 @@ class DeveloperAgent(Role, threading.Thread):
                     briefs[dep] = brief
         return briefs
 
-    def _implement(self, file_path: str):
+    def _implement(self, file_path: str, round_id: str | None = None):
         file_spec = self.sds_map[file_path]
         briefs = self._collect_briefs(file_spec)
         brief = self.run(GenerateCodeAction, file_spec=file_spec, briefs=briefs,
                          llm=self.llm, repo_manager=self.repo, agent_id=self.agent_id, issues=None)
         self.briefs.update_brief(file_path, brief)
-        self.event_bus.emit("dev_done", {"agent_id": self.agent_id, "file": file_path})
+        self.event_bus.emit("dev_done", {"agent_id": self.agent_id, "file": file_path, "round": round_id})
 
-    def _fix(self, file_path: str, issues: dict):
+    def _fix(self, file_path: str, issues: dict, round_id: str | None = None):
         file_spec = self.sds_map[file_path]
         briefs = self._collect_briefs(file_spec)
         brief = self.run(GenerateCodeAction, file_spec=file_spec, briefs=briefs,
                          llm=self.llm, repo_manager=self.repo, agent_id=self.agent_id, issues=issues)
         self.briefs.update_brief(file_path, brief)
-        self.event_bus.emit("dev_done", {"agent_id": self.agent_id, "file": file_path})
+        self.event_bus.emit("dev_done", {"agent_id": self.agent_id, "file": file_path, "round": round_id})
 
     def run(self):
+        with llm_role("developer"):
+            self._loop()
+
+    def _loop(self):
         while True:
             task = self.event_bus.take(f"dev_task:{self.agent_id}")
             t = task.get("type")
             if t == "implement":
-                self._implement(task["file_path"])
+                self._implement(task["file_path"], task.get("round"))
             elif t == "fix":
-                self._fix(task["file_path"], task.get("issues", {}))
+                self._fix(task["file_path"], task.get("issues", {}), task.get("round"))
             elif t == "exit":
                 break
@@ -1,14 +1,17 @@
 # roles/developer_worker_async.py
 from __future__ import annotations
 import asyncio
-from typing import Dict, List
+import contextlib
+import time
+from typing import Dict, List, Optional
 from actions.generate_code import GenerateCodeAction
 from actions.request_briefing import RequestBriefingAction
+from core.llm_singleflight import llm_role
 from utils.logger import get_logger
 
 class DeveloperWorkerAsync:
     def __init__(self, agent_id: str, assigned_files: List[str], sds_map: Dict[str, dict],
-                 llm, repo_manager, brief_manager, event_bus):
+                 llm, repo_manager, brief_manager, event_bus, router=None):
         self.agent_id = agent_id
         self.assigned_files = set(assigned_files)
         self.sds_map = sds_map
@@ -16,44 +19,83 @@ class DeveloperWorkerAsync:
         self.repo = repo_manager
         self.briefs = brief_manager
         self.bus = event_bus
+        self.router = router  # DevTaskRouter；为空时只消费自己的 dev_task:{agent_id}
         self.log = get_logger(f"dev.{agent_id}")
 
         self._gen = GenerateCodeAction(llm=llm)
         self._req = RequestBriefingAction()
+        self._started_at: Optional[float] = None
+        self._busy = 0.0
+        self._tasks_done = 0
 
     async def start(self):
         self.task = asyncio.create_task(self.run(), name=f"Dev-{self.agent_id}")
         return self.task
 
     async def run(self):
-        topic = f"dev_task:{self.agent_id}"
+        with llm_role("developer"):
+            await self._loop()
+
+    async def _loop(self):
+        self._started_at = time.perf_counter()
+        topic = self.router.topic_for(self.agent_id) if self.router else f"dev_task:{self.agent_id}"
         while True:
             task = await self.bus.take(topic)
             t = task.get("type")
             if t == "exit":
-                self.log.info("exit")
+                await self.bus.ack(topic)
+                self.log.info(f"exit {self._utilization_line()}")
                 return
             file_path = task["file_path"]
             issues = task.get("issues")
+            # 共享队列中的任务以文件 owner 身份执行，写权限仍按 dev_plan 校验
+            owner = task.get("owner", self.agent_id)
+            t0 = time.perf_counter()
             try:
                 file_spec = self.sds_map[file_path]
-                briefs = await self._collect_briefs(file_spec)
-                brief = await self._gen.run(file_spec=file_spec, briefs=briefs,
-                                            llm=self.llm, repo_manager=self.repo,
-                                            agent_id=self.agent_id, issues=issues)
+                lock = self.router.lock_for(file_path) if self.router else contextlib.nullcontext()
+                async with lock:
+                    briefs = await self._collect_briefs(file_spec, owner)
+                    brief = await self._gen.run(file_spec=file_spec, briefs=briefs,
+                                                llm=self.llm, repo_manager=self.repo,
+                                                agent_id=owner, issues=issues, executor=self.agent_id)
                 self.briefs.update_brief(file_path, brief)
-                await self.bus.emit("dev_done", {"agent_id": self.agent_id, "file": file_path})
+                await self.bus.emit("dev_done", {"agent_id": owner, "worker": self.agent_id, "file": file_path,
+                                                 "round": task.get("round"), "changed": self._gen.last_changed})
                 self.log.info(f"done {t} {file_path}")
             except Exception as e:
                 self.log.error(f"error {t} {file_path}: {e}")
-                await self.bus.emit("dev_done", {"agent_id": self.agent_id, "file": file_path, "error": str(e)})
+                await self.bus.emit("dev_done", {"agent_id": owner, "worker": self.agent_id, "file": file_path,
+                                                 "round": task.get("round"), "error": str(e)})
+            finally:
+                self._busy += time.perf_counter() - t0
+                self._tasks_done += 1
+            # 处理完（含写入 dev_done）才确认：worker 中途崩溃时远程总线会把任务重新投递
+            await self.bus.ack(topic)
 
-    async def _collect_briefs(self, file_spec: dict) -> dict:
+    async def _collect_briefs(self, file_spec: dict, owner: Optional[str] = None) -> dict:
         briefs = {}
+        if self.router and owner:
+            own_files = {p for p, o in self.router.file_owner.items() if o == owner}
+        else:
+            own_files = self.assigned_files
         for dep in file_spec.get("dependencies", []):
-            if dep not in self.assigned_files:
+            if dep not in own_files:
                 # 同步动作，直接调用
                 brief = await self._req.run(target_file=dep, brief_manager=self.briefs)
                 if brief:
                     briefs[dep] = brief
         return briefs
+
+    def stats(self) -> Dict[str, float]:
+        wall = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "tasks": self._tasks_done,
+            "busy_s": round(self._busy, 3),
+            "wall_s": round(wall, 3),
+            "utilization": round(self._busy / wall, 3) if wall > 0 else 0.0,
+        }
+
+    def _utilization_line(self) -> str:
+        st = self.stats()
+        return f"tasks={st['tasks']} busy={st['busy_s']:.2f}s wall={st['wall_s']:.2f}s utilization={st['utilization']:.0%}"
@@ -24,6 +24,8 @@ except ImportError:
 
 from actions.generate_tests import GenerateTestsAction
 from actions.run_tests import RunTestsAction
+from core.llm_singleflight import llm_role
+from roles.qa_common import merge_fix_suggestions
 
 class QAAgent(Role):
     def __init__(self, llm, repo_manager, runtime_adapter, event_bus, sds=None):
@@ -41,7 +43,8 @@ class QAAgent(Role):
         self.set_actions([GenerateTestsAction(llm=llm), RunTestsAction()])
 
     async def init_tests(self, sds_json: dict):
-        res = await self.run(GenerateTestsAction, sds=sds_json, llm=self.llm)
+        with llm_role("qa"):
+            res = await self.run(GenerateTestsAction, sds=sds_json, llm=self.llm)
         for fpath, content in res["tests"].items():
             self.repo.write_file(fpath, content, agent_id="QA")
         self.repo.commit_all("test: initial tests generated by QA")
@@ -54,9 +57,9 @@ class QAAgent(Role):
         for fail in failures:
             fp = fail.get("file_path", "")
             stack = fail.get("stack", "")
-            # 简单从堆栈中找匹配到的源文件路径
-            target = None
-            for line in stack.splitlines():
+            # 结构化报告带有栈帧：取最内层落在源文件上的帧；否则从堆栈文本中找匹配到的源文件路径
+            target = next((fr["file"] for fr in reversed(fail.get("frames", [])) if fr["file"] in src_files), None)
+            for line in ([] if target else stack.splitlines()):
                 for sf in src_files:
                     if sf in line:
                         target = sf
@@ -73,9 +76,10 @@ class QAAgent(Role):
                     suggestions.append({"dev_id": self.file_owner[sf], "file_path": sf, "issues": fail})
             else:
                 suggestions.append({"dev_id": self.file_owner[target], "file_path": target, "issues": fail})
-        return suggestions
+        return merge_fix_suggestions(suggestions)
 
     async def run_and_feedback(self):
+        self.repo.materialize()
         result = await self.run(RunTestsAction, repo_root=str(self.repo.root), run_command=self.run_command, runtime_adapter=self.adapter)
         fix_suggestions = self._map_failures(result.get("failures", []))
         result["fix_suggestions"] = fix_suggestions
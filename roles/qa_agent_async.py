@@ -1,12 +1,18 @@
 # roles/qa_agent_async.py
 from __future__ import annotations
+import asyncio
+import time
 from typing import Dict, Any, List, Set
 from actions.generate_tests import GenerateTestsAction
 from actions.run_tests import RunTestsAction
+from core.impact_map import ImpactMap
+from core.llm_singleflight import llm_role
+from roles.qa_common import merge_fix_suggestions
+from runtime_adapters.pytest_support import strip_positional
 from utils.logger import get_logger
 
 class QAAgentAsync:
-    def __init__(self, llm, repo_manager, runtime_adapter, event_bus, sds=None):
+    def __init__(self, llm, repo_manager, runtime_adapter, event_bus, sds=None, impact: bool = False):
         self.llm = llm
         self.repo = repo_manager
         self.adapter = runtime_adapter
@@ -20,21 +26,69 @@ class QAAgentAsync:
                     self.file_owner[f] = a.developer_id
         self._gen = GenerateTestsAction(llm=llm)
         self._run = RunTestsAction()
+        # impact：记录用例 -> 源文件映射，修复轮只重跑受影响的用例
+        self.impact = ImpactMap(str(self.repo.root)) if impact else None
+        self.round_stats: List[Dict[str, Any]] = []
 
     async def init_tests(self, sds_json: dict):
-        res = await self._gen.run(sds=sds_json, llm=self.llm)
+        with llm_role("qa"):
+            res = await self._gen.run(sds=sds_json, llm=self.llm)
         for fpath, content in res["tests"].items():
             self.repo.write_file(fpath, content, agent_id="QA")
-        self.repo.commit_all("test: initial tests generated by QA")
+        # commit_all 会等写线程排空并跑 git add -A，放到线程里，不阻塞开发者与事件循环
+        await asyncio.to_thread(self.repo.commit_all, "test: initial tests generated by QA")
+        self.tests = res["tests"]
         self.run_command = res["run_command"]
         self.log.info("tests initialized")
 
-    async def run_and_feedback(self):
-        result = await self._run.run(repo_root=str(self.repo.root), run_command=self.run_command, runtime_adapter=self.adapter)
+    async def restore_tests(self, tests: Dict[str, str], run_command):
+        # 断点恢复：重写测试文件（崩溃时可能未提交），不再调用 LLM
+        for fpath, content in tests.items():
+            self.repo.write_file(fpath, content, agent_id="QA")
+        await asyncio.to_thread(self.repo.commit_all, "test: restore tests from checkpoint")
+        self.tests = tests
+        self.run_command = run_command
+        self.log.info("tests restored from checkpoint")
+
+    async def _run_suite(self, node_ids: List[str] | None = None) -> Dict[str, Any]:
+        options: Dict[str, Any] = {}
+        if node_ids is not None:
+            options["node_ids"] = node_ids
+        if self.impact:
+            options["impact_map"] = self.impact.new_run_path()
+        result = await self._run.run(repo_root=str(self.repo.root), run_command=self.run_command, runtime_adapter=self.adapter, **options)
+        if self.impact:
+            self.impact.ingest(options["impact_map"], result)
+        return result
+
+    async def run_and_feedback(self, changed: List[str] | None = None):
+        """changed 为上一轮修复实际改动的文件；启用 impact 时只重跑受影响的用例，全部通过后再跑全量确认。"""
+        # 对象模式下文件只在 git 对象库里，跑测试前落盘到工作区
+        self.repo.materialize()
+        t0 = time.perf_counter()
+        selected = None
+        # 只有能去掉位置参数、改用 node id 选择的 pytest 命令才做选择，否则"选择运行"其实是一次全量
+        if self.impact and changed is not None and strip_positional(self.run_command) is not None:
+            selected = self.impact.select(changed)
+        if selected:
+            result = await self._run_suite(selected)
+            tests_run, mode = len(result.get("tests", [])), "selected"
+            if result.get("success"):
+                # 受影响的用例全部通过：宣布成功之前跑一次全量确认
+                result = await self._run_suite()
+                tests_run, mode = tests_run + len(result.get("tests", [])), "selected+full"
+        else:
+            result = await self._run_suite()
+            tests_run, mode = len(result.get("tests", [])), "full"
+        self.round_stats.append({"mode": mode, "tests_run": tests_run,
+                                 "tests_total": len(self.impact.map) if self.impact else tests_run,
+                                 "duration_s": round(time.perf_counter() - t0, 3),
+                                 "resources": result.get("resources", {})})
         fix_suggestions = self._map_failures(result.get("failures", []))
         result["fix_suggestions"] = fix_suggestions
         await self.bus.emit("qa_result", result)
-        self.log.info(f"qa_result success={result.get('success')}, fixes={len(fix_suggestions)}")
+        self.log.info(f"qa_result success={result.get('success')}, fixes={len(fix_suggestions)}, "
+                      f"runner={result.get('runner')}, round={self.round_stats[-1]}")
         return result
 
     def _map_failures(self, failures: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -43,8 +97,9 @@ class QAAgentAsync:
         for fail in failures:
             fp = fail.get("file_path", "")
             stack = fail.get("stack", "")
-            target = None
-            for line in stack.splitlines():
+            # 结构化报告带有栈帧：取最内层落在源文件上的帧
+            target = next((fr["file"] for fr in reversed(fail.get("frames", [])) if fr["file"] in src_files), None)
+            for line in ([] if target else stack.splitlines()):
                 for sf in src_files:
                     if sf in line:
                         target = sf
@@ -57,4 +112,4 @@ class QAAgentAsync:
                     suggestions.append({"dev_id": self.file_owner[sf], "file_path": sf, "issues": fail})
             else:
                 suggestions.append({"dev_id": self.file_owner[target], "file_path": target, "issues": fail})
-        return suggestions
+        return merge_fix_suggestions(suggestions)
@@ -0,0 +1,23 @@
+# roles/qa_common.py
+# 同步与异步 QA Agent 共用的辅助函数
+from __future__ import annotations
+from typing import Any, Dict, List
+
+def merge_fix_suggestions(suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """同一文件的多条失败合并为一个修复任务，栈按用例分段拼接。"""
+    by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for s in suggestions:
+        by_file.setdefault(s["file_path"], []).append(s)
+    merged = []
+    for fp, group in by_file.items():
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        issues = [g["issues"] for g in group]
+        merged.append({"dev_id": group[0]["dev_id"], "file_path": fp, "issues": {
+            "file_path": fp,
+            "message": "; ".join(dict.fromkeys(i.get("message", "") for i in issues)),
+            "stack": "\n\n".join(f"[{i['test']}]\n{i.get('stack', '')}" if i.get("test") else i.get("stack", "") for i in issues),
+            "tests": [i["test"] for i in issues if i.get("test")],
+        }})
+    return merged
@@ -0,0 +1,130 @@
+# runtime_adapters/junit_report.py
+"""读取 pytest --junitxml 报告，得到逐用例的结果，取代对 stdout/stderr 的正则抓取。
+
+使用 xunit1 格式：testcase 上带 file/line，可以还原 node id。失败文本里的调用栈位置
+（long/short 风格的 "path.py:12: ..." 与 native 风格的 'File "path.py", line 12'）逐行扫描一次，
+解析开销与报告大小成线性。"""
+from __future__ import annotations
+import os
+import re
+import shlex
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from runtime_adapters.pytest_support import pytest_args
+
+_LOCATION_RE = re.compile(r"^(\S+?\.py):(\d+):\s*(.*)$")
+_NATIVE_RE = re.compile(r'^\s*File "([^"]+\.py)", line (\d+)')
+_EXC_NAME_RE = re.compile(r"^(?:E\s+)?([A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt|Warning))(?::|$)")
+
+def new_report_path() -> str:
+    # 报告放在系统临时目录，不进被测仓库
+    fd, path = tempfile.mkstemp(prefix="junit-", suffix=".xml")
+    os.close(fd)
+    return path
+
+def junit_args(path: str) -> List[str]:
+    return [f"--junitxml={path}", "-o", "junit_family=xunit1"]
+
+def report_command(run_command: str) -> Tuple[str, Optional[str]]:
+    """pytest 命令追加 --junitxml 并返回 (命令, 报告路径)；其他命令原样返回、报告路径为 None。"""
+    if pytest_args(run_command) is None:
+        return run_command, None
+    path = new_report_path()
+    return f"{run_command} " + " ".join(shlex.quote(a) for a in junit_args(path)), path
+
+def ingest(result: Dict[str, Any], report: Optional[str], fallback: Callable[[str], List[Dict[str, Any]]],
+           root: str = "") -> Dict[str, Any]:
+    """用报告填充 result 的 failures/tests 并删除报告；没有可用报告（命令行错误、被杀等）时退回文本解析。"""
+    parsed = parse_junit(report, root) if report else None
+    if report:
+        try:
+            os.unlink(report)
+        except OSError:
+            pass
+    if parsed is None:
+        result["failures"] = fallback(result.get("output", ""))
+    else:
+        result["failures"] = parsed["failures"]
+        result["tests"] = parsed["tests"]
+    return result
+
+def _node_id(case: ET.Element) -> str:
+    file, cls, name = case.get("file", ""), case.get("classname", ""), case.get("name", "")
+    if not file:
+        return f"{cls}::{name}" if cls else name
+    if not cls:
+        # 收集阶段的错误：用例名是模块的点分路径，node id 就是文件本身
+        return file
+    module = file[:-3].replace("/", ".") if file.endswith(".py") else file
+    parts = [file]
+    if cls.startswith(module + "."):
+        parts += cls[len(module) + 1:].split(".")
+    return "::".join(parts + [name])
+
+def parse_frames(text: str, root: str = "") -> List[Dict[str, Any]]:
+    """栈帧列表（外层在前）；仓库内的绝对路径（native 风格）转成相对仓库根的路径。"""
+    prefix = root.rstrip("/") + "/" if root else None
+    frames = []
+    for ln in text.splitlines():
+        m = _LOCATION_RE.match(ln) or _NATIVE_RE.match(ln)
+        if m:
+            f = m.group(1)
+            if prefix and f.startswith(prefix):
+                f = f[len(prefix):]
+            frames.append({"file": f, "line": int(m.group(2))})
+    return frames
+
+def _exception(text: str, message: str) -> str:
+    # long 风格：最后一个位置行的尾部就是异常类型；其余风格找最后一个 "XxxError: ..." 行
+    lines = [ln for ln in text.splitlines() if ln.strip()]
+    for ln in reversed(lines):
+        m = _LOCATION_RE.match(ln)
+        if m and m.group(3) and not m.group(3).startswith("in "):
+            return m.group(3)
+    for ln in reversed(lines):
+        m = _EXC_NAME_RE.match(ln)
+        if m:
+            return m.group(1)
+    # short 风格的断言失败只剩 "assert ..." 文本
+    if (message or "").startswith("assert "):
+        return "AssertionError"
+    return (message or "").split(":")[0].strip()
+
+def parse_junit(path: str, root: str = "") -> Optional[Dict[str, Any]]:
+    """返回 {"tests": [...], "failures": [...]}；报告不存在或无法解析时返回 None。"""
+    try:
+        tree = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return None
+    tests: List[Dict[str, Any]] = []
+    failures: List[Dict[str, Any]] = []
+    for case in tree.iter("testcase"):
+        node = _node_id(case)
+        outcome, detail = "passed", None
+        for child in case:
+            if child.tag in ("failure", "error"):
+                outcome, detail = ("failed" if child.tag == "failure" else "error"), child
+                break
+            if child.tag == "skipped":
+                outcome = "skipped"
+        duration = float(case.get("time") or 0.0)
+        tests.append({"test": node, "outcome": outcome, "duration": duration})
+        if detail is None:
+            continue
+        text = detail.text or ""
+        message = detail.get("message", "")
+        frames = parse_frames(text, root)
+        # 最内层的仓库内（相对路径）栈帧即出错位置；没有栈帧时归到用例所在文件
+        inner = next((f["file"] for f in reversed(frames) if not os.path.isabs(f["file"])), None)
+        failures.append({
+            "file_path": inner or case.get("file", ""),
+            "message": message or outcome,
+            "stack": text,
+            "test": node,
+            "outcome": outcome,
+            "duration": duration,
+            "exception": _exception(text, message),
+            "frames": frames,
+        })
+    return {"tests": tests, "failures": failures}
@@ -0,0 +1,100 @@
+# runtime_adapters/pytest_plugins/impact_trace.py
+"""记录每个用例实际执行到的仓库文件（用例 -> 源文件映射），供修复轮只重跑受影响的用例。
+
+运行时适配器把本目录加入 PYTHONPATH，以 -p impact_trace --impact-map=PATH 加载；只依赖标准库与 pytest。
+用 setprofile 只看函数调用事件（不做逐行追踪）。读取常量不产生调用（from c import LIMIT），
+所以再把测试模块和每个执行到的文件直接 import 的仓库模块（一层，按 AST 解析）也算进该用例。
+"""
+import ast
+import json
+import os
+import sys
+import tempfile
+import threading
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption("--impact-map", default=None, help="write test -> repo files map (JSON) to this path")
+
+def pytest_configure(config):
+    path = config.getoption("--impact-map")
+    if path:
+        config.pluginmanager.register(ImpactTracer(path, str(config.rootpath)), "impact-tracer")
+
+class ImpactTracer:
+    def __init__(self, out: str, root: str):
+        self.out = out
+        self.prefix = root.rstrip(os.sep) + os.sep
+        self.map = {}
+        self.current = None
+        self._rel = {}
+        self._deps = {}
+
+    def _relpath(self, filename: str):
+        rel = self._rel.get(filename, False)
+        if rel is False:
+            rel = None
+            if not filename.startswith("<"):   # <frozen ...>、<string> 等不是文件
+                path = os.path.abspath(filename)
+                if path.startswith(self.prefix):
+                    rel = path[len(self.prefix):].replace(os.sep, "/")
+            self._rel[filename] = rel
+        return rel
+
+    def _imports(self, rel: str):
+        """rel 文件直接 import 的、已加载的仓库模块文件。"""
+        deps = self._deps.get(rel)
+        if deps is None:
+            deps = set()
+            try:
+                tree = ast.parse(open(self.prefix + rel, encoding="utf-8").read())
+            except (OSError, SyntaxError, ValueError):
+                tree = None
+            package = rel[:-3].replace("/", ".").rsplit(".", 1)[0] if "/" in rel else ""
+            for node in ast.walk(tree) if tree else ():
+                names = []
+                if isinstance(node, ast.Import):
+                    names = [a.name for a in node.names]
+                elif isinstance(node, ast.ImportFrom):
+                    base = node.module or ""
+                    if node.level:
+                        parts = package.split(".") if package else []
+                        parts = parts[:len(parts) - node.level + 1] if node.level > 1 else parts
+                        base = ".".join(p for p in parts + [base] if p)
+                    names = [base] + [f"{base}.{a.name}" if base else a.name for a in node.names]
+                for name in names:
+                    f = getattr(sys.modules.get(name), "__file__", None)
+                    dep = self._relpath(f) if f else None
+                    if dep and dep != rel:
+                        deps.add(dep)
+            self._deps[rel] = deps
+        return deps
+
+    def _profile(self, frame, event, arg):
+        if event == "call" and self.current is not None:
+            rel = self._relpath(frame.f_code.co_filename)
+            if rel:
+                self.current.add(rel)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.current = set()
+        sys.setprofile(self._profile)
+        threading.setprofile(self._profile)
+        try:
+            yield
+        finally:
+            sys.setprofile(None)
+            threading.setprofile(None)
+            files, self.current = self.current, None
+            test_file = self._relpath(str(getattr(item, "path", None) or item.fspath))
+            if test_file:
+                files.add(test_file)
+            files |= {dep for f in list(files) for dep in self._imports(f)}
+            self.map[item.nodeid] = sorted(files)
+
+    def pytest_sessionfinish(self, session):
+        fd, tmp = tempfile.mkstemp(prefix=".impact", dir=os.path.dirname(os.path.abspath(self.out)))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.map, f)
+        os.replace(tmp, self.out)
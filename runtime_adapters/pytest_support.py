@@ -0,0 +1,210 @@
+# runtime_adapters/pytest_support.py
+"""两个运行时适配器共用的 pytest 辅助：命令解析、用例收集、按历史耗时分片、结果合并。
+只使用 pytest 自带选项（--collect-only、--junitxml），不依赖目标环境安装 xdist 等插件。"""
+from __future__ import annotations
+import heapq
+import json
+import os
+import re
+import shlex
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_SHELL_CHARS = set("|&;<>()$`")
+PLUGIN_DIR = str(Path(__file__).with_name("pytest_plugins"))
+
+def pytest_args(run_command: str) -> Optional[Tuple[List[str], bool]]:
+    """把 "pytest ..." / "python -m pytest ..." 解析为 (args, cwd_on_path)；其他命令返回 None。"""
+    try:
+        tokens = shlex.split(run_command)
+    except ValueError:
+        return None
+    if not tokens or any(c in _SHELL_CHARS for t in tokens for c in t) or "=" in tokens[0]:
+        return None
+    if Path(tokens[0]).name in ("pytest", "py.test"):
+        return tokens[1:], False
+    if len(tokens) >= 3 and Path(tokens[0]).name.startswith("python") and tokens[1:3] == ["-m", "pytest"]:
+        return tokens[3:], True
+    return None
+
+# 带独立取值的选项（"-k EXPR"、"--tb short"）；"--opt=value" 形式不需要列出
+_VALUE_SHORT = set("kmpcoWrn")
+_VALUE_LONG = {
+    "--basetemp", "--capture", "--code-highlight", "--color", "--confcutdir", "--config-file", "--deselect",
+    "--doctest-glob", "--doctest-report", "--durations", "--durations-min", "--ignore", "--ignore-glob",
+    "--import-mode", "--junit-prefix", "--junit-xml", "--junitxml", "--last-failed-no-failures", "--lfnf",
+    "--log-cli-level", "--log-cli-format", "--log-cli-date-format", "--log-date-format", "--log-disable",
+    "--log-file", "--log-file-date-format", "--log-file-format", "--log-file-level", "--log-file-mode",
+    "--log-format", "--log-level", "--max-warnings", "--maxfail", "--override-ini", "--pdbcls",
+    "--pythonwarnings", "--report-chars", "--rootdir", "--show-capture", "--tb", "--verbosity", "--assert",
+    "--cov-report", "--dist", "--numprocesses", "--timeout",
+}
+_FLAG_SHORT = set("qvsxlV")
+_FLAG_LONG = {
+    "--cache-clear", "--collect-in-virtualenv", "--collect-only", "--co", "--continue-on-collection-errors",
+    "--disable-warnings", "--disable-pytest-warnings", "--doctest-continue-on-failure",
+    "--doctest-ignore-import-errors", "--doctest-modules", "--exitfirst", "--ff", "--failed-first", "--full-trace",
+    "--keep-duplicates", "--lf", "--last-failed", "--nf", "--new-first", "--no-header", "--no-showlocals",
+    "--no-summary", "--noconftest", "--pdb", "--pyargs", "--quiet", "--runxfail", "--setup-only", "--setup-plan",
+    "--setup-show", "--showlocals", "--strict", "--strict-config", "--strict-markers", "--sw", "--stepwise",
+    "--sw-skip", "--stepwise-skip", "--trace", "--verbose", "--xfail-tb", "--force-short-summary",
+}
+
+def split_positional(args: List[str]) -> Optional[Tuple[List[str], List[str]]]:
+    """把 pytest 参数分成 (选项, 位置参数)；位置参数是文件/目录/node id。
+    遇到无法判断后一个 token 是选项取值还是路径的未知选项时返回 None。"""
+    options: List[str] = []
+    positional: List[str] = []
+    i = 0
+    while i < len(args):
+        a = args[i]
+        i += 1
+        if a == "--":
+            return None
+        if not a.startswith("-") or a == "-":
+            positional.append(a)
+            continue
+        options.append(a)
+        if a.startswith("--"):
+            if "=" in a or a in _FLAG_LONG:
+                continue
+            if a in _VALUE_LONG:
+                if i >= len(args):
+                    return None
+                options.append(args[i])
+                i += 1
+                continue
+            # 未知长选项（插件的、可选取值的 --cov 等）：后面跟着非选项 token 时无法判断
+            if i < len(args) and not args[i].startswith("-"):
+                return None
+            continue
+        for k, ch in enumerate(a[1:], 1):
+            if ch in _VALUE_SHORT:
+                if k == len(a) - 1:
+                    if i >= len(args):
+                        return None
+                    options.append(args[i])
+                    i += 1
+                break   # 取值紧跟在字母后面（-kfoo、-rA）
+            if ch not in _FLAG_SHORT:
+                return None
+    return options, positional
+
+def strip_positional(run_command: str) -> Optional[str]:
+    """去掉 pytest 命令里的位置参数，给 node id 运行用；否则位置参数下的用例会被整体重复收集执行。
+    不是 pytest 命令或参数无法安全拆分时返回 None，调用方退回整体运行。"""
+    parsed = pytest_args(run_command)
+    split = split_positional(parsed[0]) if parsed else None
+    if split is None:
+        return None
+    tokens = shlex.split(run_command)
+    return shlex.join(tokens[:len(tokens) - len(parsed[0])] + split[0])
+
+def _verbosity(args: List[str]) -> int:
+    v = 0
+    for a in args:
+        if a == "--quiet":
+            v -= 1
+        elif a == "--verbose":
+            v += 1
+        elif re.fullmatch(r"-[qv]+", a):
+            v += a.count("v") - a.count("q")
+    return v
+
+def collect_command(run_command: str) -> str:
+    # 只有 verbosity 恰好为 -1 时才是逐行 node id；-qq 会变成按文件计数
+    delta = -1 - _verbosity(pytest_args(run_command)[0])
+    adjust = " -" + ("q" * -delta if delta < 0 else "v" * delta) if delta else ""
+    return f"{run_command} --collect-only{adjust}"
+
+def parse_collected(output: str) -> List[str]:
+    # -q 的收集输出每行一个 node id，随后是空行和 "N tests collected"
+    return [ln.strip() for ln in output.splitlines() if "::" in ln and not ln.startswith(("=", " "))]
+
+def impact_args(impact_map: Optional[str]) -> List[str]:
+    # 加载 pytest_plugins/impact_trace.py，记录每个用例执行到的仓库文件
+    return ["-p", "impact_trace", f"--impact-map={impact_map}"] if impact_map else []
+
+def plugin_env() -> Dict[str, str]:
+    # 插件目录放在 PYTHONPATH 末尾，不遮住被测仓库的同名模块
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (env.get("PYTHONPATH"), PLUGIN_DIR) if p)
+    return env
+
+def extend_command(run_command: str, node_ids: Optional[List[str]] = None, impact_map: Optional[str] = None) -> str:
+    # 给定 node_ids 时 run_command 应已经过 strip_positional
+    extra = impact_args(impact_map) + list(node_ids or [])
+    return f"{run_command} " + " ".join(shlex.quote(a) for a in extra) if extra else run_command
+
+def merge_impact_maps(paths: List[str], out: str):
+    """把各分片写出的映射合并到 out，并删除分片文件。"""
+    merged: Dict[str, Any] = {}
+    for p in paths:
+        try:
+            merged.update(json.loads(Path(p).read_text(encoding="utf-8")))
+            os.unlink(p)
+        except (OSError, ValueError):
+            continue
+    Path(out).write_text(json.dumps(merged), encoding="utf-8")
+
+def result_durations(result: Dict[str, Any]) -> Dict[str, float]:
+    # 每个用例 setup+call+teardown 的总耗时，来自结构化报告
+    return {t["test"]: t["duration"] for t in result.get("tests", [])}
+
+def split_shards(node_ids: List[str], durations: Dict[str, float], n: int) -> List[List[str]]:
+    """最长处理时间优先（LPT）：耗时从大到小依次放进当前总耗时最小的分片。
+    没有历史的用例按已知耗时的中位数估计，全无历史时等权。"""
+    known = sorted(durations[t] for t in node_ids if t in durations)
+    default = known[len(known) // 2] if known else 1.0
+    weighted = sorted(((durations.get(t, default), i, t) for i, t in enumerate(node_ids)), reverse=True)
+    heap = [(0.0, k) for k in range(n)]
+    shards: List[List[Tuple[int, str]]] = [[] for _ in range(n)]
+    for w, i, t in weighted:
+        load, k = heapq.heappop(heap)
+        shards[k].append((i, t))
+        heapq.heappush(heap, (load + w, k))
+    # 分片内保持收集顺序，尽量贴近串行运行时的执行顺序
+    return [[t for _, t in sorted(s)] for s in shards if s]
+
+def merge_shard_results(results: List[Dict[str, Any]], shards: List[List[str]]) -> Dict[str, Any]:
+    parts, failures = [], []
+    for k, (res, ids) in enumerate(zip(results, shards)):
+        parts.append(f"===== shard {k + 1}/{len(shards)} ({len(ids)} tests) =====\n{res.get('output', '')}")
+        failures.extend(res.get("failures", []))
+    return {"success": all(r.get("success") for r in results), "output": "\n".join(parts),
+            "failures": failures, "tests": [t for r in results for t in r.get("tests", [])], "shards": len(shards),
+            "resources": merge_resources([r.get("resources") for r in results])}
+
+def merge_resources(items: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """并行分片的资源用量：CPU 与截断字节相加，墙钟与 RSS 取最大。"""
+    items = [r for r in items if r]
+    if not items:
+        return {}
+    return {
+        "wall_s": max(r["wall_s"] for r in items),
+        "cpu_user_s": round(sum(r["cpu_user_s"] for r in items), 3),
+        "cpu_sys_s": round(sum(r["cpu_sys_s"] for r in items), 3),
+        "max_rss_mb": max(r["max_rss_mb"] for r in items),
+        "timed_out": any(r["timed_out"] for r in items),
+        "output_truncated_bytes": sum(r["output_truncated_bytes"] for r in items),
+    }
+
+class DurationHistory:
+    """按 node id 记录的用例耗时，保存在仓库旁（<repo>.test_durations.json），不进 git。"""
+
+    def __init__(self, repo_root: str):
+        self.path = Path(f"{Path(repo_root).resolve()}.test_durations.json")
+        try:
+            self.durations: Dict[str, float] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.durations = {}
+
+    def update(self, durations: Dict[str, float]):
+        if not durations:
+            return
+        self.durations.update(durations)
+        fd, tmp = tempfile.mkstemp(prefix=".durations", dir=self.path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.durations, f)
+        os.replace(tmp, self.path)
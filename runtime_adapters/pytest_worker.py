@@ -0,0 +1,149 @@
+# runtime_adapters/pytest_worker.py
+"""常驻 pytest 进程：以脚本方式在被测仓库目录下启动，只依赖标准库与 pytest。
+
+协议（每行一个 JSON）：
+  启动完成  -> {"ready": true, "startup_s": ...}
+  <- {"args": [...], "cpu_seconds": int, "max_output_bytes": int}   一次 pytest.main(args)
+  -> {"returncode": int, "output": str, "duration_s": float, "invalidated": int, "leaked": [...], "resources": {...}}
+测试代码可能直接写 fd 1/2，协议改走复制出来的 stdout 描述符，fd 1/2 指向 /dev/null。
+"""
+import contextlib
+import importlib
+import io
+import json
+import linecache
+import os
+import resource
+import sys
+import threading
+import time
+from types import ModuleType
+
+def _repo_modules(root: str):
+    prefix = root.rstrip(os.sep) + os.sep
+    for name, mod in list(sys.modules.items()):
+        f = getattr(mod, "__file__", None)
+        if isinstance(mod, ModuleType) and f and os.path.abspath(f).startswith(prefix):
+            yield name, mod, os.path.abspath(f)
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+def _references(mod: ModuleType):
+    # 模块全局里引用到的其他模块（import x / from x import f）
+    for v in list(vars(mod).values()):
+        if isinstance(v, ModuleType):
+            yield v.__name__
+        else:
+            m = getattr(v, "__module__", None)
+            if isinstance(m, str):
+                yield m
+
+def invalidate(root: str, stamps: dict) -> int:
+    """丢掉文件有变化的仓库模块，以及（传递地）引用了它们的仓库模块；第三方依赖保持已导入。"""
+    mods = {name: mod for name, mod, _ in _repo_modules(root)}
+    stale = {name for name in mods if name in stamps and _stamp(stamps[name][0]) != stamps[name][1]}
+    if stale:
+        users = {}
+        for name, mod in mods.items():
+            for ref in _references(mod):
+                if ref in mods and ref != name:
+                    users.setdefault(ref, set()).add(name)
+        todo = list(stale)
+        while todo:
+            for u in users.get(todo.pop(), ()):
+                if u not in stale:
+                    stale.add(u)
+                    todo.append(u)
+        for name in stale:
+            sys.modules.pop(name, None)
+            stamps.pop(name, None)
+    importlib.invalidate_caches()
+    linecache.checkcache()
+    return len(stale)
+
+def record(root: str, stamps: dict):
+    for name, _, path in _repo_modules(root):
+        if name not in stamps:
+            stamps[name] = (path, _stamp(path))
+
+def _cpu_time() -> float:
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+def limit_cpu(seconds: int):
+    # RLIMIT_CPU 按进程累计：本轮上限 = 已用 + 配额；超出时 SIGXCPU 终止 worker，0 表示不限
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(_cpu_time()) + seconds + 1 if seconds else hard
+    if hard != resource.RLIM_INFINITY and soft != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def cap_output(text: str, limit: int):
+    """保留前后各一半，返回 (文本, 截掉的字符数)。"""
+    if not limit or len(text) <= limit:
+        return text, 0
+    half = limit // 2
+    dropped = len(text) - 2 * half
+    return f"{text[:half]}\n... [{dropped} chars of output truncated] ...\n{text[-half:]}", dropped
+
+def main():
+    t0 = time.perf_counter()
+    # sys.path[0] 是本脚本目录，不能让编排器的模块遮住被测仓库的同名模块
+    sys.path.pop(0)
+    if "--cwd-on-path" in sys.argv[1:]:
+        # 对应 python -m pytest：当前目录在 sys.path 上；裸 pytest 命令则没有
+        sys.path.insert(0, os.getcwd())
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    null = os.open(os.devnull, os.O_RDWR)
+    os.dup2(null, 1)
+    os.dup2(null, 2)
+    import pytest
+    root = os.getcwd()
+    stamps: dict = {}
+    # 编排器自己在 pytest 下运行时会继承该变量；它由 pytest 每轮自行设置和删除，不算残留状态
+    os.environ.pop("PYTEST_CURRENT_TEST", None)
+    env = dict(os.environ)
+    proto.write(json.dumps({"ready": True, "startup_s": round(time.perf_counter() - t0, 4)}) + "\n")
+    proto.flush()
+    for line in sys.stdin:
+        req = json.loads(line)
+        t = time.perf_counter()
+        invalidated = invalidate(root, stamps)
+        limit_cpu(int(req.get("cpu_seconds") or 0))
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+            try:
+                code = int(pytest.main(list(req["args"])))
+            except BaseException as e:   # SystemExit 等也不能让常驻进程退出
+                buf.write(f"\nworker error: {type(e).__name__}: {e}\n")
+                code = 3
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        limit_cpu(0)
+        output, dropped = cap_output(buf.getvalue(), int(req.get("max_output_bytes") or 0))
+        resources = {"cpu_user_s": round(after.ru_utime - usage.ru_utime, 3),
+                     "cpu_sys_s": round(after.ru_stime - usage.ru_stime, 3),
+                     # 常驻进程的峰值 RSS 是整个生命周期的
+                     "max_rss_mb": round(after.ru_maxrss / 1024, 1), "output_truncated_bytes": dropped}
+        record(root, stamps)
+        # 会影响下一轮的残留状态：由父进程决定是否换新进程
+        leaked = []
+        if os.getcwd() != root:
+            leaked.append(f"cwd changed to {os.getcwd()}")
+            os.chdir(root)
+        threads = [t_.name for t_ in threading.enumerate() if t_ is not threading.main_thread() and not t_.daemon]
+        if threads:
+            leaked.append(f"non-daemon threads alive: {threads}")
+        if dict(os.environ) != env:
+            leaked.append("os.environ modified")
+        proto.write(json.dumps({"returncode": code, "output": output, "duration_s": round(time.perf_counter() - t, 4),
+                                "invalidated": invalidated, "leaked": leaked, "resources": resources}) + "\n")
+        proto.flush()
+
+if __name__ == "__main__":
+    main()
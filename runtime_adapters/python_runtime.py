@@ -1,26 +1,67 @@
 # runtime_adapters/python_runtime.py
 from __future__ import annotations
-import subprocess
 import sys
 import json
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
+from runtime_adapters.pytest_support import (pytest_args, collect_command, parse_collected, extend_command, plugin_env,
+                                             strip_positional, result_durations, split_shards, merge_shard_results,
+                                             merge_impact_maps, DurationHistory)
+from runtime_adapters.junit_report import report_command
+from runtime_adapters.sandbox import Sandbox
 
 class PythonRuntime:
-    def run_tests(self, repo_root: str, run_command: str) -> Dict[str, Any]:
-        # 进入仓库目录执行pytest
+    def __init__(self, shards: int = 0, sandbox: Sandbox | None = None):
+        self.shards = shards   # >1 时按历史耗时把用例分到多个 pytest 子进程并行执行
+        self.sandbox = sandbox or Sandbox()   # 超时整组杀进程、rlimit、输出上限
+
+    def run_tests(self, repo_root: str, run_command: str, node_ids: List[str] | None = None,
+                  impact_map: str | None = None) -> Dict[str, Any]:
+        """node_ids 只跑指定用例；impact_map 给定时记录用例 -> 源文件映射到该路径（仅 pytest 命令）。"""
+        if pytest_args(run_command) is None:
+            return self._run(repo_root, run_command)
+        if node_ids:
+            # 按 node id 选择时去掉位置参数，否则位置参数下的用例照样全跑；无法安全拆分时整体运行
+            base = strip_positional(run_command)
+            run_command, node_ids = (base, node_ids) if base is not None else (run_command, None)
+        if self.shards > 1:
+            result = self._run_sharded(repo_root, run_command, node_ids, impact_map)
+            if result is not None:
+                return result
+        env = plugin_env() if impact_map else None
+        return self._run(repo_root, extend_command(run_command, node_ids, impact_map), env=env)
+
+    def _run_sharded(self, repo_root: str, run_command: str, node_ids: List[str] | None,
+                     impact_map: str | None) -> Dict[str, Any] | None:
+        # 分片用 node id 选择用例：位置参数（pytest -q tests）必须去掉，否则每个分片都会把它下面的用例全跑一遍；
+        # 收集仍用原命令，用例范围由位置参数决定
+        base = strip_positional(run_command)
+        if base is None:
+            return None
+        if node_ids is None:
+            collected = self._run(repo_root, collect_command(run_command), report=False)
+            node_ids = parse_collected(collected["output"]) if collected["success"] else []
+        if len(node_ids) < 2:
+            return None
+        history = DurationHistory(repo_root)
+        shards = split_shards(node_ids, history.durations, min(self.shards, len(node_ids)))
+        maps = [f"{impact_map}.shard{k}" for k in range(len(shards))] if impact_map else [None] * len(shards)
+        env = plugin_env() if impact_map else None
+        # 线程只负责等待子进程，真正的并行发生在各个 pytest 进程里
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            results = list(pool.map(lambda job: self._run(repo_root, extend_command(base, *job), env=env), zip(shards, maps)))
+        history.update({k: v for r in results for k, v in result_durations(r).items()})
+        if impact_map:
+            merge_impact_maps(maps, impact_map)
+        return merge_shard_results(results, shards)
+
+    def _run(self, repo_root: str, run_command: str, report: bool = True, env: Dict[str, str] | None = None) -> Dict[str, Any]:
+        # 进入仓库目录执行pytest；pytest 命令附带 JUnit XML 报告，逐用例结果从报告读取
         cwd = Path(repo_root)
-        try:
-            proc = subprocess.run(
-                run_command, shell=True, cwd=cwd,
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=600
-            )
-            success = proc.returncode == 0
-            output = proc.stdout + "\n" + proc.stderr
-            failures = self._parse_failures(output)
-            return {"success": success, "output": output, "failures": failures}
-        except subprocess.TimeoutExpired as e:
-            return {"success": False, "output": f"TIMEOUT: {e}", "failures": [{"file_path": "", "message": "timeout", "stack": ""}]}
+        command, report_path = report_command(run_command) if report else (run_command, None)
+        run = self.sandbox.run(command, str(cwd), env)
+        return self.sandbox.to_result(run, report_path, self._parse_failures, str(cwd.resolve()))
 
     def _parse_failures(self, text: str) -> List[Dict[str, str]]:
         # 简化的pytest失败解析：抓取 "E   " 段落以及 "Traceback" 文件路径
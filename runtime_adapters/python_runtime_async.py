@@ -1,27 +1,87 @@
 # runtime_adapters/python_runtime_async.py
 from __future__ import annotations
 import asyncio
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
+from runtime_adapters.pytest_support import (pytest_args, collect_command, parse_collected, extend_command, plugin_env,
+                                             strip_positional, result_durations, split_shards, merge_shard_results,
+                                             merge_impact_maps, DurationHistory)
+from runtime_adapters.junit_report import report_command
+from runtime_adapters.sandbox import Sandbox
 
 class PythonRuntimeAsync:
-    async def run_tests(self, repo_root: str, run_command: str) -> Dict[str, Any]:
-        try:
-            proc = await asyncio.create_subprocess_shell(
-                run_command,
-                cwd=Path(repo_root),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            out_bytes, err_bytes = await proc.communicate()
-            out = (out_bytes or b"").decode("utf-8", errors="ignore")
-            err = (err_bytes or b"").decode("utf-8", errors="ignore")
-            output = out + "\n" + err
-            success = proc.returncode == 0
-            failures = self._parse_failures(output)
-            return {"success": success, "output": output, "failures": failures}
-        except asyncio.TimeoutError:
-            return {"success": False, "output": "TIMEOUT", "failures": [{"file_path":"", "message":"timeout","stack":""}]}
+    def __init__(self, shards: int = 0, sandbox: Sandbox | None = None):
+        self.shards = shards   # >1 时按历史耗时把用例分到多个 pytest 子进程并行执行
+        self.sandbox = sandbox or Sandbox()   # 超时整组杀进程、rlimit、输出上限
+        self._runs: List[Tuple[str, float]] = []   # (runner, 耗时秒)
+
+    async def run_tests(self, repo_root: str, run_command: str, node_ids: List[str] | None = None,
+                        impact_map: str | None = None) -> Dict[str, Any]:
+        """node_ids 只跑指定用例；impact_map 给定时记录用例 -> 源文件映射到该路径（仅 pytest 命令）。"""
+        t0 = time.perf_counter()
+        if pytest_args(run_command) is None:
+            return self._record(await self._run_cold(repo_root, run_command), "cold", t0)
+        if node_ids:
+            # 按 node id 选择时去掉位置参数，否则位置参数下的用例照样全跑；无法安全拆分时整体运行
+            base = strip_positional(run_command)
+            run_command, node_ids = (base, node_ids) if base is not None else (run_command, None)
+        if self.shards > 1:
+            result = await self._run_sharded(repo_root, run_command, node_ids, impact_map)
+            if result is not None:
+                return self._record(result, "sharded", t0)
+        env = plugin_env() if impact_map else None
+        result = await self._run_cold(repo_root, extend_command(run_command, node_ids, impact_map), env=env)
+        return self._record(result, "cold", t0)
+
+    async def _run_sharded(self, repo_root: str, run_command: str, node_ids: List[str] | None,
+                           impact_map: str | None) -> Dict[str, Any] | None:
+        # 分片用 node id 选择用例：位置参数（pytest -q tests）必须去掉，否则每个分片都会把它下面的用例全跑一遍；
+        # 收集仍用原命令，用例范围由位置参数决定
+        base = strip_positional(run_command)
+        if base is None:
+            return None
+        if node_ids is None:
+            collected = await self._run_cold(repo_root, collect_command(run_command), report=False)
+            node_ids = parse_collected(collected["output"]) if collected["success"] else []
+        if len(node_ids) < 2:
+            # 收集失败（如导入错误）或用例太少：交给普通运行报告
+            return None
+        history = DurationHistory(repo_root)
+        shards = split_shards(node_ids, history.durations, min(self.shards, len(node_ids)))
+        maps = [f"{impact_map}.shard{k}" for k in range(len(shards))] if impact_map else [None] * len(shards)
+        env = plugin_env() if impact_map else None
+        results = await asyncio.gather(*[self._run_cold(repo_root, extend_command(base, ids, m), env=env)
+                                          for ids, m in zip(shards, maps)])
+        history.update({k: v for r in results for k, v in result_durations(r).items()})
+        if impact_map:
+            merge_impact_maps(maps, impact_map)
+        return merge_shard_results(results, shards)
+
+    def _record(self, result: Dict[str, Any], runner: str, t0: float) -> Dict[str, Any]:
+        dt = time.perf_counter() - t0
+        self._runs.append((runner, dt))
+        result["runner"] = runner
+        result["duration_s"] = round(dt, 3)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """按执行方式（cold/sharded/warm）汇总每轮测试耗时。"""
+        stats: Dict[str, Any] = {}
+        for runner in sorted({r for r, _ in self._runs}):
+            ds = [d for r, d in self._runs if r == runner]
+            stats[runner] = {"runs": len(ds), "avg_s": round(sum(ds) / len(ds), 3), "max_s": round(max(ds), 3)}
+        return stats
+
+    async def close(self):
+        pass
+
+    async def _run_cold(self, repo_root: str, run_command: str, report: bool = True, env: Dict[str, str] | None = None) -> Dict[str, Any]:
+        # pytest 命令附带 JUnit XML 报告，逐用例结果从报告读取。
+        # 沙箱在线程里等待子进程：需要 wait4 拿到资源用量，事件循环的子进程回收拿不到
+        command, report_path = report_command(run_command) if report else (run_command, None)
+        run = await asyncio.to_thread(self.sandbox.run, command, str(Path(repo_root)), env)
+        return self.sandbox.to_result(run, report_path, self._parse_failures, str(Path(repo_root).resolve()))
 
     def _parse_failures(self, text: str) -> List[Dict[str, str]]:
         failures = []
@@ -0,0 +1,147 @@
+# runtime_adapters/python_runtime_warm.py
+from __future__ import annotations
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from runtime_adapters.python_runtime_async import PythonRuntimeAsync
+from runtime_adapters.pytest_support import pytest_args, split_positional, impact_args, plugin_env
+from runtime_adapters.junit_report import new_report_path, junit_args, ingest
+from runtime_adapters.sandbox import Sandbox
+from utils.logger import get_logger
+
+WORKER_SCRIPT = str(Path(__file__).with_name("pytest_worker.py"))
+LINE_LIMIT = 64 * 1024 * 1024
+
+class _WorkerGone(Exception):
+    pass
+
+class _Worker:
+    def __init__(self, proc: asyncio.subprocess.Process, cwd_on_path: bool):
+        self.proc = proc
+        self.cwd_on_path = cwd_on_path
+        self.runs = 0
+
+    async def request(self, payload: dict, timeout: Optional[float]) -> dict:
+        self.proc.stdin.write((json.dumps(payload) + "\n").encode("utf-8"))
+        await self.proc.stdin.drain()
+        line = await asyncio.wait_for(self.proc.stdout.readline(), timeout)
+        if not line:
+            raise _WorkerGone(f"worker exited with code {await self.proc.wait()}")
+        return json.loads(line)
+
+    async def kill(self):
+        # worker 是进程组组长：测试里起的子进程一起杀掉
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        await self.proc.wait()
+
+class WarmPythonRuntimeAsync(PythonRuntimeAsync):
+    """每个仓库一个常驻 pytest 进程：解释器启动、插件发现、第三方依赖导入只付一次。
+
+    每轮之前 worker 只丢弃文件有变化的仓库模块（及引用它们的模块）。worker 崩溃、
+    握手失败时本轮退回冷启动子进程；跑完发现残留状态（线程、cwd、环境变量）或达到
+    max_runs 时换新进程。run_command 不是简单的 pytest 调用时始终走冷启动。
+    沙箱限制同样适用：worker 自成进程组，超时整组杀掉；内存/文件数 rlimit 在启动时设置，
+    CPU 上限由 worker 每轮按已用量重设，输出在 worker 内截断。
+    """
+
+    def __init__(self, max_runs: int = 20, sandbox: Sandbox | None = None):
+        super().__init__(sandbox=sandbox)
+        self.max_runs = max_runs
+        self.timeout = self.sandbox.timeout
+        self.log = get_logger("runtime")
+        self._workers: Dict[str, _Worker] = {}
+        self._counters = {"worker_starts": 0, "fallbacks": 0, "recycled": 0, "invalidated_modules": 0}
+        self._startup: List[float] = []
+
+    async def run_tests(self, repo_root: str, run_command: str, node_ids: List[str] | None = None,
+                        impact_map: str | None = None) -> Dict[str, Any]:
+        parsed = pytest_args(run_command)
+        if parsed is None:
+            return await super().run_tests(repo_root, run_command)
+        args, cwd_on_path = parsed
+        split = split_positional(args) if node_ids else None
+        if split is None:
+            node_ids = None
+        else:
+            args = split[0]   # 与冷启动相同：按 node id 选择时去掉位置参数
+        args = args + impact_args(impact_map) + list(node_ids or [])
+        key = str(Path(repo_root).resolve())
+        t0 = time.perf_counter()
+        report = new_report_path()
+        try:
+            worker = await self._worker(key, cwd_on_path)
+            resp = await worker.request({"args": args + junit_args(report), "cpu_seconds": self.sandbox.cpu_seconds,
+                                         "max_output_bytes": self.sandbox.max_output_bytes}, self.timeout)
+        except asyncio.TimeoutError:
+            os.unlink(report)
+            await self._drop(key)
+            # 超时不退回冷启动：同样的测试冷跑也会挂住
+            return self._record(self._killed(f"TIMEOUT: killed after {self.timeout}s", "timeout", t0), "warm", t0)
+        except (_WorkerGone, OSError, ValueError) as e:
+            os.unlink(report)
+            worker = self._workers.get(key)
+            await self._drop(key)
+            if worker and worker.proc.returncode == -signal.SIGXCPU:
+                # 超出 CPU 上限同样不退回冷启动
+                return self._record(self._killed(f"CPU limit of {self.sandbox.cpu_seconds}s exceeded", "cpu limit", t0), "warm", t0)
+            self._counters["fallbacks"] += 1
+            self.log.warning(f"warm pytest worker failed ({e}); falling back to a cold run")
+            return await super().run_tests(repo_root, run_command, node_ids, impact_map)
+        worker.runs += 1
+        self._counters["invalidated_modules"] += resp.get("invalidated", 0)
+        if resp.get("leaked") or worker.runs >= self.max_runs:
+            if resp.get("leaked"):
+                self.log.warning(f"warm pytest worker leaked state: {resp['leaked']}; restarting it")
+            await self._drop(key)
+            self._counters["recycled"] += 1
+        result = ingest({"success": resp.get("returncode") == 0, "output": resp.get("output", "")}, report, self._parse_failures, key)
+        result["resources"] = dict(resp.get("resources", {}), wall_s=round(time.perf_counter() - t0, 3), timed_out=False)
+        return self._record(result, "warm", t0)
+
+    @staticmethod
+    def _killed(output: str, message: str, t0: float) -> Dict[str, Any]:
+        return {"success": False, "output": output, "failures": [{"file_path": "", "message": message, "stack": ""}],
+                "resources": {"wall_s": round(time.perf_counter() - t0, 3), "timed_out": message == "timeout"}}
+
+    async def _worker(self, key: str, cwd_on_path: bool) -> _Worker:
+        worker = self._workers.get(key)
+        if worker and (worker.proc.returncode is not None or worker.cwd_on_path != cwd_on_path):
+            await self._drop(key)
+            worker = None
+        if worker is None:
+            cmd = [sys.executable, WORKER_SCRIPT] + (["--cwd-on-path"] if cwd_on_path else [])
+            proc = await asyncio.create_subprocess_exec(
+                *self.sandbox.limited(cmd, cpu=False), cwd=key, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL, limit=LINE_LIMIT, env=plugin_env(), start_new_session=True)
+            worker = _Worker(proc, cwd_on_path)
+            self._workers[key] = worker
+            ready = await asyncio.wait_for(proc.stdout.readline(), self.timeout)
+            if not ready:
+                raise _WorkerGone("worker failed to start")
+            self._counters["worker_starts"] += 1
+            self._startup.append(json.loads(ready).get("startup_s", 0.0))
+        return worker
+
+    async def _drop(self, key: str):
+        worker = self._workers.pop(key, None)
+        if worker:
+            await worker.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update(self._counters)
+        if self._startup:
+            stats["worker_startup_s_avg"] = round(sum(self._startup) / len(self._startup), 3)
+        return stats
+
+    async def close(self):
+        for key in list(self._workers):
+            await self._drop(key)
@@ -0,0 +1,166 @@
+# runtime_adapters/sandbox.py
+from __future__ import annotations
+import collections
+import os
+import resource
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from runtime_adapters.junit_report import ingest
+
+# 在一个短命解释器里设置 rlimit 后 exec 目标命令。不用 preexec_fn：分片并发时 run() 在多个线程里调用，
+# 多线程进程里 fork 之后、exec 之前执行 Python 代码可能死锁
+_EXEC_WITH_LIMITS = """import os, resource, sys
+cpu, mem, nofile = (int(x) for x in sys.argv[1:4])
+if cpu:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+if mem:
+    resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+if nofile:
+    resource.setrlimit(resource.RLIMIT_NOFILE, (nofile, nofile))
+os.execvp(sys.argv[4], sys.argv[4:])
+"""
+
+# 超过 RLIMIT_AS 时除了 MemoryError，C 扩展/解释器也可能直接崩溃或被杀
+_MEMORY_SIGNALS = (signal.SIGKILL, signal.SIGSEGV, signal.SIGABRT, signal.SIGBUS)
+
+def _signal_of(returncode: int) -> Optional[int]:
+    # 直接 exec 的命令返回负的信号值；经过 shell 时 shell 报告 128+信号
+    if returncode < 0:
+        return -returncode
+    if 128 < returncode < 128 + signal.NSIG:
+        return returncode - 128
+    return None
+
+class _CappedReader(threading.Thread):
+    """读取一个管道，最多保留 cap 字节：前一半原样保留，后一半保留最新输出（pytest 的汇总在末尾）。"""
+
+    def __init__(self, stream, cap: int):
+        super().__init__(daemon=True)
+        self.fd = stream.fileno()
+        self.half = max(cap // 2, 1)
+        self.head = bytearray()
+        self.tail: "collections.deque[bytes]" = collections.deque()
+        self.tail_len = 0
+        self.dropped = 0
+        self.start()
+
+    def run(self):
+        while True:
+            try:
+                chunk = os.read(self.fd, 65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            if len(self.head) < self.half:
+                take = self.half - len(self.head)
+                self.head += chunk[:take]
+                chunk = chunk[take:]
+            if chunk:
+                self.tail.append(chunk)
+                self.tail_len += len(chunk)
+                # 从最旧的块开始丢，最后一块按字节切，尾部始终不超过 half
+                while self.tail_len > self.half:
+                    excess = self.tail_len - self.half
+                    first = self.tail[0]
+                    if len(first) <= excess:
+                        self.tail.popleft()
+                        cut = len(first)
+                    else:
+                        self.tail[0] = first[excess:]
+                        cut = excess
+                    self.dropped += cut
+                    self.tail_len -= cut
+
+    def text(self) -> str:
+        middle = f"\n... [{self.dropped} bytes of output truncated] ...\n".encode() if self.dropped else b""
+        return (bytes(self.head) + middle + b"".join(self.tail)).decode("utf-8", errors="ignore")
+
+class Sandbox:
+    """测试子进程的执行沙箱：独立进程组 + 墙钟截止时间 + rlimit + 输出上限。
+
+    截止时间到了整组 SIGKILL；正常退出后也对进程组补一次 SIGKILL，清理测试留下的后台孙进程。
+    CPU（RLIMIT_CPU）、内存（RLIMIT_AS）、打开文件数（RLIMIT_NOFILE）由 exec 包装器设置，0 表示不限。
+    资源用量取自 wait4 返回的 rusage（含 shell 已回收的 pytest 进程）。
+    """
+
+    def __init__(self, timeout: Optional[float] = 600.0, cpu_seconds: int = 0, memory_mb: int = 0,
+                 open_files: int = 0, max_output_bytes: int = 8 * 1024 * 1024):
+        self.timeout = timeout or None
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.open_files = open_files
+        self.max_output_bytes = max_output_bytes
+
+    @property
+    def has_limits(self) -> bool:
+        return bool(self.cpu_seconds or self.memory_mb or self.open_files)
+
+    def limited(self, argv: List[str], cpu: bool = True) -> List[str]:
+        """在 argv 前加上设置 rlimit 的 exec 包装器；没有限制时原样返回。
+        常驻进程传 cpu=False：RLIMIT_CPU 是整个进程生命周期的累计值，由进程自己按轮设置。"""
+        if not self.has_limits:
+            return list(argv)
+        limits = [self.cpu_seconds if cpu else 0, self.memory_mb * 1024 * 1024, self.open_files]
+        return [sys.executable, "-c", _EXEC_WITH_LIMITS] + [str(x) for x in limits] + list(argv)
+
+    def run(self, command: str, cwd: str, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        # 独立会话 = 独立进程组，超时与收尾时整组 SIGKILL
+        proc = subprocess.Popen(self.limited(["/bin/sh", "-c", command]), cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        out = _CappedReader(proc.stdout, self.max_output_bytes)
+        err = _CappedReader(proc.stderr, self.max_output_bytes)
+        waited: List[Any] = []
+        waiter = threading.Thread(target=lambda: waited.append(os.wait4(proc.pid, 0)), daemon=True)
+        waiter.start()
+        waiter.join(self.timeout)
+        timed_out = waiter.is_alive()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        waiter.join()
+        # 自己 setsid 逃出进程组的孙进程可能还握着管道：最多再等几秒就放弃读取
+        out.join(5.0)
+        err.join(5.0)
+        proc.stdout.close()
+        proc.stderr.close()
+        _, status, usage = waited[0]
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return {
+            "returncode": proc.returncode,
+            "stdout": out.text(),
+            "stderr": err.text(),
+            "timed_out": timed_out,
+            "resources": {
+                "wall_s": round(time.monotonic() - t0, 3),
+                "cpu_user_s": round(usage.ru_utime, 3),
+                "cpu_sys_s": round(usage.ru_stime, 3),
+                "max_rss_mb": round(usage.ru_maxrss / 1024, 1),
+                "timed_out": timed_out,
+                "output_truncated_bytes": out.dropped + err.dropped,
+            },
+        }
+
+    def to_result(self, run: Dict[str, Any], report: Optional[str], fallback: Callable[[str], List[Dict[str, Any]]],
+                  root: str = "") -> Dict[str, Any]:
+        """把 run() 的输出转成运行时适配器的 {"success", "output", "failures"} 结果，附带 resources。"""
+        output = run["stdout"] + "\n" + run["stderr"]
+        result = ingest({"success": run["returncode"] == 0 and not run["timed_out"], "output": output}, report, fallback, root)
+        if run["timed_out"]:
+            result["output"] += f"\nTIMEOUT: killed after {self.timeout}s"
+            result["failures"].append({"file_path": "", "message": "timeout", "stack": ""})
+        elif self.cpu_seconds and _signal_of(run["returncode"]) == signal.SIGXCPU:
+            result["output"] += f"\nCPU limit of {self.cpu_seconds}s exceeded"
+            result["failures"].append({"file_path": "", "message": "cpu limit", "stack": ""})
+        elif self.memory_mb and run["returncode"] != 0 and (
+                "MemoryError" in output or _signal_of(run["returncode"]) in _MEMORY_SIGNALS):
+            result["output"] += f"\nmemory limit of {self.memory_mb}MB exceeded"
+            result["failures"].append({"file_path": "", "message": "memory limit", "stack": ""})
+        result["resources"] = run["resources"]
+        return result
@@ -0,0 +1,91 @@
+# scripts/bench_repo_commits.py
+"""对比 RepoManager 各提交路径的耗时：索引逐文件提交（现有路径）、单写者批量提交、git 对象直写。
+
+用法：python -m scripts.bench_repo_commits [--sizes 10 100 1000] [--fix-files 10]
+每个规模模拟一次：初始化结构 -> 首轮全部文件实现 -> 一轮修复（少量文件）-> QA commit_all -> 落盘。
+"""
+from __future__ import annotations
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+from core.models import RepoNode
+from core.repo_manager import RepoManager
+
+MODES = {
+    "index": dict(commit_window=None, object_store=False),
+    "index+batch": dict(commit_window=0.05, object_store=False),
+    "objects": dict(commit_window=None, object_store=True),
+    "objects+batch": dict(commit_window=0.05, object_store=True),
+}
+
+def _layout(n: int) -> Dict[str, List[str]]:
+    # 每个包 20 个模块，贴近 SDS 里按包划分的仓库结构
+    pkgs: Dict[str, List[str]] = {}
+    for i in range(n):
+        pkgs.setdefault(f"pkg_{i // 20}", []).append(f"mod_{i}.py")
+    return pkgs
+
+def _source(i: int, rev: int) -> str:
+    return "\n".join([f"def f_{i}_{k}(x):\n    return x + {k + rev}\n" for k in range(20)])
+
+def _ur(path: str, change: str) -> dict:
+    return {"file_path": path, "change_type": change, "rationale": "bench", "related_files_brief_used": []}
+
+def bench_one(n: int, mode: str, fix_files: int) -> Dict[str, float]:
+    pkgs = _layout(n)
+    nodes = [RepoNode(path=p, type="dir", children=[RepoNode(path=f, type="file") for f in fs]) for p, fs in pkgs.items()]
+    paths = [f"{p}/{f}" for p, fs in pkgs.items() for f in fs]
+    tmp = tempfile.mkdtemp(prefix=f"bench-{mode}-{n}-")
+    try:
+        timings: Dict[str, float] = {}
+        t = time.perf_counter()
+        repo = RepoManager(tmp, allowed_files_all=set(paths), **MODES[mode])
+        repo.init_structure(nodes)
+        timings["init"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for i, p in enumerate(paths):
+            repo.write_file(p, _source(i, 0))
+            repo.commit_file(p, _ur(p, "modify"), agent_id="Dev-1")
+        repo.flush()
+        timings["initial_round"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for i, p in enumerate(paths[:fix_files]):
+            repo.write_file(p, _source(i, 1))
+            repo.commit_file(p, _ur(p, "modify"), agent_id="Dev-1")
+        repo.flush()
+        timings["fix_round"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        repo.commit_all("test: bench commit_all")
+        timings["commit_all"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        repo.materialize()
+        timings["materialize"] = time.perf_counter() - t
+        repo.close()
+        timings["per_file_ms"] = timings["initial_round"] / n * 1000
+        return timings
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--fix-files", type=int, default=10)
+    ap.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = ap.parse_args()
+    cols = ["init", "initial_round", "fix_round", "commit_all", "materialize", "per_file_ms"]
+    print(f"{'files':>6} {'mode':<14} " + " ".join(f"{c:>14}" for c in cols))
+    for n in args.sizes:
+        for mode in args.modes:
+            r = bench_one(n, mode, min(args.fix_files, n))
+            print(f"{n:>6} {mode:<14} " + " ".join(
+                f"{r[c]:>12.2f}ms" if c == "per_file_ms" else f"{r[c] * 1000:>12.1f}ms" for c in cols))
+
+if __name__ == "__main__":
+    main()
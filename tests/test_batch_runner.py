@@ -0,0 +1,49 @@
+# tests/test_batch_runner.py
+import asyncio
+import io
+import json
+import os
+import multiprocessing
+import pytest
+from app import batch_runner
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="stubs are inherited by forked workers only")
+
+def _init_stub(n_workers, concurrency, llm_overrides=None):
+    batch_runner._LOOP = asyncio.new_event_loop()
+    asyncio.set_event_loop(batch_runner._LOOP)
+    batch_runner._CONCURRENCY = max(1, concurrency)
+
+async def _run_stub(job, sem):
+    async with sem:
+        if job["question"] == "crash":
+            os._exit(1)
+        await asyncio.sleep(float(job["question"]))
+        return {"id": job["id"], "pid": os.getpid(), "status": "done"}
+
+@pytest.fixture
+def stubbed(monkeypatch):
+    monkeypatch.setattr(batch_runner, "_init_worker", _init_stub)
+    monkeypatch.setattr(batch_runner, "_run_one", _run_stub)
+
+def _lines(out):
+    return [json.loads(ln) for ln in out.getvalue().splitlines()]
+
+def test_results_stream_per_job(stubbed):
+    # 一个慢任务不拖住同一进程里其他任务的结果
+    jobs = [{"id": "slow", "question": "1.5"}] + [{"id": f"fast{i}", "question": "0.05"} for i in range(5)]
+    out = io.StringIO()
+    summary = batch_runner.run_batch(jobs, out, workers=1, concurrency=2)
+    assert summary == {"total": 6, "done": 6, "failed": 0}
+    assert [r["id"] for r in _lines(out)][-1] == "slow"
+    assert sorted(r["id"] for r in _lines(out)) == sorted(j["id"] for j in jobs)
+
+def test_crashing_job_is_isolated(stubbed):
+    jobs = [{"id": "bad", "question": "crash"}] + [{"id": f"ok{i}", "question": "0.05"} for i in range(4)]
+    out = io.StringIO()
+    summary = batch_runner.run_batch(jobs, out, workers=2, concurrency=2)
+    by_id = {r["id"]: r for r in _lines(out)}
+    assert summary == {"total": 5, "done": 4, "failed": 1}
+    assert by_id["bad"]["error"] == "worker process crashed"
+    assert all(by_id[f"ok{i}"]["status"] == "done" for i in range(4))
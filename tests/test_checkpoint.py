@@ -0,0 +1,27 @@
+# tests/test_checkpoint.py
+import json
+import pytest
+from orchestrator.checkpoint import WorkflowCheckpoint, checkpoint_path
+
+def test_checkpoint_lives_beside_repo_and_round_trips(tmp_path):
+    repo = tmp_path / "run1"
+    repo.mkdir()
+    ck = WorkflowCheckpoint(str(repo))
+    ck.save(question="q", sds_list=[{"id": "s1"}])
+    ck.save(waves_done=2)
+    path = checkpoint_path(str(repo))
+    # 不在仓库里面，commit_all 不会把它提交进去
+    assert path.parent == tmp_path and not list(repo.iterdir())
+    assert not path.with_name(path.name + ".tmp").exists()
+
+    loaded = WorkflowCheckpoint.load(str(repo))
+    assert loaded.get("question") == "q" and loaded.get("waves_done") == 2
+    assert loaded.has("sds_list") and not loaded.has("decision")
+    assert json.loads(path.read_text(encoding="utf-8"))["sds_list"] == [{"id": "s1"}]
+
+def test_disabled_checkpoint_keeps_state_in_memory(tmp_path):
+    ck = WorkflowCheckpoint(str(tmp_path / "run2"), enabled=False)
+    ck.save(stage="sds")
+    assert ck.get("stage") == "sds"
+    with pytest.raises(FileNotFoundError):
+        WorkflowCheckpoint.load(str(tmp_path / "run2"))
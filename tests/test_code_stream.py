@@ -0,0 +1,65 @@
+# tests/test_code_stream.py
+from core.code_stream import StreamingCodeChecker, StreamStats
+
+VALID = '''import os
+
+def f(x):
+    if x:
+        return 1
+    else:
+        return 2
+
+@staticmethod
+def g():
+    try:
+        pass
+    except Exception:
+        pass
+
+class C:
+    """doc
+    string"""
+    def m(self):
+        return (1,
+    2)
+'''
+
+def _feed(text, size):
+    checker = StreamingCodeChecker()
+    for i in range(0, len(text), size):
+        err = checker.feed(text[i:i + size])
+        if err:
+            return err, i
+    return checker.finish(), len(text)
+
+def test_valid_code_never_aborts_at_any_chunk_size():
+    for size in (1, 2, 3, 7, 16, 1000):
+        assert _feed(VALID, size) == (None, len(VALID))
+
+def test_markdown_fence_aborts_immediately():
+    checker = StreamingCodeChecker()
+    assert checker.feed("`") is None
+    assert checker.feed("``python\n") == "markdown fence"
+
+def test_syntax_error_aborts_before_end_of_stream():
+    bad = "def f():\n    return 1\n\ndef g(:\n    pass\n\n" + "x = 1\n" * 200
+    err, pos = _feed(bad, 4)
+    assert err is not None and err.startswith("line 4:")
+    assert pos < len(bad) // 4
+
+def test_incomplete_code_only_reported_at_finish():
+    text = "def f():\n    return [1,\n"
+    checker = StreamingCodeChecker()
+    assert checker.feed(text) is None
+    assert checker.finish() is not None
+
+def test_empty_output():
+    assert StreamingCodeChecker().finish() == "empty output"
+
+def test_stream_stats():
+    st = StreamStats()
+    st.record(0.5, 100)
+    st.record(1.5, 40, "line 3: invalid syntax")
+    s = st.stats()
+    assert s["streams"] == 2 and s["aborts"] == 1 and s["chars_before_abort"] == 40
+    assert s["abort_reasons"] == {"invalid syntax": 1} and s["ttft_avg_s"] == 1.0 and s["ttft_max_s"] == 1.5
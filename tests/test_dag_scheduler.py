@@ -0,0 +1,47 @@
+# tests/test_dag_scheduler.py
+from orchestrator.dag_scheduler import plan_waves
+
+def test_layers_follow_dependencies():
+    plan = plan_waves({
+        "app.py": ["service.py", "models.py"],
+        "service.py": ["models.py", "utils.py"],
+        "models.py": [],
+        "utils.py": [],
+    })
+    assert plan.waves == [["models.py", "utils.py"], ["service.py"], ["app.py"]]
+    assert plan.broken_edges == []
+
+def test_external_and_self_dependencies_are_ignored():
+    plan = plan_waves({"a.py": ["a.py", "requests", "b.py"], "b.py": ["os"]})
+    assert plan.waves == [["b.py"], ["a.py"]]
+
+def test_cycle_is_broken_deterministically():
+    deps = {"a.py": ["b.py"], "b.py": ["c.py"], "c.py": ["a.py"], "d.py": ["a.py"]}
+    plan = plan_waves(deps)
+    # 环中入度相同，选字典序最小的 a.py 放行并记录被删掉的边
+    assert plan.broken_edges == [("a.py", "b.py")]
+    assert plan.waves == [["a.py"], ["c.py", "d.py"], ["b.py"]]
+    assert plan_waves(deps) == plan
+
+def test_every_file_scheduled_once_and_after_kept_dependencies():
+    deps = {f"f{i}.py": [f"f{(i * 7 + 3) % 12}.py", f"f{(i * 5 + 1) % 12}.py"] for i in range(12)}
+    plan = plan_waves(deps)
+    order = {f: k for k, wave in enumerate(plan.waves) for f in wave}
+    assert sorted(order) == sorted(deps)
+    broken = set(plan.broken_edges)
+    for f, ds in deps.items():
+        for d in ds:
+            if d != f and (f, d) not in broken:
+                assert order[d] < order[f]
+
+def test_node_waiting_on_cycle_keeps_its_edge():
+    # aa.py 只是依赖环上的 b.py，本身不在环里：不能被当作破环点提前放行
+    plan = plan_waves({"aa.py": ["b.py"], "b.py": ["c.py"], "c.py": ["b.py"]})
+    assert plan.broken_edges == [("b.py", "c.py")]
+    assert plan.waves == [["b.py"], ["aa.py", "c.py"]]
+
+def test_only_sink_cycle_is_broken_first():
+    # 环 x<->y 依赖环 p<->q：先破汇点环 p/q，x/y 的环之后再破
+    plan = plan_waves({"x.py": ["y.py", "p.py"], "y.py": ["x.py"], "p.py": ["q.py"], "q.py": ["p.py"]})
+    assert plan.broken_edges == [("p.py", "q.py"), ("x.py", "y.py")]
+    assert plan.waves == [["p.py"], ["q.py"], ["x.py"], ["y.py"]]
@@ -0,0 +1,46 @@
+# tests/test_dev_scheduler.py
+import asyncio
+from orchestrator.dev_scheduler import SHARED_TOPIC, DevTaskRouter
+from utils.event_bus_async import AsyncEventBus
+
+OWNERS = {"a.py": "dev1", "b.py": "dev2"}
+
+def test_exclusive_mode_routes_to_owner_queue():
+    async def main():
+        bus = AsyncEventBus()
+        router = DevTaskRouter(bus, OWNERS)
+        await router.submit({"file_path": "b.py"})
+        return await bus.take("dev_task:dev2", timeout=1)
+    assert asyncio.run(main()) == {"file_path": "b.py", "owner": "dev2"}
+
+def test_shared_mode_lets_any_idle_worker_take_tasks():
+    async def main():
+        bus = AsyncEventBus()
+        router = DevTaskRouter(bus, OWNERS, shared=True)
+        assert router.topic_for("dev1") == router.topic_for("dev2") == SHARED_TOPIC
+        for f in ("a.py", "b.py", "a.py"):
+            await router.submit({"file_path": f})
+        # dev1 一个人也能把 dev2 的文件领走，owner 字段保留原归属
+        got = [await bus.take(router.topic_for("dev1"), timeout=1) for _ in range(3)]
+        await router.shutdown(["dev1", "dev2"])
+        exits = [await bus.take(SHARED_TOPIC, timeout=1) for _ in range(2)]
+        return got, exits
+    got, exits = asyncio.run(main())
+    assert [t["owner"] for t in got] == ["dev1", "dev2", "dev1"]
+    assert exits == [{"type": "exit"}] * 2
+
+def test_same_file_lock_serializes_edits():
+    async def main():
+        router = DevTaskRouter(AsyncEventBus(), OWNERS, shared=True)
+        assert router.lock_for("a.py") is router.lock_for("a.py")
+        assert router.lock_for("a.py") is not router.lock_for("b.py")
+        log = []
+
+        async def edit(tag):
+            async with router.lock_for("a.py"):
+                log.append(f"{tag}+")
+                await asyncio.sleep(0.01)
+                log.append(f"{tag}-")
+        await asyncio.gather(edit("x"), edit("y"))
+        return log
+    assert asyncio.run(main()) == ["x+", "x-", "y+", "y-"]
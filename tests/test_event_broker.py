@@ -0,0 +1,81 @@
+# tests/test_event_broker.py
+import asyncio
+import pytest
+from utils.event_bus_remote import EventBroker, RemoteEventBus, parse_address
+
+def test_parse_address():
+    assert parse_address("tcp://10.0.0.1:9000") == ("tcp", ("10.0.0.1", 9000))
+    assert parse_address(":9000") == ("tcp", ("127.0.0.1", 9000))
+    assert parse_address("unix:///tmp/bus.sock") == ("unix", "/tmp/bus.sock")
+
+def test_emit_take_ack_roundtrip():
+    async def main():
+        broker = await EventBroker().start()
+        bus = await RemoteEventBus.connect(broker.address)
+        try:
+            await bus.emit("fix", {"file": "a.py", "trace": "x" * 100_000})
+            got = await bus.take("fix", timeout=1)
+            await bus.ack("fix")
+            with pytest.raises(asyncio.TimeoutError):
+                await bus.take("fix", timeout=0.05)
+            return got, dict(broker.stats)
+        finally:
+            await bus.close()
+            await broker.close()
+    got, stats = asyncio.run(main())
+    assert got["file"] == "a.py" and len(got["trace"]) == 100_000
+    assert stats["emitted"] == 1 and stats["delivered"] == 1 and stats["acked"] == 1
+    assert stats["redelivered"] == 0
+
+def test_unacked_message_redelivered_when_consumer_drops():
+    async def main():
+        broker = await EventBroker().start()
+        producer = await RemoteEventBus.connect(broker.address)
+        crashed = await RemoteEventBus.connect(broker.address)
+        survivor = await RemoteEventBus.connect(broker.address)
+        try:
+            await producer.emit("fix", "task-1")
+            assert await crashed.take("fix", timeout=1) == "task-1"
+            # 未 ack 就断开：消息回到队列，由其他消费者领取
+            await crashed.close()
+            got = await survivor.take("fix", timeout=2)
+            await survivor.ack("fix")
+            return got, dict(broker.stats)
+        finally:
+            await producer.close()
+            await survivor.close()
+            await broker.close()
+    got, stats = asyncio.run(main())
+    assert got == "task-1"
+    assert stats["delivered"] == 2 and stats["redelivered"] == 1 and stats["acked"] == 1
+
+def test_pending_take_cancelled_on_disconnect_does_not_lose_messages():
+    async def main():
+        broker = await EventBroker().start()
+        waiting = await RemoteEventBus.connect(broker.address)
+        other = await RemoteEventBus.connect(broker.address)
+        try:
+            t = asyncio.create_task(waiting.take("fix", timeout=5))
+            await asyncio.sleep(0.05)
+            await waiting.close()
+            with pytest.raises(ConnectionError):
+                await t
+            await other.emit("fix", "task-2")
+            return await other.take("fix", timeout=1)
+        finally:
+            await other.close()
+            await broker.close()
+    assert asyncio.run(main()) == "task-2"
+
+def test_wait_for_count_over_socket():
+    async def main():
+        broker = await EventBroker().start()
+        bus = await RemoteEventBus.connect(broker.address)
+        try:
+            for i in range(3):
+                await bus.emit("done", i)
+            return await bus.wait_for_count("done", expected=3, timeout=1)
+        finally:
+            await bus.close()
+            await broker.close()
+    assert asyncio.run(main()) is True
@@ -0,0 +1,59 @@
+# tests/test_git_objects.py
+import subprocess
+from git import Repo
+from core.git_objects import GitObjectTree
+
+def _repo(path):
+    repo = Repo.init(path)
+    with repo.config_writer() as cw:
+        cw.set_value("user", "name", "tester")
+        cw.set_value("user", "email", "tester@example.com")
+    return repo
+
+def _git(path, *args):
+    return subprocess.run(["git", *args], cwd=path, check=True, capture_output=True, text=True).stdout
+
+def _stage(tree, rel_path, text):
+    tree.stage(rel_path, tree.write_blob(text.encode("utf-8")))
+
+def test_commit_matches_git_and_passes_fsck(tmp_path):
+    repo = _repo(tmp_path)
+    tree = GitObjectTree(repo)
+    files = {"README.md": "hi\n", "src/app.py": "x = 1\n", "src/pkg/mod.py": "y = 2\n", "src.py": "z\n"}
+    for rel, text in files.items():
+        _stage(tree, rel, text)
+    sha = tree.commit("init")
+    assert sha and _git(tmp_path, "rev-parse", "HEAD").strip() == sha
+    _git(tmp_path, "fsck", "--strict")
+    # 同样的内容经 git 自己的索引生成树，哈希必须一致（校验条目排序）
+    for rel, text in files.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(text)
+    _git(tmp_path, "add", "-A")
+    assert _git(tmp_path, "write-tree").strip() == _git(tmp_path, "rev-parse", "HEAD^{tree}").strip()
+
+def test_unchanged_tree_returns_none(tmp_path):
+    repo = _repo(tmp_path)
+    tree = GitObjectTree(repo)
+    _stage(tree, "a.py", "a\n")
+    assert tree.commit("first")
+    _stage(tree, "a.py", "a\n")
+    assert tree.commit("same content") is None
+
+def test_reopen_expands_only_touched_directories(tmp_path):
+    repo = _repo(tmp_path)
+    tree = GitObjectTree(repo)
+    _stage(tree, "lib/a.py", "a\n")
+    _stage(tree, "other/b.py", "b\n")
+    first = tree.commit("first")
+    other_sha = _git(tmp_path, "rev-parse", "HEAD:other").strip()
+
+    # 新实例从 HEAD 读入，只改 lib/ 下的文件
+    tree = GitObjectTree(Repo(tmp_path))
+    _stage(tree, "lib/c.py", "c\n")
+    second = tree.commit("second")
+    assert _git(tmp_path, "rev-parse", "HEAD^").strip() == first
+    assert _git(tmp_path, "rev-parse", "HEAD:other").strip() == other_sha
+    assert _git(tmp_path, "ls-tree", "-r", "--name-only", second).split() == ["lib/a.py", "lib/c.py", "other/b.py"]
+    assert _git(tmp_path, "show", f"{second}:lib/a.py") == "a\n"
+    assert _git(tmp_path, "log", "-1", "--format=%an <%ae>|%s") == "tester <tester@example.com>|second\n"
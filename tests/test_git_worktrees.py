@@ -0,0 +1,52 @@
+# tests/test_git_worktrees.py
+from core.models import RepoNode
+from core.repo_manager import RepoManager
+
+FILES = {"src/a.py": "Dev-1", "src/b.py": "Dev-2"}
+
+def _reason(path):
+    return {"file_path": path, "change_type": "modify", "functions_added": [], "functions_modified": [],
+            "functions_removed": [], "classes_added": [], "classes_modified": [], "classes_removed": [],
+            "rationale": "test", "related_files_brief_used": []}
+
+def _repo(root, **kw):
+    by_agent = {}
+    for f, a in FILES.items():
+        by_agent.setdefault(a, set()).add(f)
+    rm = RepoManager(str(root), set(FILES), by_agent, dev_worktrees=True, **kw)
+    rm.init_structure([RepoNode("src", "dir", [RepoNode(f.split("/")[1], "file") for f in FILES])])
+    return rm
+
+def _head_files(rm):
+    tree = rm.repo.head.commit.tree
+    return {p: (tree / p).data_stream.read().decode() for p in FILES}
+
+def test_developers_commit_in_own_worktrees_and_merge_at_barrier(tmp_path):
+    rm = _repo(tmp_path / "repo")
+    base = rm.repo.head.commit.hexsha
+    for f, a in FILES.items():
+        rm.write_file(f, f"# {a}\n", agent_id=a)
+        assert rm.commit_file(f, _reason(f), a)
+    # 屏障之前主分支不动，文件只在各自的 worktree 里
+    assert rm.repo.head.commit.hexsha == base
+    assert (tmp_path / "repo.worktrees" / "Dev-1" / "src" / "a.py").read_text() == "# Dev-1\n"
+    assert rm.merge_round() == 2
+    assert _head_files(rm) == {"src/a.py": "# Dev-1\n", "src/b.py": "# Dev-2\n"}
+    assert len(rm.repo.head.commit.parents) == 3
+    # 没有新提交时不合并
+    assert rm.merge_round() == 0
+    rm.close()
+    assert not (tmp_path / "repo.worktrees").exists()
+    assert rm.commit_stats()["worktrees"]["merges"] == 1
+
+def test_worktrees_follow_main_after_merge(tmp_path):
+    rm = _repo(tmp_path / "repo", commit_window=0.05)
+    rm.write_file("src/a.py", "x = 1\n", agent_id="Dev-1")
+    rm.commit_file("src/a.py", _reason("src/a.py"), "Dev-1")
+    rm.merge_round()
+    # Dev-2 的 worktree 已快进到合并结果，能看到 Dev-1 的改动
+    assert (tmp_path / "repo.worktrees" / "Dev-2" / "src" / "a.py").read_text() == "x = 1\n"
+    rm.write_file("src/b.py", "import a\n", agent_id="Dev-2")
+    rm.commit_file("src/b.py", _reason("src/b.py"), "Dev-2")
+    rm.close()
+    assert _head_files(rm) == {"src/a.py": "x = 1\n", "src/b.py": "import a\n"}
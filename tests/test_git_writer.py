@@ -0,0 +1,65 @@
+# tests/test_git_writer.py
+import asyncio
+import threading
+import time
+from core.git_writer import GitCommitWriter
+from roles.qa_agent_async import QAAgentAsync
+
+def test_window_batches_submits_and_call_flushes_first():
+    batches = []
+    writer = GitCommitWriter(lambda batch: batches.append([e.rel_path for e in batch]), window=0.2)
+    for i in range(3):
+        writer.submit(f"f{i}.py", f"update f{i}.py", {})
+    # call 之前排队的文件先落成一次提交
+    assert writer.call(lambda: list(batches)) == [["f0.py", "f1.py", "f2.py"]]
+    writer.submit("g.py", "update g.py", {})
+    writer.close()
+    assert batches == [["f0.py", "f1.py", "f2.py"], ["g.py"]]
+    assert writer.stats()["commits"] == 2 and writer.stats()["max_batch"] == 3
+
+def test_commit_error_surfaces_on_flush():
+    def fail(batch):
+        raise RuntimeError("index locked")
+    writer = GitCommitWriter(fail, window=0.0)
+    writer.submit("a.py", "update a.py", {})
+    try:
+        writer.flush()
+    except RuntimeError as e:
+        assert "index locked" in str(e)
+    else:
+        raise AssertionError("flush did not raise")
+    writer.close()
+
+class _SlowRepo:
+    root = "/nonexistent"
+
+    def __init__(self):
+        self.thread = None
+
+    def write_file(self, *args, **kwargs):
+        return True
+
+    def commit_all(self, msg):
+        # 模拟等待写线程排空的阻塞调用
+        self.thread = threading.current_thread()
+        time.sleep(0.3)
+
+def test_qa_commit_all_does_not_block_event_loop():
+    repo = _SlowRepo()
+    qa = QAAgentAsync(None, repo, None, None)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        t = asyncio.create_task(ticker())
+        await qa.restore_tests({"tests/test_x.py": "def test_x(): pass\n"}, "pytest -q")
+        t.cancel()
+        return ticks
+    ticks = asyncio.run(main())
+    assert ticks >= 10
+    assert repo.thread is not threading.main_thread()
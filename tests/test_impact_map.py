@@ -0,0 +1,116 @@
+# tests/test_impact_map.py
+import asyncio
+import json
+import subprocess
+import sys
+from core.impact_map import ImpactMap
+from roles.qa_agent_async import QAAgentAsync
+from runtime_adapters.pytest_support import PLUGIN_DIR, extend_command, plugin_env
+from runtime_adapters.python_runtime import PythonRuntime
+from runtime_adapters.python_runtime_async import PythonRuntimeAsync
+from runtime_adapters.python_runtime_warm import WarmPythonRuntimeAsync
+
+ALL = ["tests/test_a.py::test_add", "tests/test_a.py::test_limit", "tests/test_b.py::test_mul", "tests/test_b.py::test_other"]
+
+def _make_repo(root):
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "__init__.py").write_text("")
+    (root / "src" / "a.py").write_text("def add(x, y):\n    return x + y\n")
+    (root / "src" / "b.py").write_text("def mul(x, y):\n    return x * y\n")
+    (root / "src" / "c.py").write_text("LIMIT = 3\n")
+    (root / "tests").mkdir()
+    (root / "tests" / "test_a.py").write_text(
+        "from src.a import add\nfrom src.c import LIMIT\n\n"
+        "def test_add(): assert add(1, 2) == 3\n\ndef test_limit(): assert LIMIT == 3\n")
+    (root / "tests" / "test_b.py").write_text(
+        "from src.b import mul\n\ndef test_mul(): assert mul(2, 3) == 6\n\ndef test_other(): assert True\n")
+    return str(root)
+
+class _Repo:
+    def __init__(self, root):
+        self.root = root
+
+    def materialize(self):
+        pass
+
+class _Bus:
+    async def emit(self, *args):
+        pass
+
+def test_select_changed_and_failing(tmp_path):
+    im = ImpactMap(str(tmp_path / "repo"))
+    assert im.select(["src/a.py"]) is None
+    im.map = {"t.py::a": ["src/a.py", "t.py"], "t.py::b": ["src/b.py", "t.py"], "u.py::c": ["src/c.py", "u.py"]}
+    im.failing = {"u.py::c", "broken.py"}
+    assert im.select(["src/a.py"]) == ["t.py::a", "u.py::c"]
+    # 测试文件本身改动时选中其中所有用例；收集错误（没有 ::）不参与选择
+    assert im.select(["t.py"]) == ["t.py::a", "t.py::b", "u.py::c"]
+
+def test_ingest_tracks_failing_and_persists(tmp_path):
+    im = ImpactMap(str(tmp_path / "repo"))
+    run = im.new_run_path()
+    (tmp_path / run).write_text(json.dumps({"t.py::a": ["src/a.py"]}))
+    im.ingest(run, {"tests": [{"test": "t.py::a", "outcome": "failed", "duration": 0.1}]})
+    again = ImpactMap(str(tmp_path / "repo"))
+    assert again.map == {"t.py::a": ["src/a.py"]} and again.failing == {"t.py::a"}
+    im.ingest(im.new_run_path(), {"tests": [{"test": "t.py::a", "outcome": "passed", "duration": 0.1}]})
+    assert ImpactMap(str(tmp_path / "repo")).failing == set()
+
+def test_impact_trace_plugin_maps_calls_and_constant_imports(tmp_path):
+    root = _make_repo(tmp_path)
+    out = tmp_path / "map.json"
+    cmd = extend_command(f"{sys.executable} -m pytest -q", impact_map=str(out))
+    subprocess.run(cmd, shell=True, cwd=root, env=plugin_env(), capture_output=True, check=True)
+    m = json.loads(out.read_text())
+    assert sorted(m) == ALL
+    assert "src/a.py" in m["tests/test_a.py::test_add"]
+    # 只读常量没有函数调用，靠测试模块的 import 关联
+    assert "src/c.py" in m["tests/test_a.py::test_limit"]
+    assert "src/a.py" not in m["tests/test_b.py::test_mul"] and "src/b.py" in m["tests/test_b.py::test_mul"]
+    assert not any(f.startswith("<") or f.startswith(PLUGIN_DIR) for files in m.values() for f in files)
+
+def test_node_ids_run_only_selected_with_positional_paths(tmp_path):
+    root = _make_repo(tmp_path)
+    cmd = f"{sys.executable} -m pytest -q tests"
+    picked = ["tests/test_a.py::test_limit"]
+    sync = PythonRuntime().run_tests(root, cmd, node_ids=picked)
+    assert [t["test"] for t in sync["tests"]] == picked
+
+    async def run_async():
+        cold = await PythonRuntimeAsync().run_tests(root, cmd, node_ids=picked)
+        warm_rt = WarmPythonRuntimeAsync()
+        try:
+            warm = await warm_rt.run_tests(root, cmd, node_ids=picked)
+        finally:
+            await warm_rt.close()
+        return cold, warm
+    cold, warm = asyncio.run(run_async())
+    assert [t["test"] for t in cold["tests"]] == picked
+    assert warm["runner"] == "warm" and [t["test"] for t in warm["tests"]] == picked
+
+def test_fix_round_runs_only_impacted_tests(tmp_path):
+    root = _make_repo(tmp_path / "repo")
+    qa = QAAgentAsync(None, _Repo(root), PythonRuntimeAsync(), _Bus(), impact=True)
+    qa.run_command = f"{sys.executable} -m pytest -q tests"
+
+    async def rounds():
+        first = await qa.run_and_feedback()
+        (tmp_path / "repo" / "src" / "c.py").write_text("LIMIT = 4\n")
+        second = await qa.run_and_feedback(changed=["src/c.py"])
+        return first, second
+    first, second = asyncio.run(rounds())
+    assert first["success"] and qa.round_stats[0]["mode"] == "full" and qa.round_stats[0]["tests_run"] == 4
+    # 选中的用例失败，不做全量确认
+    assert not second["success"]
+    # 测试模块 import 了 src.c，同文件的用例都算受影响；tests/test_b.py 不跑
+    assert qa.round_stats[1]["mode"] == "selected" and qa.round_stats[1]["tests_run"] == 2
+    assert sorted(t["test"] for t in second["tests"]) == ["tests/test_a.py::test_add", "tests/test_a.py::test_limit"]
+
+def test_no_selection_for_ambiguous_command(tmp_path):
+    root = _make_repo(tmp_path / "repo")
+    qa = QAAgentAsync(None, _Repo(root), PythonRuntimeAsync(), _Bus(), impact=True)
+    qa.impact.map = {t: ["src/c.py"] for t in ALL}
+    # 未知选项后面跟着 tests：无法判断它是选项取值还是路径，只能全量
+    qa.run_command = f"{sys.executable} -m pytest -q --unknown-opt tests"
+    asyncio.run(qa.run_and_feedback(changed=["src/c.py"]))
+    assert qa.round_stats[0]["mode"] == "full"
@@ -0,0 +1,93 @@
+# tests/test_junit_report.py
+import subprocess
+import sys
+from runtime_adapters.junit_report import junit_args, parse_frames, parse_junit
+from runtime_adapters.pytest_support import collect_command, parse_collected
+
+CASES = '''import pytest
+
+def test_plain():
+    assert helper() == 2
+
+class TestOuter:
+    def test_m(self):
+        pass
+
+    class TestInner:
+        def test_deep(self):
+            pass
+
+@pytest.mark.parametrize("x", [1, "a b", "c::d"])
+def test_param(x):
+    pass
+
+def helper():
+    return 1
+'''
+
+def _run(root, *args):
+    return subprocess.run([sys.executable, "-m", "pytest", *args], cwd=root, capture_output=True, text=True)
+
+def test_node_ids_round_trip_between_collect_and_junit(tmp_path):
+    (tmp_path / "pkg" / "tests").mkdir(parents=True)
+    (tmp_path / "pkg" / "tests" / "test_cases.py").write_text(CASES)
+    out = subprocess.run(collect_command(f"{sys.executable} -m pytest -p no:cacheprovider pkg"), shell=True,
+                         cwd=tmp_path, capture_output=True, text=True).stdout
+    collected = parse_collected(out)
+    assert len(collected) == 6
+    report = tmp_path / "r.xml"
+    _run(tmp_path, "-p", "no:cacheprovider", "pkg", *junit_args(str(report)))
+    parsed = parse_junit(str(report), str(tmp_path))
+    # 类、嵌套类和参数化用例都要还原成与 --collect-only 相同的 node id，分片和影响选择靠它对账
+    assert sorted(t["test"] for t in parsed["tests"]) == sorted(collected)
+    # 每个 node id 都能直接传回 pytest 单独运行
+    rerun = _run(tmp_path, "-p", "no:cacheprovider", "-q", *collected)
+    assert "5 passed" in rerun.stdout and "1 failed" in rerun.stdout
+
+    failure, = parsed["failures"]
+    assert failure["test"] == "pkg/tests/test_cases.py::test_plain"
+    assert failure["exception"] == "AssertionError" and failure["outcome"] == "failed"
+    assert failure["file_path"] == "pkg/tests/test_cases.py"
+    assert [f["line"] for f in failure["frames"]][-1] == 4
+
+def test_collection_error_maps_to_file(tmp_path):
+    (tmp_path / "test_broken.py").write_text("import missing_module_xyz\n")
+    report = tmp_path / "r.xml"
+    _run(tmp_path, "-p", "no:cacheprovider", *junit_args(str(report)))
+    parsed = parse_junit(str(report))
+    assert [t["test"] for t in parsed["tests"]] == ["test_broken.py"]
+    assert parsed["failures"][0]["outcome"] == "error"
+    assert parsed["failures"][0]["exception"] in ("ModuleNotFoundError", "ImportError")
+
+def test_parse_frames_long_and_native_styles():
+    text = "\n".join([
+        "tests/test_x.py:10: in test_x",
+        "    run()",
+        'src/app.py:3: ValueError',
+        '  File "/repo/src/util.py", line 7, in helper',
+        '  File "/usr/lib/python3/json/__init__.py", line 346, in loads',
+    ])
+    assert parse_frames(text, "/repo") == [
+        {"file": "tests/test_x.py", "line": 10}, {"file": "src/app.py", "line": 3},
+        {"file": "src/util.py", "line": 7}, {"file": "/usr/lib/python3/json/__init__.py", "line": 346}]
+
+def test_innermost_repo_frame_is_failure_location(tmp_path):
+    report = tmp_path / "r.xml"
+    report.write_text('''<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest">
+<testcase classname="tests.test_x" name="test_x" file="tests/test_x.py" line="9" time="0.25">
+<failure message="KeyError: 'k'">Traceback (most recent call last):
+  File "/repo/tests/test_x.py", line 10, in test_x
+  File "/repo/src/store.py", line 22, in get
+  File "/usr/lib/python3/collections/__init__.py", line 5, in __getitem__
+KeyError: 'k'</failure></testcase>
+<testcase classname="tests.test_x" name="test_skip" file="tests/test_x.py" line="12" time="0">
+<skipped message="later"/></testcase>
+</testsuite></testsuites>''')
+    parsed = parse_junit(str(report), "/repo")
+    assert parsed["tests"] == [
+        {"test": "tests/test_x.py::test_x", "outcome": "failed", "duration": 0.25},
+        {"test": "tests/test_x.py::test_skip", "outcome": "skipped", "duration": 0.0}]
+    failure, = parsed["failures"]
+    assert failure["file_path"] == "src/store.py" and failure["exception"] == "KeyError"
+    assert parse_junit(str(tmp_path / "missing.xml")) is None
@@ -0,0 +1,91 @@
+# tests/test_llm_cache.py
+import asyncio
+from core.llm_cache import CachedLLM, DiskLRUCache
+
+class _FakeLLM:
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+
+    async def text(self, prompt):
+        self.calls += 1
+        return f"answer to {prompt}" if prompt else ""
+
+    async def text_stream(self, prompt):
+        self.calls += 1
+        for part in ("ans", "wer"):
+            yield part
+
+    async def structured_json(self, prompt, schema=None):
+        self.calls += 1
+        return {"schema": schema}
+
+def test_lru_eviction_and_reload_order(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=10**6)
+    for k in ("aa1", "bb2", "cc3"):
+        cache.put(k, "x" * 100)
+    assert cache.get("aa1") == "x" * 100    # aa1 变成最新
+    cache.max_bytes = cache.total_bytes - 1
+    cache.put("dd4", "x" * 100)
+    # 超限时先淘汰最久未访问的 bb2、cc3
+    assert cache.get("bb2") is None and cache.get("cc3") is None
+    assert cache.get("aa1") is not None and len(cache) == 2
+    # 重启后从磁盘恢复索引
+    reopened = DiskLRUCache(str(tmp_path))
+    assert len(reopened) == 2 and reopened.total_bytes == cache.total_bytes
+
+def test_cached_llm_hits_and_key_separation(tmp_path):
+    inner = _FakeLLM()
+    llm = CachedLLM(inner, DiskLRUCache(str(tmp_path)))
+
+    async def main():
+        a = await llm.text("q")
+        b = await llm.text("q")
+        await llm.structured_json("q", schema="SDS")
+        await llm.structured_json("q", schema={"b": 1, "a": 2})
+        await llm.structured_json("q", schema={"a": 2, "b": 1})
+        await llm.text("")          # 空结果不缓存
+        await llm.text("")
+        return a, b
+    a, b = asyncio.run(main())
+    assert a == b == "answer to q"
+    assert inner.calls == 5
+    stats = llm.stats()
+    assert stats["hits"]["text"] == 1 and stats["hits"]["structured_json"] == 1
+    assert stats["misses"]["structured_json"] == 2 and stats["entries"] == 3
+
+def test_stream_shares_entry_with_text_and_bypass(tmp_path):
+    inner = _FakeLLM()
+    llm = CachedLLM(inner, DiskLRUCache(str(tmp_path)))
+
+    async def collect(prompt):
+        return [c async for c in llm.text_stream(prompt)]
+    assert asyncio.run(collect("p")) == ["ans", "wer"]
+    # 读完的流写入缓存，之后整段返回
+    assert asyncio.run(collect("p")) == ["answer"]
+    assert asyncio.run(llm.text("p")) == "answer" and inner.calls == 1
+
+    bypassed = CachedLLM(inner, DiskLRUCache(str(tmp_path / "b")), bypass=("text",))
+    asyncio.run(bypassed.text("p"))
+    asyncio.run(bypassed.text("p"))
+    assert inner.calls == 3 and len(bypassed.cache) == 0
+
+def test_sampled_calls_keep_diversity_and_replay_on_rerun(tmp_path):
+    class _Sampler(_FakeLLM):
+        temperature = 0.7
+
+        async def structured_json(self, prompt, schema=None):
+            self.calls += 1
+            return {"draw": self.calls}
+
+    async def two_architects(llm):
+        return [await llm.structured_json("same question", schema="SDS") for _ in range(2)]
+    inner = _Sampler()
+    first = asyncio.run(two_architects(CachedLLM(inner, DiskLRUCache(str(tmp_path)))))
+    # 相同提示的两次采样各自调用，不会把第一份结果复制给第二个 Architect
+    assert first == [{"draw": 1}, {"draw": 2}] and inner.calls == 2
+    rerun = CachedLLM(inner, DiskLRUCache(str(tmp_path)))
+    assert asyncio.run(two_architects(rerun)) == first
+    assert inner.calls == 2 and rerun.stats()["hits"]["structured_json"] == 2
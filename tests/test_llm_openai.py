@@ -0,0 +1,67 @@
+# tests/test_llm_openai.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from core.llm_openai import OpenAILLM
+from core.rate_limiter import RateLimiter
+
+class _APIError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"status {status}")
+        self.status_code = status
+        self.response = SimpleNamespace(headers=headers or {})
+
+class _ScriptedLLM(OpenAILLM):
+    """跳过 SDK 初始化，_send 按脚本依次抛错或返回。"""
+
+    def __init__(self, script, max_retries=3):
+        self.transport = "async"
+        self._http = None
+        self.model, self.temperature, self.max_tokens = "m", 0.0, 100
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rpm=6000, tpm=10**6, min_backoff=0.01, max_backoff=0.05)
+        self.stream_code = False
+        self.script = list(script)
+        self.sent = []
+
+    async def _send(self, **kwargs):
+        self.sent.append(kwargs)
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+def _resp(text, total_tokens=50):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+                           usage=SimpleNamespace(total_tokens=total_tokens))
+
+def test_rate_limited_call_backs_off_through_limiter_and_retries():
+    llm = _ScriptedLLM([_APIError(429, {"retry-after-ms": "20"}), _resp("ok")])
+    assert asyncio.run(llm.text("hi")) == "ok"
+    assert len(llm.sent) == 2 and llm.sent[0]["model"] == "m" and llm.sent[0]["max_tokens"] == 100
+    stats = llm.limiter.stats()
+    assert stats["rate_limited"] == 1 and stats["acquired"] == 2
+
+def test_client_errors_are_not_retried():
+    llm = _ScriptedLLM([_APIError(400), _resp("never")])
+    with pytest.raises(_APIError):
+        asyncio.run(llm.text("hi"))
+    assert len(llm.sent) == 1
+
+def test_gives_up_after_max_retries():
+    llm = _ScriptedLLM([_APIError(429, {"retry-after": "0"})] * 3, max_retries=2)
+    with pytest.raises(_APIError):
+        asyncio.run(llm.text("hi"))
+    assert len(llm.sent) == 3
+
+def test_retry_after_header_forms():
+    llm = _ScriptedLLM([])
+    assert llm._retry_after(_APIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert llm._retry_after(_APIError(429, {"retry-after": "2"})) == 2.0
+    assert llm._retry_after(_APIError(429, {"retry-after": "Thu, 01 Jan 1970 00:00:00 GMT"})) == 0.0
+    assert llm._retry_after(_APIError(500)) is None
+
+def test_structured_json_repairs_invalid_output():
+    llm = _ScriptedLLM([_resp("sure: {\"chosen_index\": \"x\"}"), _resp("{\"chosen_index\": 1}")])
+    assert asyncio.run(llm.structured_json("pick", schema="CTO_DECISION")) == {"chosen_index": 1}
+    assert llm.sent[0]["response_format"] == {"type": "json_object"}
@@ -0,0 +1,104 @@
+# tests/test_llm_singleflight.py
+import asyncio
+from core.llm_singleflight import SingleFlightLLM, llm_role
+
+class _SlowLLM:
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+
+    async def text(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return prompt.upper()
+
+    async def structured_json(self, prompt, schema=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"items": [prompt]}
+
+def test_identical_inflight_calls_are_coalesced():
+    inner = _SlowLLM()
+    llm = SingleFlightLLM(inner)
+
+    async def main():
+        same = await asyncio.gather(*[llm.text("q") for _ in range(5)], llm.text("other"))
+        # 完成后不再合并：新的请求重新发起
+        again = await llm.text("q")
+        return same, again
+    same, again = asyncio.run(main())
+    assert same == ["Q"] * 5 + ["OTHER"] and again == "Q"
+    assert inner.calls == 3
+    assert llm.stats()["leaders"]["text"] == 3 and llm.stats()["coalesced"]["text"] == 4
+
+def test_followers_get_independent_copies():
+    llm = SingleFlightLLM(_SlowLLM())
+
+    async def main():
+        return await asyncio.gather(llm.structured_json("q", schema="S"), llm.structured_json("q", schema="S"))
+    a, b = asyncio.run(main())
+    a["items"].append("mutated")
+    assert b == {"items": ["q"]}
+
+def test_bypass_role_and_leader_cancellation():
+    inner = _SlowLLM()
+    llm = SingleFlightLLM(inner, bypass_roles=("architect",))
+
+    async def architect():
+        with llm_role("architect"):
+            return await llm.text("q")
+
+    async def main():
+        await asyncio.gather(architect(), architect())
+        leader = asyncio.create_task(llm.text("x"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(llm.text("x"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        # 发起者被取消，跟随者仍拿到结果
+        return await follower
+    assert asyncio.run(main()) == "X"
+    assert inner.calls == 3
+
+def test_leader_mutation_does_not_leak_to_followers():
+    llm = SingleFlightLLM(_SlowLLM())
+
+    async def leader():
+        res = await llm.structured_json("q", schema="S")
+        # 发起者先恢复执行并立即修改结果
+        res["items"].append("leader edit")
+        return res
+
+    async def follower():
+        await asyncio.sleep(0)
+        return await llm.structured_json("q", schema="S")
+
+    async def main():
+        return await asyncio.gather(leader(), follower())
+    a, b = asyncio.run(main())
+    assert a == {"items": ["q", "leader edit"]} and b == {"items": ["q"]}
+
+def test_text_stream_passes_through_uncoalesced():
+    class _StreamLLM(_SlowLLM):
+        async def text_stream(self, prompt):
+            self.calls += 1
+            for part in ("a", "b"):
+                yield part
+
+    inner = _StreamLLM()
+    llm = SingleFlightLLM(inner)
+
+    async def collect():
+        return [c async for c in llm.text_stream("q")]
+
+    async def main():
+        return await asyncio.gather(collect(), collect())
+    assert asyncio.run(main()) == [["a", "b"], ["a", "b"]]
+    assert inner.calls == 2
+    # 内层没有流式接口时退回整段 text
+    assert asyncio.run(_collect_plain(SingleFlightLLM(_SlowLLM()))) == ["Q"]
+
+async def _collect_plain(llm):
+    return [c async for c in llm.text_stream("q")]
@@ -0,0 +1,57 @@
+# tests/test_pytest_support.py
+import subprocess
+import sys
+from runtime_adapters.pytest_support import split_positional, strip_positional, split_shards, collect_command, parse_collected
+from runtime_adapters.python_runtime import PythonRuntime
+
+def _make_repo(root):
+    (root / "tests").mkdir()
+    (root / "tests" / "test_a.py").write_text("def test_a1(): pass\n\ndef test_a2(): assert 0\n")
+    (root / "tests" / "test_b.py").write_text("def test_b1(): pass\n\ndef test_b2(): pass\n")
+    return str(root)
+
+def test_split_positional_keeps_option_values():
+    opts, paths = split_positional(["-q", "-k", "foo", "--tb", "short", "-rA", "tests", "--maxfail=1", "x.py::t"])
+    assert opts == ["-q", "-k", "foo", "--tb", "short", "-rA", "--maxfail=1"]
+    assert paths == ["tests", "x.py::t"]
+
+def test_split_positional_gives_up_on_ambiguous_options():
+    assert split_positional(["--cov", "src", "tests"]) is None
+    assert split_positional(["-q", "--", "tests"]) is None
+    assert split_positional(["--cov", "-q", "tests"]) == (["--cov", "-q"], ["tests"])
+
+def test_strip_positional():
+    assert strip_positional("python -m pytest -q tests") == "python -m pytest -q"
+    assert strip_positional("pytest -q -k 'a or b' tests/unit") == "pytest -q -k 'a or b'"
+    assert strip_positional("make test") is None
+
+def test_split_shards_balances_by_duration():
+    ids = ["t1", "t2", "t3", "t4", "t5"]
+    shards = split_shards(ids, {"t1": 4.0, "t2": 3.0, "t3": 2.0, "t4": 1.0, "t5": 2.0}, 2)
+    loads = sorted(sum({"t1": 4.0, "t2": 3.0, "t3": 2.0, "t4": 1.0, "t5": 2.0}[t] for t in s) for s in shards)
+    assert loads == [6.0, 6.0]
+    assert sorted(t for s in shards for t in s) == ids
+    # 分片内保持收集顺序
+    assert all(s == sorted(s, key=ids.index) for s in shards)
+
+def test_split_shards_without_history_is_even():
+    shards = split_shards([f"t{i}" for i in range(6)], {}, 3)
+    assert [len(s) for s in shards] == [2, 2, 2]
+
+def test_collect_ids_round_trip_through_junit(tmp_path):
+    root = _make_repo(tmp_path)
+    cmd = f"{sys.executable} -m pytest -q -q tests"
+    out = subprocess.run(collect_command(cmd), shell=True, cwd=root, capture_output=True, text=True).stdout
+    collected = parse_collected(out)
+    assert collected == ["tests/test_a.py::test_a1", "tests/test_a.py::test_a2",
+                         "tests/test_b.py::test_b1", "tests/test_b.py::test_b2"]
+    result = PythonRuntime().run_tests(root, cmd)
+    assert sorted(t["test"] for t in result["tests"]) == collected
+
+def test_sharded_run_executes_each_test_once(tmp_path):
+    root = _make_repo(tmp_path)
+    result = PythonRuntime(shards=2).run_tests(root, f"{sys.executable} -m pytest -q tests")
+    assert result["shards"] == 2
+    assert sorted(t["test"] for t in result["tests"]) == [
+        "tests/test_a.py::test_a1", "tests/test_a.py::test_a2", "tests/test_b.py::test_b1", "tests/test_b.py::test_b2"]
+    assert [f["test"] for f in result["failures"]] == ["tests/test_a.py::test_a2"]
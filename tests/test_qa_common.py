@@ -0,0 +1,13 @@
+# tests/test_qa_common.py
+from roles.qa_common import merge_fix_suggestions
+
+def _fix(fp, test, msg):
+    return {"dev_id": "Dev-1", "file_path": fp, "issues": {"file_path": fp, "message": msg, "stack": f"{test} failed", "test": test}}
+
+def test_failures_in_same_file_merge_into_one_task():
+    merged = merge_fix_suggestions([_fix("a.py", "t1", "boom"), _fix("b.py", "t2", "x"), _fix("a.py", "t3", "boom")])
+    assert [m["file_path"] for m in merged] == ["a.py", "b.py"]
+    issues = merged[0]["issues"]
+    assert issues["message"] == "boom" and issues["tests"] == ["t1", "t3"]
+    assert issues["stack"] == "[t1]\nt1 failed\n\n[t3]\nt3 failed"
+    assert merged[1] == _fix("b.py", "t2", "x")
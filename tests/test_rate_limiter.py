@@ -0,0 +1,64 @@
+# tests/test_rate_limiter.py
+import asyncio
+import time
+from core.rate_limiter import TokenBucket, RateLimiter
+
+def test_bucket_burst_then_queue_in_arrival_order():
+    b = TokenBucket(60)   # 每秒 1 个
+    now = 100.0
+    b.updated = now
+    assert [b.reserve(1, now) for _ in range(60)] == [0.0] * 60
+    # 余额为负：后到的等待更久
+    assert b.reserve(1, now) == 1.0
+    assert b.reserve(1, now) == 2.0
+    # 时间流逝按速率补充
+    assert b.reserve(1, now + 3.0) == 0.0
+
+def test_bucket_caps_oversized_request_and_refund():
+    b = TokenBucket(100)
+    b.updated = 0.0
+    # 超过容量的请求只扣容量，否则会永远等不到
+    assert b.reserve(500, 0.0) == 0.0
+    assert b.tokens == 0.0
+    b.refund(30)
+    assert b.tokens == 30.0
+    b.refund(1000)
+    assert b.tokens == 100.0
+
+def test_bucket_scale_slows_refill():
+    b = TokenBucket(60)
+    b.updated = 0.0
+    b.tokens = 0.0
+    assert b.reserve(1, 0.0, scale=0.5) == 2.0
+
+def test_limiter_waits_on_rpm():
+    rl = RateLimiter(rpm=600)   # 每秒 10 个
+    rl.rpm.tokens = 0.0
+    rl.rpm.updated = time.monotonic()
+    delays = asyncio.run(_acquire_n(rl, 3))
+    assert delays[0] > 0 and delays[0] < delays[1] < delays[2]
+    stats = rl.stats()
+    assert stats["acquired"] == 3 and stats["waited"] == 3
+
+def test_limiter_reconcile_refunds_tpm():
+    rl = RateLimiter(tpm=1000)
+    asyncio.run(rl.acquire(tokens=800))
+    rl.reconcile(estimated=800, actual=200)
+    assert rl.tpm.tokens >= 799.0
+
+def test_rate_limited_pauses_and_backs_off():
+    rl = RateLimiter(rpm=6000, min_backoff=0.05, max_backoff=1.0)
+    rl.report_rate_limited(retry_after=0.1)
+    assert rl.stats()["scale"] == 0.5
+    delay = asyncio.run(rl.acquire())
+    assert 0.05 < delay <= 0.1
+    rl.report_rate_limited()
+    rl.report_rate_limited()
+    assert rl._penalty == 0.1
+    # 乘性降速、加性恢复
+    assert rl._scale == 0.125
+    rl.report_success()
+    assert abs(rl._scale - 0.175) < 1e-9 and rl._penalty == 0.05
+
+async def _acquire_n(rl, n):
+    return await asyncio.gather(*[rl.acquire() for _ in range(n)])
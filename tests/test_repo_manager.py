@@ -0,0 +1,62 @@
+# tests/test_repo_manager.py
+import asyncio
+import threading
+from actions.generate_code import GenerateCodeAction
+from core.repo_manager import RepoManager
+
+SPEC = {"path": "src/app.py", "responsibilities": "", "interfaces": {"functions": [], "classes": []}}
+CODE = "def main():\n    return 1\n"
+
+class _LLM:
+    def __init__(self, code):
+        self.code = code
+
+    async def text(self, prompt):
+        return self.code
+
+def _repo(root, **kw):
+    return RepoManager(str(root), {"src/app.py", "tests/test_app.py"}, {"Dev-1": {"src/app.py"}}, **kw)
+
+def _committed(rm, path):
+    return path in {b.path for b in rm.repo.head.commit.tree.traverse()} if rm.repo.head.is_valid() else False
+
+def test_identical_rewrite_is_skipped(tmp_path):
+    rm = _repo(tmp_path / "repo")
+    assert rm.write_file("src/app.py", CODE) is True
+    rm.commit_file("src/app.py", _reason(), "Dev-1")
+    assert rm.write_file("src/app.py", CODE) is False
+    assert rm.commit_file("src/app.py", _reason(), "Dev-1") is False
+    assert rm.commit_stats()["dedup"] == {"writes": 1, "skipped_writes": 1, "skipped_commits": 1}
+
+def test_uncommitted_identical_file_is_still_committed(tmp_path):
+    # 写入后、提交前崩溃：恢复时磁盘上已有相同内容，但从未提交
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text(CODE)
+    rm = _repo(root)
+    gen = GenerateCodeAction()
+    asyncio.run(gen.run(SPEC, {}, _LLM(CODE), rm, agent_id="Dev-1"))
+    assert gen.last_changed is False
+    assert _committed(rm, "src/app.py")
+    assert not rm.pending_commit("src/app.py")
+    # 再次生成相同内容：既不写也不提交
+    head = rm.repo.head.commit.hexsha
+    asyncio.run(gen.run(SPEC, {}, _LLM(CODE), rm, agent_id="Dev-1"))
+    assert rm.repo.head.commit.hexsha == head
+
+def _reason():
+    return {"file_path": "src/app.py", "change_type": "create", "functions_added": [], "functions_modified": [],
+            "functions_removed": [], "classes_added": [], "classes_modified": [], "classes_removed": [],
+            "rationale": "test", "related_files_brief_used": []}
+
+def test_sync_commit_waits_for_main_index(tmp_path):
+    rm = _repo(tmp_path / "repo")
+    rm.write_file("src/app.py", CODE)
+    done = threading.Event()
+    with rm._main_lock:
+        # 另一线程（如 QA 的 commit_all）持有主索引时，开发者提交必须等待
+        t = threading.Thread(target=lambda: (rm.commit_file("src/app.py", _reason(), "Dev-1"), done.set()))
+        t.start()
+        assert not done.wait(0.2)
+    t.join(5)
+    assert done.is_set() and _committed(rm, "src/app.py")
@@ -0,0 +1,52 @@
+# tests/test_round_latch.py
+import asyncio
+import threading
+from utils.event_bus import EventBus
+from utils.event_bus_async import AsyncEventBus
+
+def test_async_round_completes_on_last_arrival_and_drops_late_events():
+    async def main():
+        bus = AsyncEventBus()
+        latch = bus.open_round("r1", ["a.py", "b.py", "a.py"])
+        await bus.emit("dev_done", {"round": "r1", "file": "a.py", "changed": True})
+        await bus.emit("dev_done", {"round": "r1", "file": "c.py"})    # 不属于本轮
+        assert latch.outstanding() == ["a.py", "b.py"]
+        assert not await latch.wait(timeout=0.01)
+        await bus.emit("dev_done", {"round": "r1", "file": "b.py", "error": "boom"})
+        await bus.emit("dev_done", {"round": "r1", "file": "a.py"})
+        ok = await bus.wait_round("r1", timeout=1)
+        # 轮次关闭后的迟到事件不会算进下一轮
+        await bus.emit("dev_done", {"round": "r1", "file": "a.py"})
+        nxt = bus.open_round("r2", ["a.py"])
+        return ok, latch.report(), bus.late_events, nxt.outstanding()
+    ok, report, late, nxt = asyncio.run(main())
+    assert ok and report["outstanding"] == [] and report["expected"] == 3
+    assert sorted(report["completed"]) == ["a.py", "b.py"]
+    assert report["errors"] == {"b.py": "boom"} and report["changed"] == ["a.py"]
+    assert late == 1 and nxt == ["a.py"]
+
+def test_async_empty_round_is_already_done():
+    async def main():
+        bus = AsyncEventBus()
+        bus.open_round("r0", [])
+        return await bus.wait_round("r0", timeout=0.01)
+    assert asyncio.run(main())
+
+def test_threaded_round_wakes_waiter():
+    bus = EventBus()
+    latch = bus.open_round("r1", ["a.py", "b.py"])
+
+    def worker(f):
+        bus.emit("dev_done", {"round": "r1", "file": f})
+    threads = [threading.Thread(target=worker, args=(f,)) for f in ("a.py", "b.py")]
+    for t in threads:
+        t.start()
+    assert bus.wait_round("r1", timeout=2)
+    for t in threads:
+        t.join()
+    assert latch.outstanding() == [] and bus.late_events == 0
+    bus.emit("dev_done", {"round": "r1", "file": "a.py"})
+    assert bus.late_events == 1
+    # 超时返回 False
+    bus.open_round("r2", ["x.py"])
+    assert not bus.wait_round("r2", timeout=0.05)
@@ -0,0 +1,84 @@
+# tests/test_sandbox.py
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from runtime_adapters.sandbox import Sandbox
+
+PY = sys.executable
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # 被杀后还没被 init 回收的僵尸也算已结束
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except OSError:
+        return False
+
+def _result(sb, cmd, cwd):
+    return sb.to_result(sb.run(cmd, cwd), None, lambda text: [], str(cwd))
+
+def test_timeout_kills_whole_process_group(tmp_path):
+    pidfile = tmp_path / "child.pid"
+    cmd = f"sleep 300 & echo $! > {pidfile}; {PY} -c 'import time; time.sleep(300)'"
+    t0 = time.monotonic()
+    res = _result(Sandbox(timeout=1), cmd, tmp_path)
+    assert time.monotonic() - t0 < 10
+    assert not res["success"] and res["resources"]["timed_out"]
+    assert [f["message"] for f in res["failures"]] == ["timeout"]
+    time.sleep(0.2)
+    assert not _alive(int(pidfile.read_text()))
+
+def test_background_grandchild_killed_after_normal_exit(tmp_path):
+    pidfile = tmp_path / "child.pid"
+    run = Sandbox(timeout=30).run(f"sleep 300 > /dev/null 2>&1 & echo $! > {pidfile}", str(tmp_path))
+    assert run["returncode"] == 0 and not run["timed_out"]
+    time.sleep(0.2)
+    assert not _alive(int(pidfile.read_text()))
+
+def test_output_cap_keeps_head_and_tail(tmp_path):
+    cmd = f"{PY} -c \"import sys; sys.stdout.write('a' * 2500 + 'b' * 2500)\""
+    run = Sandbox(max_output_bytes=1000).run(cmd, str(tmp_path))
+    out = run["stdout"]
+    marker = "\n... [4000 bytes of output truncated] ...\n"
+    assert out == "a" * 500 + marker + "b" * 500
+    assert run["resources"]["output_truncated_bytes"] == 4000
+
+def test_output_under_cap_is_untouched(tmp_path):
+    run = Sandbox(max_output_bytes=1000).run(f"{PY} -c \"print('x' * 900)\"", str(tmp_path))
+    assert run["stdout"] == "x" * 900 + "\n" and run["resources"]["output_truncated_bytes"] == 0
+
+def test_cpu_limit_reported_as_failure(tmp_path):
+    res = _result(Sandbox(timeout=30, cpu_seconds=1), f"{PY} -c 'while True: pass'", tmp_path)
+    assert not res["success"]
+    assert [f["message"] for f in res["failures"]] == ["cpu limit"]
+    assert res["resources"]["cpu_user_s"] + res["resources"]["cpu_sys_s"] >= 0.9
+
+def test_memory_limit_reported_as_failure(tmp_path):
+    res = _result(Sandbox(timeout=30, memory_mb=200), f"{PY} -c 'x = bytearray(400 * 1024 * 1024)'", tmp_path)
+    assert not res["success"]
+    assert [f["message"] for f in res["failures"]] == ["memory limit"]
+
+def test_memory_limit_detected_from_crash_signal(tmp_path):
+    # 内存不足时 C 扩展可能直接崩溃，输出里没有 MemoryError
+    res = _result(Sandbox(timeout=30, memory_mb=200), f"{PY} -c 'import os, signal; os.kill(os.getpid(), signal.SIGSEGV)'", tmp_path)
+    assert [f["message"] for f in res["failures"]] == ["memory limit"]
+    res = _result(Sandbox(timeout=30), f"{PY} -c 'import os, signal; os.kill(os.getpid(), signal.SIGSEGV)'", tmp_path)
+    assert not res["success"] and res["failures"] == []
+
+def test_limits_applied_from_concurrent_threads(tmp_path):
+    # 分片并发调用 run()：rlimit 由 exec 包装器设置，不依赖 preexec_fn
+    sb = Sandbox(timeout=30, cpu_seconds=20, memory_mb=1024, open_files=64)
+    with ThreadPoolExecutor(8) as ex:
+        runs = list(ex.map(lambda _: sb.run("ulimit -n; ulimit -t", str(tmp_path)), range(16)))
+    assert all(r["returncode"] == 0 and r["stdout"].split() == ["64", "20"] for r in runs)
+
+def test_resources_reported(tmp_path):
+    res = _result(Sandbox(), f"{PY} -c 'print(1)'", tmp_path)
+    assert res["success"] and res["failures"] == []
+    assert set(res["resources"]) == {"wall_s", "cpu_user_s", "cpu_sys_s", "max_rss_mb", "timed_out", "output_truncated_bytes"}
+    assert res["resources"]["max_rss_mb"] > 0
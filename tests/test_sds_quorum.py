@@ -0,0 +1,60 @@
+# tests/test_sds_quorum.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("metagpt")
+from orchestrator import workflow_async
+from orchestrator.context import Context
+
+# Architect 序号 -> (耗时秒, 是否合法)
+PLAN = {}
+
+class _FakeArchitect:
+    def __init__(self, name, llm, rag):
+        self.name = name
+        self.index = int(name.rsplit("-", 1)[1])
+
+    async def propose_sds(self, question):
+        delay, valid = PLAN[self.index]
+        await asyncio.sleep(delay)
+        return {"id": f"sds-{self.index}", "valid": valid}
+
+def _validate(sds):
+    if not sds["valid"]:
+        raise ValueError("invalid")
+
+@pytest.fixture
+def collect(monkeypatch):
+    monkeypatch.setattr(workflow_async, "ArchitectAgent", _FakeArchitect)
+    monkeypatch.setattr(workflow_async, "validate_sds", _validate)
+
+    def run(plan, **cfg):
+        PLAN.clear()
+        PLAN.update(plan)
+        cfg = SimpleNamespace(**dict(dict(architects=len(plan), sds_retry=0, sds_quorum=0, sds_deadline=0.0,
+                                          sds_first_valid=False), **cfg))
+        wf = workflow_async.MultiAgentCodegenWorkflowAsync(Context(cfg=cfg, llm=None))
+        return [s["id"] for s in asyncio.run(wf._collect_sds("q"))], wf.metrics["sds"]
+    return run
+
+def test_quorum_cancels_slow_architects_and_keeps_index_order(collect):
+    ids, m = collect({1: (0.1, True), 2: (0.02, True), 3: (5.0, True)}, sds_quorum=2)
+    assert ids == ["sds-1", "sds-2"]
+    assert m["valid"] == 2 and m["cancelled"] == 1 and not m["deadline_hit"]
+    assert set(m) == {"architects", "quorum", "valid", "failed", "cancelled", "deadline_hit"}
+
+def test_first_valid_skips_failed_architects(collect):
+    ids, m = collect({1: (0.01, False), 2: (0.05, True), 3: (5.0, True)}, sds_first_valid=True)
+    assert ids == ["sds-2"] and m["failed"] == 1 and m["quorum"] == 1
+
+def test_deadline_uses_what_arrived_or_waits_for_first(collect):
+    ids, m = collect({1: (0.01, True), 2: (5.0, True)}, sds_deadline=0.1)
+    assert ids == ["sds-1"] and m["deadline_hit"] and m["cancelled"] == 1
+    # 截止时仍没有合法 SDS：继续等第一份
+    ids, m = collect({1: (0.2, True), 2: (5.0, True)}, sds_deadline=0.05)
+    assert ids == ["sds-1"] and m["deadline_hit"]
+
+def test_no_valid_sds_raises(collect):
+    with pytest.raises(RuntimeError):
+        collect({1: (0.01, False), 2: (0.01, False)})
@@ -0,0 +1,99 @@
+# tests/test_service.py
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("metagpt")
+from app import service
+from app.service import JobService, QueueFull
+
+class _Cfg(SimpleNamespace):
+    def model_copy(self, update):
+        return _Cfg(**dict(vars(self), **update))
+
+def _service(tmp_path, max_concurrent_jobs=2, max_queue=100):
+    cfg = _Cfg(workspace=str(tmp_path), service=SimpleNamespace(max_concurrent_jobs=max_concurrent_jobs, max_queue=max_queue))
+    return JobService(cfg, ctx=SimpleNamespace(llm=None, rag=None, pool=None))
+
+def test_queue_round_robins_across_clients(tmp_path):
+    async def main():
+        svc = _service(tmp_path, max_queue=5)
+        for q in ("a1", "a2", "a3"):
+            svc.submit(q, client="a")
+        svc.submit("b1", client="b")
+        svc.submit("c1", client="c")
+        with pytest.raises(QueueFull):
+            svc.submit("a4", client="a")
+        return [svc._next_job().question for _ in range(5)], svc._next_job()
+    order, empty = asyncio.run(main())
+    # 一个提交方排了很多任务也不会挡住其他提交方
+    assert order == ["a1", "b1", "c1", "a2", "a3"] and empty is None
+
+def test_jobs_run_concurrently_up_to_slot_limit(tmp_path, monkeypatch):
+    running, peak = 0, 0
+
+    class _FakeWorkflow:
+        def __init__(self, ctx):
+            self.ctx = ctx
+            self.metrics = {}
+
+        async def run(self, question):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            if question == "bad":
+                raise ValueError("boom")
+            return self.ctx.cfg.workspace
+
+    monkeypatch.setattr(service, "MultiAgentCodegenWorkflowAsync", _FakeWorkflow)
+
+    async def main():
+        svc = _service(tmp_path, max_concurrent_jobs=2)
+        jobs = [svc.submit(q) for q in ("q1", "q2", "bad", "q4", "q5")]
+        svc.start()
+        while any(j.status in ("queued", "running") for j in jobs):
+            await asyncio.sleep(0.01)
+        await svc.stop()
+        return jobs, svc.metrics()
+    jobs, metrics = asyncio.run(main())
+    assert peak == 2
+    assert [j.status for j in jobs] == ["done", "done", "failed", "done", "done"]
+    # 每个任务独立的 workspace 子目录
+    assert jobs[0].repo == str(tmp_path / "jobs" / jobs[0].id)
+    assert jobs[2].error == "ValueError: boom"
+    assert metrics["done"] == 4 and metrics["failed"] == 1 and metrics["queued"] == 0
+
+def test_http_api(tmp_path):
+    async def request(port, method, path, body=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = json.dumps(body).encode() if body is not None else b""
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        head, _, payload = raw.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    async def main():
+        svc = _service(tmp_path, max_queue=1)
+        server = await asyncio.start_server(svc.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            created = await request(port, "POST", "/jobs", {"question": "q", "client": "x"})
+            full = await request(port, "POST", "/jobs", {"question": "q2"})
+            missing = await request(port, "POST", "/jobs", {})
+            job = await request(port, "GET", f"/jobs/{created[1]['job_id']}")
+            unknown = await request(port, "GET", "/jobs/nope")
+            health = await request(port, "GET", "/healthz")
+            return created, full, missing, job, unknown, health
+        finally:
+            server.close()
+            await server.wait_closed()
+    created, full, missing, job, unknown, health = asyncio.run(main())
+    assert created[0] == 202 and created[1]["status"] == "queued"
+    assert full[0] == 429 and missing[0] == 400 and unknown[0] == 404
+    assert job[0] == 200 and job[1]["client"] == "x"
+    assert health == (200, {"ok": True})
@@ -0,0 +1,23 @@
+# tests/test_stage_overlap.py
+import logging
+from utils.logger import StageTimer, log_overlap
+
+def _timer(logger, stage, t0, t1):
+    t = StageTimer(logger, stage)
+    t.t0, t.t1 = t0, t1
+    return t
+
+def test_overlap_of_parallel_stages(caplog):
+    logger = logging.getLogger("test_overlap")
+    with caplog.at_level(logging.INFO, logger="test_overlap"):
+        log_overlap(logger, _timer(logger, "qa_init_tests", 1.0, 4.0), _timer(logger, "dev_round", 2.0, 7.0))
+    # 串行 3+5=8 秒，并行墙钟 6 秒，重叠 2 秒
+    assert caplog.messages == ["stage_overlap qa_init_tests+dev_round overlap=2.00s serial=8.00s wall=6.00s"]
+
+def test_disjoint_and_unfinished_stages(caplog):
+    logger = logging.getLogger("test_overlap")
+    with caplog.at_level(logging.INFO, logger="test_overlap"):
+        log_overlap(logger, _timer(logger, "a", 0.0, 1.0), _timer(logger, "b", 2.0, 3.0))
+        # 未结束的阶段（如被取消）不记录
+        log_overlap(logger, _timer(logger, "a", 0.0, None), _timer(logger, "b", 2.0, 3.0))
+    assert caplog.messages == ["stage_overlap a+b overlap=0.00s serial=2.00s wall=3.00s"]
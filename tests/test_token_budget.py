@@ -0,0 +1,60 @@
+# tests/test_token_budget.py
+from actions.generate_code import DEV_PROMPT_FALLBACK, GenerateCodeAction
+from core import token_budget
+from core.token_budget import TokenBudgeter, count_tokens, truncate_to_tokens
+
+def test_truncate_to_tokens_fits_budget():
+    text = "alpha beta gamma delta " * 50
+    for n in (0, 1, 5, 40):
+        cut = truncate_to_tokens(text, n)
+        assert count_tokens(cut) <= n and text.startswith(cut)
+    assert truncate_to_tokens("short", 100) == "short"
+
+def test_fit_keeps_total_within_budget_and_priority_order():
+    fixed = "system prompt " * 20
+    briefs = [f"brief {i}: " + "x " * 40 for i in range(10)]
+    stack = [f"frame {i}" for i in range(5)]
+    budget = count_tokens(fixed) + 120
+    out = TokenBudgeter("developer", budget=budget, min_partial=1000).fit(fixed, [("stack", stack), ("briefs", briefs)])
+    # 高优先级段先装满，低优先级段只拿剩余
+    assert out["stack"] == "\n".join(stack)
+    kept = out["briefs"].split("\n") if out["briefs"] else []
+    assert kept == briefs[:len(kept)] and len(kept) < len(briefs)
+    used = count_tokens(fixed) + sum(count_tokens(s + "\n") for s in stack + kept)
+    assert used <= budget
+
+def test_fit_ranks_and_keep_order():
+    items = ["a " * 30, "b " * 30, "c " * 30]
+    budget = count_tokens(items[2] + "\n") + count_tokens(items[0] + "\n")
+    out = TokenBudgeter("developer", budget=budget, min_partial=10**6).fit(
+        "", [("stack", items)], keep_order=("stack",), ranks={"stack": [2, 0, 1]})
+    # 按 rank 选中 c、a，输出恢复原始顺序
+    assert out["stack"] == items[0] + "\n" + items[2]
+
+def test_fit_truncates_last_item_when_room_remains():
+    items = ["word " * 200]
+    out = TokenBudgeter("developer", budget=50, min_partial=8).fit("", [("briefs", items)])
+    assert out["briefs"] and items[0].startswith(out["briefs"])
+    assert count_tokens(out["briefs"] + "\n") <= 50
+
+def test_developer_prompt_prefers_dep_briefs_then_stack_then_others():
+    spec = {"path": "src/app.py", "responsibilities": "", "dependencies": ["src/models.py"],
+            "interfaces": {"functions": [], "classes": []}}
+    briefs = {"src/unrelated.py": {"functions": [{"signature": "def helper(): ..."}], "classes": []},
+              "src/models.py": {"functions": [{"signature": "def load(path): ..."}], "classes": []}}
+    frame = "src/app.py:12: in handler  # target frame " + "x " * 40
+    action = GenerateCodeAction()
+    fixed = DEV_PROMPT_FALLBACK.format(file_path="src/app.py", responsibilities="", interfaces_pretty="(无)",
+                                       briefs_pretty="", issues_excerpt="")
+    dep = "* src/models.py\n  - def load(path): ...\n"
+    unrelated = "* src/unrelated.py\n  - def helper(): ...\n"
+    # 无关简报比目标帧小：按旧顺序会先装下它、把帧挤掉；预算只够依赖简报 + 目标帧
+    assert count_tokens(unrelated) < count_tokens(frame + "\n")
+    old = token_budget.budget_for("developer")
+    token_budget.configure_budgets({"developer": count_tokens(fixed) + count_tokens(dep) + count_tokens(frame + "\n")})
+    try:
+        prompt = action._build_prompt(spec, briefs, {"stack": frame})
+    finally:
+        token_budget.configure_budgets({"developer": old})
+    assert "* src/models.py" in prompt and frame in prompt
+    assert "src/unrelated.py" not in prompt
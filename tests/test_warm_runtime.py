@@ -0,0 +1,71 @@
+# tests/test_warm_runtime.py
+import asyncio
+import sys
+import time
+from runtime_adapters.python_runtime_warm import WarmPythonRuntimeAsync
+from runtime_adapters.sandbox import Sandbox
+
+CMD = f"{sys.executable} -m pytest -q -p no:cacheprovider tests"
+
+def _make_repo(root):
+    (root / "src").mkdir()
+    (root / "tests").mkdir()
+    (root / "src" / "__init__.py").write_text("")
+    (root / "src" / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+    (root / "tests" / "test_calc.py").write_text(
+        "from src.calc import add\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+    return str(root)
+
+def _run(rt, root, cmd=CMD):
+    async def main():
+        try:
+            out = []
+            for c in cmd if isinstance(cmd, list) else [cmd]:
+                out.append(await rt.run_tests(root, c))
+            return out, rt.stats()
+        finally:
+            await rt.close()
+    return asyncio.run(main())
+
+def test_worker_reused_and_sees_source_changes(tmp_path):
+    root = _make_repo(tmp_path)
+    rt = WarmPythonRuntimeAsync()
+
+    async def main():
+        try:
+            first = await rt.run_tests(root, CMD)
+            # 修改被测模块：worker 只丢弃变化的模块，下一轮导入新代码
+            time.sleep(0.01)
+            (tmp_path / "src" / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+            second = await rt.run_tests(root, CMD)
+            return first, second, rt.stats()
+        finally:
+            await rt.close()
+    first, second, stats = asyncio.run(main())
+    assert first["runner"] == "warm" and not first["success"]
+    assert [f["test"] for f in first["failures"]] == ["tests/test_calc.py::test_add"]
+    assert second["success"] and second["tests"][0]["outcome"] == "passed"
+    assert stats["worker_starts"] == 1 and stats["fallbacks"] == 0 and stats["invalidated_modules"] >= 1
+
+def test_leaked_state_recycles_worker(tmp_path):
+    root = _make_repo(tmp_path)
+    (tmp_path / "tests" / "test_leak.py").write_text("import os\n\ndef test_leak():\n    os.environ['LEAKED'] = '1'\n")
+    (results, stats) = _run(WarmPythonRuntimeAsync(), root, [CMD, CMD])
+    assert all(r["runner"] == "warm" for r in results)
+    # 每轮都污染环境变量，每轮之后都换新进程
+    assert stats["recycled"] == 2 and stats["worker_starts"] == 2
+
+def test_non_pytest_command_runs_cold(tmp_path):
+    root = _make_repo(tmp_path)
+    (results, stats) = _run(WarmPythonRuntimeAsync(), root, f"{sys.executable} -c 'print(1)'")
+    assert results[0]["success"] and results[0]["runner"] != "warm"
+    assert stats["worker_starts"] == 0
+
+def test_hung_test_kills_worker_without_cold_retry(tmp_path):
+    root = _make_repo(tmp_path)
+    (tmp_path / "tests" / "test_hang.py").write_text("import time\n\ndef test_hang():\n    time.sleep(60)\n")
+    t0 = time.monotonic()
+    (results, stats) = _run(WarmPythonRuntimeAsync(sandbox=Sandbox(timeout=3)), root)
+    assert time.monotonic() - t0 < 30
+    assert not results[0]["success"] and results[0]["failures"][0]["message"] == "timeout"
+    assert stats["fallbacks"] == 0
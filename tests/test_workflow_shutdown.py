@@ -0,0 +1,52 @@
+# tests/test_workflow_shutdown.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("metagpt")
+from orchestrator.dev_scheduler import DevTaskRouter
+from orchestrator.workflow_async import MultiAgentCodegenWorkflowAsync
+from orchestrator.context import Context
+from utils.event_bus_async import AsyncEventBus
+
+class _Worker:
+    def __init__(self, agent_id, bus, router):
+        self.agent_id = agent_id
+        self.bus = bus
+        self.router = router
+        self.exited = False
+
+    async def run(self):
+        while True:
+            task = await self.bus.take(self.router.topic_for(self.agent_id))
+            if task.get("type") == "exit":
+                self.exited = True
+                return
+
+    def stats(self):
+        return {}
+
+class _BrokenRouter(DevTaskRouter):
+    async def shutdown(self, worker_ids):
+        raise ConnectionError("broker gone")
+
+def _stop(router_cls, graceful):
+    async def main():
+        bus = AsyncEventBus()
+        router = router_cls(bus, {"a.py": "dev1", "b.py": "dev2"})
+        workers = [_Worker(w, bus, router) for w in ("dev1", "dev2")]
+        tasks = [asyncio.create_task(w.run()) for w in workers]
+        await asyncio.sleep(0)
+        wf = MultiAgentCodegenWorkflowAsync(Context(cfg=SimpleNamespace(), llm=None))
+        await asyncio.wait_for(wf._stop_workers(router, workers, tasks, graceful=graceful), 5)
+        return workers, tasks
+    return asyncio.run(main())
+
+def test_graceful_stop_lets_workers_exit():
+    workers, tasks = _stop(DevTaskRouter, graceful=True)
+    assert all(w.exited for w in workers) and all(t.done() and not t.cancelled() for t in tasks)
+
+def test_failed_run_never_leaves_workers_blocked():
+    # 异常路径：即使 exit 消息发不出去，阻塞在 bus.take 上的 worker 也会被取消
+    workers, tasks = _stop(_BrokenRouter, graceful=False)
+    assert all(t.cancelled() for t in tasks) and not any(w.exited for w in workers)
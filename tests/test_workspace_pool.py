@@ -0,0 +1,44 @@
+# tests/test_workspace_pool.py
+import os
+import tarfile
+from pathlib import Path
+from orchestrator.workspace_pool import WorkspacePool, new_repo_name
+
+def test_new_repo_names_are_unique():
+    names = {new_repo_name() for _ in range(200)}
+    assert len(names) == 200 and all(n.startswith("repo-") for n in names)
+
+def test_acquire_hits_then_misses(tmp_path):
+    pool = WorkspacePool(str(tmp_path / "pool"), size=2).start()
+    pool.close()   # 不让后台线程补充，便于数命中
+    roots = [pool.acquire(str(tmp_path / "jobs")) for _ in range(3)]
+    assert len(set(roots)) == 3
+    assert all((Path(r) / ".git").is_dir() for r in roots)
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses"], stats["ready"]) == (2, 1, 0)
+
+def test_recycle_without_archive_removes_repo_and_sidecars(tmp_path):
+    pool = WorkspacePool(str(tmp_path / "pool"), size=1).start()
+    root = Path(pool.acquire(str(tmp_path / "jobs")))
+    for suffix in (".checkpoint.json", ".test_durations.json", ".impact_map.json"):
+        Path(f"{root}{suffix}").write_text("{}")
+    other = tmp_path / "jobs" / "other.checkpoint.json"
+    other.write_text("{}")
+    assert pool.recycle(str(root)) is None
+    pool.close()
+    assert not root.exists()
+    assert sorted(os.listdir(tmp_path / "jobs")) == ["other.checkpoint.json"]
+    # 回收的目录由补充流程删除，不会被当作预热仓库领取
+    pool._refill()
+    assert not any(e.startswith(".recycle-") for e in os.listdir(pool.ready))
+
+def test_recycle_with_archive_returns_archive_path(tmp_path):
+    pool = WorkspacePool(str(tmp_path / "pool"), size=1, archive_dir=str(tmp_path / "archive")).start()
+    root = Path(pool.acquire(str(tmp_path / "jobs")))
+    (root / "main.py").write_text("print(1)\n")
+    archive = pool.recycle(str(root))
+    pool.close()
+    assert archive and archive.endswith(".tar.gz")
+    with tarfile.open(archive) as tar:
+        assert f"{root.name}/main.py" in tar.getnames()
+    assert pool.stats()["archived"] == 1
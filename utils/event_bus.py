@@ -1,8 +1,58 @@
 # utils/event_bus.py
 from __future__ import annotations
+import time
+from collections import Counter
 from queue import Queue, Empty
-from threading import Lock, Event
-from typing import Dict, Any
+from threading import Lock, Event, Condition
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+class RoundLatch:
+    """一轮开发任务的倒数门闩：按参与者（文件路径）计数，全部到达即唤醒等待方。
+
+    同一参与者可出现多次（如一个文件收到多条修复建议），需到达相同次数才算完成。
+    """
+
+    def __init__(self, round_id: str, participants: Iterable[str]):
+        self.round_id = round_id
+        self._remaining = Counter(participants)
+        self.expected = sum(self._remaining.values())
+        self._opened = time.monotonic()
+        self.completed: Dict[str, float] = {}   # 参与者 -> 自开轮起的完成耗时（秒）
+        self.errors: Dict[str, str] = {}
+        self.changed: Set[str] = set()   # 本轮确实改动了内容的参与者（payload.changed 为真）
+        self._cond = Condition()
+
+    def arrive(self, participant: str, payload: Optional[dict] = None) -> bool:
+        with self._cond:
+            n = self._remaining.get(participant, 0)
+            if n <= 0:
+                return False
+            if n == 1:
+                del self._remaining[participant]
+                self.completed[participant] = round(time.monotonic() - self._opened, 3)
+            else:
+                self._remaining[participant] = n - 1
+            if payload and payload.get("error"):
+                self.errors[participant] = payload["error"]
+            if payload and payload.get("changed"):
+                self.changed.add(participant)
+            if not self._remaining:
+                self._cond.notify_all()
+            return True
+
+    def outstanding(self) -> List[str]:
+        with self._cond:
+            return sorted(self._remaining)
+
+    def wait(self, timeout: float = None) -> bool:
+        # 整轮共用一个截止时间，而不是每个事件一个超时
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._remaining, timeout=timeout)
+
+    def report(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"round": self.round_id, "expected": self.expected, "completed": dict(self.completed),
+                    "outstanding": sorted(self._remaining), "errors": dict(self.errors), "changed": sorted(self.changed)}
 
 class EventBus:
     def __init__(self):
@@ -10,6 +60,8 @@ class EventBus:
         self._lock = Lock()
         self._counters: Dict[str, int] = {}
         self._counter_events: Dict[str, Event] = {}
+        self._rounds: Dict[str, RoundLatch] = {}
+        self.late_events = 0
 
     def _get_q(self, topic: str) -> Queue:
         with self._lock:
@@ -18,6 +70,15 @@ class EventBus:
         return self._topics[topic]
 
     def emit(self, topic: str, payload: Any):
+        if topic == "dev_done" and isinstance(payload, dict) and payload.get("round") is not None:
+            # 带轮次 ID 的完成事件直接交给对应门闩；已关闭轮次的迟到事件丢弃，不会算进下一轮
+            with self._lock:
+                latch = self._rounds.get(payload["round"])
+                if latch is None:
+                    self.late_events += 1
+            if latch is not None:
+                latch.arrive(payload.get("file"), payload)
+            return
         q = self._get_q(topic)
         q.put(payload)
         # 计数类事件（用于barrier）
@@ -40,6 +101,22 @@ class EventBus:
                 self._counter_events[topic] = Event()
             self._counter_events[topic].clear()
 
+    def open_round(self, round_id: str, participants: Iterable[str]) -> RoundLatch:
+        # 必须在下发任务之前开轮，否则过快完成的事件会被当作迟到事件
+        latch = RoundLatch(round_id, participants)
+        with self._lock:
+            self._rounds[round_id] = latch
+        return latch
+
+    def wait_round(self, round_id: str, timeout: float = None) -> bool:
+        with self._lock:
+            latch = self._rounds[round_id]
+        try:
+            return latch.wait(timeout=timeout)
+        finally:
+            with self._lock:
+                self._rounds.pop(round_id, None)
+
     def wait_for_count(self, topic: str, expected: int, timeout: float = None) -> bool:
         # 简化：轮询等待计数达到expected
         self.reset_counter(topic)
@@ -1,11 +1,61 @@
 # utils/event_bus_async.py
 import asyncio
-from typing import Dict, Any
+import time
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+class AsyncRoundLatch:
+    """RoundLatch 的协程版：最后一个参与者到达时 set Event 唤醒等待方，无轮询。"""
+
+    def __init__(self, round_id: str, participants: Iterable[str]):
+        self.round_id = round_id
+        self._remaining = Counter(participants)
+        self.expected = sum(self._remaining.values())
+        self._opened = time.monotonic()
+        self.completed: Dict[str, float] = {}   # 参与者 -> 自开轮起的完成耗时（秒）
+        self.errors: Dict[str, str] = {}
+        self.changed: Set[str] = set()   # 本轮确实改动了内容的参与者（payload.changed 为真）
+        self._done = asyncio.Event()
+        if not self._remaining:
+            self._done.set()
+
+    def arrive(self, participant: str, payload: Optional[dict] = None) -> bool:
+        n = self._remaining.get(participant, 0)
+        if n <= 0:
+            return False
+        if n == 1:
+            del self._remaining[participant]
+            self.completed[participant] = round(time.monotonic() - self._opened, 3)
+        else:
+            self._remaining[participant] = n - 1
+        if payload and payload.get("error"):
+            self.errors[participant] = payload["error"]
+        if payload and payload.get("changed"):
+            self.changed.add(participant)
+        if not self._remaining:
+            self._done.set()
+        return True
+
+    def outstanding(self) -> List[str]:
+        return sorted(self._remaining)
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def report(self) -> Dict[str, Any]:
+        return {"round": self.round_id, "expected": self.expected, "completed": dict(self.completed),
+                "outstanding": sorted(self._remaining), "errors": dict(self.errors), "changed": sorted(self.changed)}
 
 class AsyncEventBus:
     def __init__(self):
         self._topics: Dict[str, asyncio.Queue] = {}
         self._lock = asyncio.Lock()
+        self._rounds: Dict[str, AsyncRoundLatch] = {}
+        self.late_events = 0
 
     async def _get_q(self, topic: str) -> asyncio.Queue:
         async with self._lock:
@@ -16,6 +66,14 @@ class AsyncEventBus:
             return q
 
     async def emit(self, topic: str, payload: Any):
+        if topic == "dev_done" and isinstance(payload, dict) and payload.get("round") is not None:
+            # 带轮次 ID 的完成事件直接交给对应门闩；已关闭轮次的迟到事件丢弃，不会算进下一轮
+            latch = self._rounds.get(payload["round"])
+            if latch is None:
+                self.late_events += 1
+            else:
+                latch.arrive(payload.get("file"), payload)
+            return
         q = await self._get_q(topic)
         await q.put(payload)
 
@@ -25,6 +83,22 @@ class AsyncEventBus:
             return await q.get()
         return await asyncio.wait_for(q.get(), timeout=timeout)
 
+    def open_round(self, round_id: str, participants: Iterable[str]) -> AsyncRoundLatch:
+        # 必须在下发任务之前开轮，否则过快完成的事件会被当作迟到事件
+        latch = AsyncRoundLatch(round_id, participants)
+        self._rounds[round_id] = latch
+        return latch
+
+    async def wait_round(self, round_id: str, timeout: float | None = None) -> bool:
+        try:
+            return await self._rounds[round_id].wait(timeout=timeout)
+        finally:
+            self._rounds.pop(round_id, None)
+
+    async def ack(self, topic: str):
+        # 进程内队列取出即送达；保留该方法以与 RemoteEventBus 的至少一次投递接口一致
+        return None
+
     async def wait_for_count(self, topic: str, expected: int, timeout: float | None = None) -> bool:
         q = await self._get_q(topic)
         async def consume_expected():
@@ -0,0 +1,219 @@
+# utils/event_bus_remote.py
+from __future__ import annotations
+import asyncio
+import itertools
+import json
+from typing import Any, Dict, Optional, Tuple
+from utils.event_bus_async import AsyncEventBus
+from utils.logger import get_logger
+
+# 协议：每行一个 JSON。客户端请求带 id，服务端按 id 回包，同一连接上的请求可并发。
+#   {"id", "op": "emit", "topic", "payload"}              -> {"id", "ok": true}
+#   {"id", "op": "take", "topic", "timeout"}              -> {"id", "delivery", "payload"} | {"id", "error": "timeout"}
+#   {"id", "op": "ack", "delivery"}                       -> {"id", "ok": true}
+#   {"id", "op": "wait_for_count", "topic", "expected", "timeout"} -> {"id", "ok": bool}
+
+LINE_LIMIT = 16 * 1024 * 1024   # 单条消息上限：修复任务里带完整堆栈，默认 64KiB 不够
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """"tcp://host:port" 或 "unix:///path/to.sock" -> (kind, target)。"""
+    if address.startswith("unix://"):
+        return "unix", address[len("unix://"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+class EventBroker:
+    """轻量事件代理：把一个 AsyncEventBus 暴露到本地 socket 上，供其他进程/主机上的 worker 使用。
+
+    投递语义为至少一次：take 出去的消息在收到 ack 之前记在连接名下，
+    连接断开（worker 崩溃或被杀）时未 ack 的消息重新入队，由其他消费者领取。
+    编排器与代理同进程时直接使用 broker.bus，不经过 socket。
+    """
+
+    def __init__(self, address: str = "tcp://127.0.0.1:0", bus: Optional[AsyncEventBus] = None):
+        self.bus = bus or AsyncEventBus()
+        self._kind, self._target = parse_address(address)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._deliveries = itertools.count(1)
+        self.log = get_logger("event_broker")
+        self.stats = {"connections": 0, "emitted": 0, "delivered": 0, "acked": 0, "redelivered": 0}
+
+    @property
+    def address(self) -> str:
+        if self._kind == "unix":
+            return f"unix://{self._target}"
+        host, port = self._server.sockets[0].getsockname()[:2] if self._server else self._target
+        return f"tcp://{host}:{port}"
+
+    async def start(self) -> "EventBroker":
+        if self._kind == "unix":
+            self._server = await asyncio.start_unix_server(self._handle, path=self._target, limit=LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=self._target[0], port=self._target[1], limit=LINE_LIMIT)
+        self.log.info(f"event broker listening on {self.address}")
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        unacked: Dict[int, Tuple[str, Any]] = {}
+        pending = set()
+        write_lock = asyncio.Lock()
+
+        async def reply(msg: dict):
+            async with write_lock:
+                writer.write((json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+
+        async def serve(req: dict):
+            op, rid = req.get("op"), req.get("id")
+            try:
+                if op == "emit":
+                    await self.bus.emit(req["topic"], req.get("payload"))
+                    self.stats["emitted"] += 1
+                    await reply({"id": rid, "ok": True})
+                elif op == "take":
+                    try:
+                        payload = await self.bus.take(req["topic"], timeout=req.get("timeout"))
+                    except asyncio.TimeoutError:
+                        await reply({"id": rid, "error": "timeout"})
+                        return
+                    # 先登记再发送：发送途中断开也能在清理阶段重新入队
+                    delivery = next(self._deliveries)
+                    unacked[delivery] = (req["topic"], payload)
+                    self.stats["delivered"] += 1
+                    await reply({"id": rid, "delivery": delivery, "payload": payload})
+                elif op == "ack":
+                    if unacked.pop(req["delivery"], None) is not None:
+                        self.stats["acked"] += 1
+                    await reply({"id": rid, "ok": True})
+                elif op == "wait_for_count":
+                    ok = await self.bus.wait_for_count(req["topic"], expected=req["expected"], timeout=req.get("timeout"))
+                    await reply({"id": rid, "ok": ok})
+                else:
+                    await reply({"id": rid, "error": f"unknown op {op!r}"})
+            except (ConnectionError, asyncio.CancelledError):
+                raise
+            except Exception as e:
+                await reply({"id": rid, "error": f"{type(e).__name__}: {e}"})
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t = asyncio.create_task(serve(json.loads(line)))
+                pending.add(t)
+                t.add_done_callback(pending.discard)
+        except (ConnectionError, ValueError) as e:
+            self.log.warning(f"broker connection dropped: {e}")
+        finally:
+            # 阻塞中的 take 取消即可（Queue.get 取消不会丢消息），已投递未 ack 的重新入队
+            for t in list(pending):
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for topic, payload in unacked.values():
+                await self.bus.emit(topic, payload)
+                self.stats["redelivered"] += 1
+            if unacked:
+                self.log.warning(f"redelivered {len(unacked)} unacked message(s) from closed connection")
+            writer.close()
+
+class RemoteEventBus:
+    """与 AsyncEventBus 同接口（emit / take / wait_for_count）的 socket 客户端。
+
+    take 取到的消息需要 ack：显式调用 ack(topic)，或在同一 topic 上再次 take 时自动确认上一条。
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._ids = itertools.count(1)
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._unacked: Dict[str, int] = {}
+        self._write_lock = asyncio.Lock()
+        self._recv_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def connect(cls, address: str) -> "RemoteEventBus":
+        bus = cls(address)
+        kind, target = parse_address(address)
+        if kind == "unix":
+            bus._reader, bus._writer = await asyncio.open_unix_connection(target, limit=LINE_LIMIT)
+        else:
+            bus._reader, bus._writer = await asyncio.open_connection(*target, limit=LINE_LIMIT)
+        bus._recv_task = asyncio.create_task(bus._recv_loop(), name=f"bus-recv {address}")
+        return bus
+
+    async def _recv_loop(self):
+        err: BaseException = ConnectionError("event broker closed the connection")
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                fut = self._waiters.pop(msg.get("id"), None)
+                if fut and not fut.done():
+                    fut.set_result(msg)
+        except Exception as e:
+            err = e
+        finally:
+            for fut in self._waiters.values():
+                if not fut.done():
+                    fut.set_exception(err)
+            self._waiters.clear()
+
+    async def _call(self, op: str, **kwargs) -> dict:
+        rid = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters[rid] = fut
+        async with self._write_lock:
+            self._writer.write((json.dumps(dict(kwargs, id=rid, op=op), ensure_ascii=False) + "\n").encode("utf-8"))
+            await self._writer.drain()
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            self._waiters.pop(rid, None)
+            raise
+
+    async def emit(self, topic: str, payload: Any):
+        res = await self._call("emit", topic=topic, payload=payload)
+        if "error" in res:
+            raise RuntimeError(res["error"])
+
+    async def take(self, topic: str, timeout: float | None = None) -> Any:
+        await self.ack(topic)
+        res = await self._call("take", topic=topic, timeout=timeout)
+        if res.get("error") == "timeout":
+            raise asyncio.TimeoutError()
+        if "error" in res:
+            raise RuntimeError(res["error"])
+        self._unacked[topic] = res["delivery"]
+        return res["payload"]
+
+    async def ack(self, topic: str):
+        delivery = self._unacked.pop(topic, None)
+        if delivery is not None:
+            await self._call("ack", delivery=delivery)
+
+    async def wait_for_count(self, topic: str, expected: int, timeout: float | None = None) -> bool:
+        res = await self._call("wait_for_count", topic=topic, expected=expected, timeout=timeout)
+        return bool(res.get("ok"))
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        if self._recv_task:
+            await asyncio.gather(self._recv_task, return_exceptions=True)
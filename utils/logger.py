@@ -17,13 +17,25 @@ class StageTimer:
     def __init__(self, logger: logging.Logger, stage: str):
         self.logger = logger
         self.stage = stage
+        self.t0: Optional[float] = None
+        self.t1: Optional[float] = None
     def __enter__(self):
         self.t0 = time.perf_counter()
         self.logger.info(f"stage_start {self.stage}")
         return self
     def __exit__(self, exc_type, exc, tb):
-        dt = time.perf_counter() - self.t0
+        self.t1 = time.perf_counter()
+        dt = self.t1 - self.t0
         if exc:
             self.logger.error(f"stage_error {self.stage} err={exc} duration={dt:.2f}s")
         else:
-            self.logger.info(f"stage_end {self.stage} duration={dt:.2f}s")
\ No newline at end of file
+            self.logger.info(f"stage_end {self.stage} duration={dt:.2f}s")
+
+def log_overlap(logger: logging.Logger, a: StageTimer, b: StageTimer):
+    # 并行阶段的重叠时长即相对串行执行节省的墙钟时间
+    if None in (a.t0, a.t1, b.t0, b.t1):
+        return
+    overlap = max(0.0, min(a.t1, b.t1) - max(a.t0, b.t0))
+    serial = (a.t1 - a.t0) + (b.t1 - b.t0)
+    wall = max(a.t1, b.t1) - min(a.t0, b.t0)
+    logger.info(f"stage_overlap {a.stage}+{b.stage} overlap={overlap:.2f}s serial={serial:.2f}s wall={wall:.2f}s")